@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+This file benchmarks 'Backtest' over a synthetic dialer export
+read with 'DataTank.loadDataInChunks', whose categorical and
+text columns are shared with the worker processes. Workers are
+started with 'fork' and with 'spawn', the latter shares nothing
+but the shared memory blocks with this process.
+
+Run directly to print the backtest time of every start method:
+    python benchmarks/backtest.py 100000
+"""
+
+# Libs
+import os
+import sys
+import tempfile
+import timeit
+import multiprocessing
+
+# Owned
+from PCATR.DataTank.data_tank import DataTank
+from PCATR.DataTank.synthetic_data import SyntheticCallLog
+from PCATR.CallTimePredictor.CTPBacktest.backtest import Backtest, BacktestModel
+from PCATR.CallTimePredictor.CTPAlgorithm.simple_average_forecast import SimpleAverageForecast
+from PCATR.CallTimePredictor.CTPAlgorithm.hourly_interval_average_forecast import HourlyIntervalAverageForecast
+from PCATR.CallTimePredictor.CTPAlgorithm.poisson_forecast import PoissonForecast
+
+NUM_TRAIN_WEEKS = 2
+
+MODELS = [BacktestModel(SimpleAverageForecast), BacktestModel(HourlyIntervalAverageForecast), BacktestModel(PoissonForecast)]
+
+def chunkedData(numRows):
+    '''
+    Reads a synthetic dialer export chunk by chunk and processes it
+
+    @param {int} numRows - Number of calls
+    @returns {DataFrame} - Processed data
+    '''
+
+    directory = tempfile.mkdtemp()
+    filename = os.path.join(directory, 'calls_{}.csv'.format(numRows))
+    try:
+        SyntheticCallLog().toCsv(filename, numRows)
+        dataTank = DataTank()
+        dataTank.loadDataInChunks(filename, chunkSize=numRows // 4)
+        return dataTank.getProcessedData()
+    finally:
+        if os.path.exists(filename):
+            os.remove(filename)
+        os.rmdir(directory)
+
+def runBacktest(fullData, startMethod):
+    '''
+    Backtests the models on two processes started with a start method
+
+    @param {DataFrame} fullData - Processed data
+    @param {string} startMethod - 'fork' or 'spawn'
+    @returns {DataFrame} - Scores of 'Backtest.run'
+    '''
+
+    results = Backtest(MODELS, maxWorkers=2, startMethod=startMethod).run(fullData, NUM_TRAIN_WEEKS, maxFolds=2)
+    if results is None:
+        raise RuntimeError("Backtest with {} workers failed".format(startMethod))
+    return results
+
+class BacktestRun:
+    '''
+    Times 'Backtest.run' with workers started by every start method
+    '''
+
+    params = ['fork', 'spawn']
+    param_names = ['startMethod']
+    timeout = 300
+
+    def setup(self, startMethod):
+        if startMethod not in multiprocessing.get_all_start_methods():
+            raise NotImplementedError
+        self.fullData = chunkedData(4 * 7 * 3000)
+
+    def time_run(self, startMethod):
+        runBacktest(self.fullData, startMethod)
+
+    def track_scored_calls(self, startMethod):
+        return int(runBacktest(self.fullData, startMethod)['Count'].sum())
+
+if __name__ == '__main__':
+    numRows = int(sys.argv[1]) if len(sys.argv) > 1 else 4 * 7 * 3000
+    fullData = chunkedData(numRows)
+
+    for startMethod in multiprocessing.get_all_start_methods():
+        if startMethod == 'forkserver':
+            continue
+        seconds = min(timeit.repeat(lambda: runBacktest(fullData, startMethod), number=1, repeat=3))
+        print("{:8s} run: {:.3f}s".format(startMethod, seconds))
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+This file benchmarks reading dialer exports with 'DataTank.loadData'
+and 'DataTank.loadDataInChunks' from synthetic CSV files.
+
+Run directly to print the load time of a synthetic export:
+    python benchmarks/data_tank_loading.py 1000000
+"""
+
+# Libs
+import os
+import sys
+import tempfile
+import timeit
+
+# Owned
+from PCATR.DataTank.data_tank import DataTank
+from PCATR.DataTank.synthetic_data import SyntheticCallLog
+
+def syntheticCsv(numRows):
+    '''
+    Writes a synthetic dialer export to a temporary CSV file
+
+    @param {int} numRows - Number of calls
+    @returns {string} - Name of CSV file
+    '''
+
+    filename = os.path.join(tempfile.mkdtemp(), 'calls_{}.csv'.format(numRows))
+    SyntheticCallLog().toCsv(filename, numRows)
+    return filename
+
+class LoadData:
+    '''
+    Times reading a whole dialer export and streaming it chunk by chunk
+    '''
+
+    params = [10000, 1000000]
+    param_names = ['numRows']
+    timeout = 300
+
+    def setup(self, numRows):
+        self.filename = syntheticCsv(numRows)
+
+    def teardown(self, numRows):
+        os.remove(self.filename)
+        os.rmdir(os.path.dirname(self.filename))
+
+    def time_load_data(self, numRows):
+        DataTank().loadData(self.filename)
+
+    def time_load_data_in_chunks(self, numRows):
+        DataTank().loadDataInChunks(self.filename)
+
+    def peakmem_load_data_in_chunks(self, numRows):
+        DataTank().loadDataInChunks(self.filename)
+
+if __name__ == '__main__':
+    numRows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    filename = syntheticCsv(numRows)
+
+    whole = min(timeit.repeat(lambda: DataTank().loadData(filename), number=1, repeat=3))
+    chunked = min(timeit.repeat(lambda: DataTank().loadDataInChunks(filename), number=1, repeat=3))
+    print("rows: {}\tloadData: {:.3f}s\tloadDataInChunks: {:.3f}s".format(numRows, whole, chunked))
+    os.remove(filename)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+This file benchmarks 'DataTank.getProcessedData' against the string 
+splitting implementation it replaced.
+
+Run directly to print a comparison table:
+    python benchmarks/data_tank_processing.py 1000000
+"""
+
+# Libs
+import sys
+import timeit
+import datetime as dt
+import pandas as pd
+
+# Owned
+from PCATR.DataTank.data_tank import DataTank
+from PCATR.DataTank.synthetic_data import SyntheticCallLog
+
+def legacyGetProcessedData(fullData):
+    '''
+    The string splitting implementation of 'DataTank.getProcessedData' 
+    kept as the baseline of this benchmark
+
+    @param {DataFrame} fullData - Raw data
+    @returns {DataFrame} - Processed data
+    '''
+
+    fullData['CallDifferenceInterval'] = fullData.groupby(['CallArrivalDate'])['DialerCallArrivalTime'] \
+        .diff().fillna(fullData['DialerCallArrivalTime'])
+
+    datetimeObj = fullData["CallArrivalTime"].str.split(" ", n=1, expand=True)
+    fullData["TimeOfCall"] = datetimeObj[1]
+    fullData['Hour'] = fullData.TimeOfCall.str[:2]
+    fullData['Minutes'] = fullData.TimeOfCall.str[3:5]
+    fullData['Seconds'] = fullData.TimeOfCall.str[6:]
+
+    dateObj = fullData["CallArrivalDate"].str.split('/', n=2, expand=True)
+    fullData['Year'] = pd.to_numeric(dateObj[0])
+    fullData['Month'] = pd.to_numeric(dateObj[1])
+    fullData['DayDate'] = pd.to_numeric(dateObj[2])
+
+    fullData['DialerStartTimeMinusSeconds'] = fullData['CallArrivalDate'] + ' ' + fullData.TimeOfCall.str[:5]
+
+    fullData['CallArrivalTime'] = pd.to_datetime(fullData['CallArrivalTime'])
+    fullData['CallArrivalDate'] = pd.to_datetime(fullData['CallArrivalDate'])
+    fullData['DialerStartTime'] = pd.to_datetime(fullData['DialerStartTime'])
+
+    timeOfDay = fullData['CallArrivalTime'].dt.time
+    morning = (timeOfDay >= dt.time(hour=7, minute=0)) & (timeOfDay <= dt.time(hour=12, minute=0))
+    afternoon = (timeOfDay >= dt.time(hour=12, minute=0)) & (timeOfDay <= dt.time(hour=16, minute=0))
+    evening = (timeOfDay >= dt.time(hour=16, minute=0)) & (timeOfDay <= dt.time(hour=19, minute=0))
+    night = (timeOfDay >= dt.time(hour=19, minute=0)) & (timeOfDay <= dt.time(hour=23, minute=59))
+
+    fullData.loc[morning, 'IntervalOfDay'] = 'morning'
+    fullData.loc[afternoon, 'IntervalOfDay'] = 'afternoon'
+    fullData.loc[evening, 'IntervalOfDay'] = 'evening'
+    fullData.loc[night, 'IntervalOfDay'] = 'night'
+    return fullData
+
+def processedData(raw):
+    '''
+    Runs 'DataTank.getProcessedData' on a copy of the raw data
+
+    @param {DataFrame} raw - Raw data
+    @returns {DataFrame} - Processed data
+    '''
+
+    dataTank = DataTank()
+    dataTank.fullData = raw.copy()
+    return dataTank.getProcessedData()
+
+class GetProcessedData:
+    '''
+    Times the vectorized and the legacy feature engineering on the same raw data
+    '''
+
+    params = [10000, 1000000]
+    param_names = ['numRows']
+
+    def setup(self, numRows):
+        self.raw = SyntheticCallLog().generate(numRows)
+
+    def time_vectorized(self, numRows):
+        processedData(self.raw)
+
+    def time_legacy(self, numRows):
+        legacyGetProcessedData(self.raw.copy())
+
+if __name__ == '__main__':
+    numRows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    raw = SyntheticCallLog().generate(numRows)
+
+    pd.testing.assert_frame_equal(processedData(raw), legacyGetProcessedData(raw.copy()))
+
+    vectorized = min(timeit.repeat(lambda: processedData(raw), number=1, repeat=3))
+    legacy = min(timeit.repeat(lambda: legacyGetProcessedData(raw.copy()), number=1, repeat=3))
+    print("rows: {}\tlegacy: {:.3f}s\tvectorized: {:.3f}s\tspeedup: {:.1f}x".format(numRows, legacy, vectorized, legacy / vectorized))
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+This file benchmarks the aggregations of 'EDA' over
+synthetic processed data.
+
+Run directly to print the time of every aggregation:
+    python benchmarks/eda.py 1000000
+"""
+
+# Libs
+import sys
+import timeit
+
+# Owned
+from PCATR.DataTank.data_tank import DataTank
+from PCATR.DataTank.synthetic_data import SyntheticCallLog
+from PCATR.CallTimePredictor.CTPDataAnalysis.eda import EDA
+
+AGGREGATIONS = [
+    'callDays',
+    'eachDayCallCount',
+    'eachDayIntervalsCallCount',
+    'interdayCallCount',
+    'meanCallCount',
+    'maxCallTime',
+    'minCallTime',
+    'arrivalDifferencesPerDay'
+]
+
+def processedEda(numRows):
+    '''
+    Builds 'EDA' over synthetic processed data
+
+    @param {int} numRows - Number of calls
+    @returns {EDA} - Analysis of the data
+    '''
+
+    dataTank = DataTank()
+    dataTank.fullData = SyntheticCallLog().generate(numRows)
+    return EDA(dataTank.getProcessedData())
+
+class Aggregations:
+    '''
+    Times every aggregation of 'EDA' without plots
+    '''
+
+    params = ([10000, 1000000], AGGREGATIONS)
+    param_names = ['numRows', 'aggregation']
+
+    def setup(self, numRows, aggregation):
+        self.aggregation = getattr(processedEda(numRows), aggregation)
+
+    def time_aggregation(self, numRows, aggregation):
+        self.aggregation()
+
+if __name__ == '__main__':
+    numRows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    eda = processedEda(numRows)
+
+    for aggregation in AGGREGATIONS:
+        seconds = min(timeit.repeat(getattr(eda, aggregation), number=1, repeat=3))
+        print("{:<28}{:.4f}s".format(aggregation, seconds))
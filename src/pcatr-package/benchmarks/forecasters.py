@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+This file benchmarks 'fit' and 'predict' of the CTPAlgorithm
+forecasters on three weeks of synthetic train data and one
+week of test data.
+
+Run directly to print the fit and predict time of every forecaster:
+    python benchmarks/forecasters.py
+"""
+
+# Libs
+import timeit
+
+# Owned
+from PCATR.DataTank.data_tank import DataTank
+from PCATR.DataTank.synthetic_data import SyntheticCallLog
+from PCATR.CallTimePredictor.CTPAlgorithm.simple_average_forecast import SimpleAverageForecast
+from PCATR.CallTimePredictor.CTPAlgorithm.interday_average_forecast import InterdayAverageForecast
+from PCATR.CallTimePredictor.CTPAlgorithm.halfday_interval_average_forecast import HalfdayIntervalAverageForecast
+from PCATR.CallTimePredictor.CTPAlgorithm.hourly_interval_average_forecast import HourlyIntervalAverageForecast
+from PCATR.CallTimePredictor.CTPAlgorithm.smoothing_forecast import SmoothingForecast
+from PCATR.CallTimePredictor.CTPAlgorithm.double_smoothing_forecast import DoubleSmoothingForecast
+from PCATR.CallTimePredictor.CTPAlgorithm.poisson_forecast import PoissonForecast
+from PCATR.CallTimePredictor.CTPAlgorithm.time_series_forecast import TimeSeriesForecast
+from PCATR.CallTimePredictor.CTPAlgorithm.lstm_forecast import LstmForecast, LstmTrainer
+from PCATR.CallTimePredictor.CTPAlgorithm.seasonal_forecast import SeasonalForecast
+
+NUM_TRAIN_WEEKS = 3
+
+# Forecaster class and constructor parameters, the LSTM trains for a fixed number of epochs
+FORECASTERS = {
+    'SimpleAverageForecast': (SimpleAverageForecast, {}),
+    'InterdayAverageForecast': (InterdayAverageForecast, {}),
+    'HalfdayIntervalAverageForecast': (HalfdayIntervalAverageForecast, {}),
+    'HourlyIntervalAverageForecast': (HourlyIntervalAverageForecast, {}),
+    'SmoothingForecast': (SmoothingForecast, {}),
+    'DoubleSmoothingForecast': (DoubleSmoothingForecast, {}),
+    'PoissonForecast': (PoissonForecast, {}),
+    'TimeSeriesForecast': (TimeSeriesForecast, {}),
+    'LstmForecast': (LstmForecast, {'trainer': LstmTrainer(maxEpochs=5, patience=5, seed=0)})
+}
+
+def weeklySplit(numTrainWeeks=NUM_TRAIN_WEEKS):
+    '''
+    Splits synthetic processed data into whole train weeks and one test week
+
+    @param {int} numTrainWeeks - Number of weeks in train data
+    @returns {tuple} - (full data, train data, test data)
+    '''
+
+    dataTank = DataTank()
+    dataTank.fullData = SyntheticCallLog().generate((numTrainWeeks + 1) * 7 * 3000)
+    dataTank.getProcessedData()
+    trainData, testData = dataTank.trainTestSplitByWeeks(numTrainWeeks)
+    return dataTank.fullData, trainData, testData
+
+def newForecaster(name):
+    '''
+    Builds an unfitted forecaster
+
+    @param {string} name - Key in 'FORECASTERS'
+    @returns {object} - Forecaster
+    '''
+
+    forecaster, parameters = FORECASTERS[name]
+    return forecaster(**parameters)
+
+class FitPredict:
+    '''
+    Times 'fit' on train data and 'predict' on test data of every forecaster
+    '''
+
+    params = list(FORECASTERS)
+    param_names = ['forecaster']
+    timeout = 300
+
+    def setup(self, forecaster):
+        _, self.trainData, self.testData = weeklySplit()
+        self.forecaster = newForecaster(forecaster).fit(self.trainData)
+
+    def time_fit(self, forecaster):
+        newForecaster(forecaster).fit(self.trainData)
+
+    def time_predict(self, forecaster):
+        self.forecaster.predict(self.testData)
+
+class SeasonalFitPredict:
+    '''
+    Times 'SeasonalForecast', which takes the data in its constructor
+    and forecasts a week of minutes
+    '''
+
+    timeout = 300
+
+    def setup(self):
+        self.fullData, _, _ = weeklySplit()
+        self.forecaster = SeasonalForecast(self.fullData, NUM_TRAIN_WEEKS).fit()
+
+    def time_fit(self):
+        SeasonalForecast(self.fullData, NUM_TRAIN_WEEKS).fit()
+
+    def time_forecast(self):
+        self.forecaster.model.forecast(10080)
+
+if __name__ == '__main__':
+    fullData, trainData, testData = weeklySplit()
+
+    for name in FORECASTERS:
+        fit = min(timeit.repeat(lambda: newForecaster(name).fit(trainData), number=1, repeat=3))
+        forecaster = newForecaster(name).fit(trainData)
+        predict = min(timeit.repeat(lambda: forecaster.predict(testData), number=1, repeat=3))
+        print("{:32s} fit: {:8.3f}s\tpredict: {:8.3f}s".format(name, fit, predict))
+
+    fit = min(timeit.repeat(lambda: SeasonalForecast(fullData, NUM_TRAIN_WEEKS).fit(), number=1, repeat=3))
+    print("{:32s} fit: {:8.3f}s".format('SeasonalForecast', fit))
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+This file benchmarks the latency of 'predictAt', the single-call 
+query of the CTPAlgorithm forecasters, for one timestamp and for 
+an array of timestamps.
+
+Run directly to print the latency per call of every forecaster:
+    python benchmarks/point_query.py
+"""
+
+# Libs
+import timeit
+import numpy as np
+
+# Owned
+from PCATR.DataTank.data_tank import DataTank
+from PCATR.DataTank.synthetic_data import SyntheticCallLog
+from PCATR.CallTimePredictor.CTPAlgorithm.simple_average_forecast import SimpleAverageForecast
+from PCATR.CallTimePredictor.CTPAlgorithm.interday_average_forecast import InterdayAverageForecast
+from PCATR.CallTimePredictor.CTPAlgorithm.halfday_interval_average_forecast import HalfdayIntervalAverageForecast
+from PCATR.CallTimePredictor.CTPAlgorithm.hourly_interval_average_forecast import HourlyIntervalAverageForecast
+from PCATR.CallTimePredictor.CTPAlgorithm.smoothing_forecast import SmoothingForecast
+from PCATR.CallTimePredictor.CTPAlgorithm.double_smoothing_forecast import DoubleSmoothingForecast
+from PCATR.CallTimePredictor.CTPAlgorithm.poisson_forecast import PoissonForecast
+
+FORECASTERS = {
+    'SimpleAverageForecast': SimpleAverageForecast,
+    'InterdayAverageForecast': InterdayAverageForecast,
+    'HalfdayIntervalAverageForecast': HalfdayIntervalAverageForecast,
+    'HourlyIntervalAverageForecast': HourlyIntervalAverageForecast,
+    'SmoothingForecast': SmoothingForecast,
+    'DoubleSmoothingForecast': DoubleSmoothingForecast,
+    'PoissonForecast': PoissonForecast
+}
+
+def fittedForecasters(numRows=100000):
+    '''
+    Fits every benchmarked forecaster on the same processed data
+
+    @param {int} numRows - Number of calls in the data
+    @returns {tuple} - (dict of fitted forecasters, int64 epoch nanoseconds of the test calls)
+    '''
+
+    dataTank = DataTank()
+    dataTank.fullData = SyntheticCallLog().generate(numRows)
+    dataTank.getProcessedData()
+    trainData, testData = dataTank.trainTestSplit()
+
+    forecasters = {name: forecaster().fit(trainData) for name, forecaster in FORECASTERS.items()}
+    return forecasters, testData['CallArrivalTime'].values.view('int64')
+
+class PredictAt:
+    '''
+    Times 'predictAt' for one call and for an array of 10000 calls
+    '''
+
+    params = list(FORECASTERS)
+    param_names = ['forecaster']
+
+    def setup(self, forecaster):
+        forecasters, self.timestamps = fittedForecasters()
+        self.forecaster = forecasters[forecaster]
+        self.timestamp = int(self.timestamps[0])
+        self.timestamps = self.timestamps[:10000]
+
+    def time_single_call(self, forecaster):
+        self.forecaster.predictAt(self.timestamp)
+
+    def time_10000_calls(self, forecaster):
+        self.forecaster.predictAt(self.timestamps)
+
+if __name__ == '__main__':
+    forecasters, timestamps = fittedForecasters()
+    single, batch = int(timestamps[0]), timestamps[:10000]
+
+    for name, forecaster in forecasters.items():
+        singleCall = min(timeit.repeat(lambda: forecaster.predictAt(single), number=10000, repeat=3)) / 10000
+        batchCall = min(timeit.repeat(lambda: forecaster.predictAt(batch), number=10, repeat=3)) / 10 / len(batch)
+        print("{:32s} single: {:8.2f}us\tper call in batch: {:8.3f}us".format(name, singleCall * 1e6, batchCall * 1e6))
@@ -30,13 +30,22 @@ class DoubleSmoothingForecast:
     forecasts upon calculating weighted averages 
     of past individual observations and a weighted average 
     of the estimated trend at a respective time
+
+    @param {float} smoothingLevel - Smoothing factor of the level
+    @param {float} smoothingSlope - Smoothing factor of the trend
     '''
-    def __init__(self):
+    def __init__(self, smoothingLevel=0.365, smoothingSlope=0.0000001):
         self.model = None
         self.trainData = None
         self.testData = None
         self.forecastData = None
+        self.nextInterval = None
+        self.smoothingLevel = smoothingLevel
+        self.smoothingSlope = smoothingSlope
+        self.level = None
+        self.trend = None
 
+    @logger.timed()
     def fit(self, trainData):
         '''
         Fits the training model using double smoothing forecast
@@ -49,13 +58,21 @@ class DoubleSmoothingForecast:
             self.trainData = trainData
             
             self.model = Holt(np.asarray(self.trainData['CallDifferenceInterval']))\
-                .fit(smoothing_level = 0.365, smoothing_slope = 0.0000001)
+                .fit(smoothing_level = self.smoothingLevel, smoothing_slope = self.smoothingSlope)
+
+            # State of the recursion, advanced by 'update' without refitting
+            self.smoothingLevel = float(self.model.params['smoothing_level'])
+            self.smoothingSlope = float(self.model.params['smoothing_trend'])
+            self.level = float(np.asarray(self.model.level)[-1])
+            self.trend = float(np.asarray(self.model.trend)[-1])
+            self.nextInterval = self.level + self.trend
 
             return self
         except:
             logger.Logger.LOGERROR("double_smoothing_forecast.py", "DoubleSmoothingForecast::fit", "Unable to train model")
             return None
 
+    @logger.timed()
     def predict(self, testData):
         '''
         Predicts using the training model for double smoothing forecast
@@ -66,13 +83,77 @@ class DoubleSmoothingForecast:
 
         try:
             self.testData = testData
-            self.forecastData = self.testData.copy()
-            self.forecastData['CallDifferenceInterval'] = self.model.forecast(len(self.testData))
+            # Shallow copy, only the forecast column is replaced
+            self.forecastData = self.testData.copy(deep=False)
+            self.forecastData['CallDifferenceInterval'] = self.level + self.trend * np.arange(1, len(self.testData) + 1)
             return self.forecastData
         except:
             logger.Logger.LOGERROR("double_smoothing_forecast.py", "DoubleSmoothingForecast::predict", "Unable to predict forecast")
             return None
+
+    def update(self, newObservations):
+        '''
+        Advances the level and trend over new observations in O(k) for k observations, 
+        so the forecast stays current without refitting on history
+
+        @param {float|ndarray|Series} newObservations - New values of 'CallDifferenceInterval', oldest first
+        @returns {DoubleSmoothingForecast} - self
+        '''
+
+        alpha, beta = self.smoothingLevel, self.smoothingSlope
+        level, trend = self.level, self.trend
+        for observation in np.atleast_1d(np.asarray(newObservations, dtype='float64')).tolist():
+            previousLevel = level
+            level = alpha * observation + (1 - alpha) * (level + trend)
+            trend = beta * (level - previousLevel) + (1 - beta) * trend
+
+        self.level, self.trend = level, trend
+        self.nextInterval = level + trend
+        return self
+
+    def getState(self):
+        '''
+        Gives the state of the recursion, to store the model or to restore it in another process
+
+        @returns {dict} - Serializable state
+        '''
+
+        return {
+            'smoothingLevel': self.smoothingLevel,
+            'smoothingSlope': self.smoothingSlope,
+            'level': self.level,
+            'trend': self.trend
+        }
+
+    def setState(self, state):
+        '''
+        Restores a state given by 'getState', no fitting is needed afterwards
+
+        @param {dict} state - State given by 'getState'
+        @returns {DoubleSmoothingForecast} - self
+        '''
+
+        self.smoothingLevel = float(state['smoothingLevel'])
+        self.smoothingSlope = float(state['smoothingSlope'])
+        self.level = float(state['level'])
+        self.trend = float(state['trend'])
+        self.nextInterval = self.level + self.trend
+        return self
             
+    def predictAt(self, timestamps):
+        '''
+        Predicts the time until the next call for a single timestamp, or an 
+        array of timestamps, without building a DataFrame. The one-step-ahead 
+        forecast of the fitted model is given for every timestamp
+
+        @param {datetime|string|int|ndarray} timestamps - Time(s) of the call, integers are epoch nanoseconds
+        @returns {float|ndarray} - Predicted value(s)
+        '''
+
+        if np.ndim(timestamps) == 0:
+            return self.nextInterval
+        return np.full(len(timestamps), self.nextInterval)
+
     def showPlot(self):
         '''
         Displays the plot of train data, test data and predicted results
@@ -0,0 +1,232 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+This file implements the 'GroupedAverage' class, the lookup-table
+engine shared by the average based forecasters, and its weekday x
+time-of-day variant 'TimeBucketAverage'. The mean of every group is
+stored in a dense array indexed by the codes of the grouping keys,
+so predicting is a single vectorized gather.
+"""
+
+__author__ = 'Emad Bin Abid, Ateeb Ahmed, Syed Bilal Hoda'
+__copyright__ = 'Copyright 2019, Prediction of Call Arrival Times and Rates'
+__credits__ = ['Afiniti Software Solutions (Pvt.) Ltd.']
+__version__ = '0.0.1'
+__maintainer__ = 'Emad Bin Abid, Ateeb Ahmed, Syed Bilal Hoda'
+__status__ = 'dev'
+
+# Libs
+import pandas as pd
+import numpy as np
+
+# Owned
+from PCATR.DataTank.data_tank import WEEKDAYS, NANOSECONDS_PER_DAY, INTERVAL_EDGES, toEpochNanoseconds
+
+# Keys with a fixed set of values get a fixed code order, any other key is coded from training data
+KNOWN_CATEGORIES = {
+    'DayOfWeek': WEEKDAYS,
+    'IntervalOfDay': ['morning', 'afternoon', 'evening', 'night'],
+    'Hour': ['{:02d}'.format(hour) for hour in range(24)]
+}
+
+class GroupedAverage:
+    '''
+    This class implements the lookup-table engine shared by the
+    average based forecasters. The mean of every group is stored
+    in a dense array indexed by the codes of the grouping keys,
+    so predicting is a single vectorized gather.
+
+    @param {List<string>} keys - Grouping columns, e.g. ['DayOfWeek', 'IntervalOfDay']
+    @param {string} target - Column to average
+    '''
+
+    def __init__(self, keys, target='CallDifferenceInterval'):
+        self.keys = list(keys)
+        self.target = target
+        self.categories = None
+        self.table = None
+        self.counts = None
+        self.globalMean = None
+
+    def fit(self, data):
+        '''
+        Computes the mean of 'target' for every combination of the keys in one
+        pass. Combinations missing from the data fall back to the overall mean
+
+        @param {DataFrame} data - Training data
+        @returns {GroupedAverage} - self
+        '''
+
+        self.categories = self.learnCategories(data)
+        shape = tuple(len(categories) for categories in self.categories)
+
+        groups = self.groupCodes(data)
+        values = np.asarray(data[self.target], dtype='float64')
+        observed = (groups >= 0) & ~np.isnan(values)
+
+        sums = np.bincount(groups[observed], weights=values[observed], minlength=int(np.prod(shape)))
+        counts = np.bincount(groups[observed], minlength=int(np.prod(shape)))
+        self.globalMean = values[observed].mean() if observed.any() else np.nan
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            table = sums / counts
+        table[counts == 0] = self.globalMean
+        self.table = table.reshape(shape)
+        self.counts = counts.reshape(shape)
+        return self
+
+    def learnCategories(self, data):
+        '''
+        Gives the values of every key in code order
+
+        @param {DataFrame} data - Training data
+        @returns {List<list>} - Values of every key
+        '''
+
+        return [KNOWN_CATEGORIES[key] if key in KNOWN_CATEGORIES else
+            list(pd.unique(data[key].dropna())) for key in self.keys]
+
+    def groupCodes(self, data):
+        '''
+        Gives the flat index into the table for every row, -1 for rows
+        whose key values were not seen while fitting
+
+        @param {DataFrame} data - Data holding the key columns
+        @returns {ndarray} - int64 flat indices
+        '''
+
+        groups = np.zeros(len(data), dtype='int64')
+        unseen = np.zeros(len(data), dtype=bool)
+        for key, categories in zip(self.keys, self.categories):
+            codes = pd.Categorical(data[key], categories=categories).codes.astype('int64')
+            unseen |= codes < 0
+            groups = groups * len(categories) + codes
+        groups[unseen] = -1
+        return groups
+
+    def groupCodesAt(self, nanoseconds):
+        '''
+        Gives the flat index into the table of epoch nanoseconds, for keys 
+        that follow from the time of the call ('DayOfWeek', 'IntervalOfDay', 
+        'Hour'). 1970-01-01 is a Thursday
+
+        @param {int|ndarray} nanoseconds - Epoch nanoseconds
+        @returns {int|ndarray} - Flat indices, -1 for times outside of every group
+        '''
+
+        nanosecondOfDay = nanoseconds % NANOSECONDS_PER_DAY
+        groups = 0
+        unseen = False
+        for key, categories in zip(self.keys, self.categories):
+            if key == 'DayOfWeek':
+                codes = (nanoseconds // NANOSECONDS_PER_DAY + 3) % 7
+            elif key == 'IntervalOfDay':
+                codes = np.searchsorted(INTERVAL_EDGES, nanosecondOfDay, side='right') - 1
+                unseen = unseen | (codes < 0) | (codes >= len(categories))
+            elif key == 'Hour':
+                codes = nanosecondOfDay // (3600 * 1000000000)
+            else:
+                raise ValueError("'{}' does not follow from a timestamp".format(key))
+            groups = groups * len(categories) + codes
+        return np.where(unseen, -1, groups)
+
+    def predictAt(self, timestamps):
+        '''
+        Gives the mean of the group of a single timestamp in O(1), or of 
+        an array of timestamps at once, without building a DataFrame
+
+        @param {datetime|string|int|ndarray} timestamps - Timestamp(s), integers are epoch nanoseconds
+        @returns {float|ndarray} - Predicted value(s)
+        '''
+
+        groups = self.groupCodesAt(toEpochNanoseconds(timestamps))
+        if np.ndim(groups) == 0:
+            return self.globalMean if groups < 0 else float(self.table.ravel()[groups])
+        return self.lookup(groups)
+
+    def predict(self, data):
+        '''
+        Gives the mean of the group of every row with one gather from the table
+
+        @param {DataFrame} data - Data holding the key columns
+        @returns {ndarray} - Predicted values, the overall mean for unseen groups
+        '''
+
+        return self.lookup(self.groupCodes(data))
+
+    def lookup(self, groups):
+        '''
+        Gives the table values at flat indices
+
+        @param {ndarray} groups - Flat indices, -1 for unseen groups
+        @returns {ndarray} - Table values, the overall mean for unseen groups
+        '''
+
+        values = self.table.ravel()[groups]
+        values[groups < 0] = self.globalMean
+        return values
+
+    def toFrame(self):
+        '''
+        Gives the table as a DataFrame indexed by the keys, for inspection
+
+        @returns {DataFrame} - Mean and count of 'target' for every group
+        '''
+
+        index = pd.MultiIndex.from_product(self.categories, names=self.keys)
+        return pd.DataFrame({self.target: self.table.ravel(), 'Count': self.counts.ravel()}, index=index)
+
+class TimeBucketAverage(GroupedAverage):
+    '''
+    This class implements the weekday x time-of-day bucket variant 
+    of the lookup-table engine. Groups are derived from a timestamp 
+    column with integer arithmetic on epoch nanoseconds, which also 
+    allows O(1) point queries for a single timestamp.
+
+    @param {int} bucketMinutes - Width of a time-of-day bucket, must divide a day
+    @param {string} timeColumn - Column holding the call timestamps
+    @param {string} target - Column to average
+    '''
+
+    def __init__(self, bucketMinutes=60, timeColumn='CallArrivalTime', target='CallDifferenceInterval'):
+        super(TimeBucketAverage, self).__init__(['DayOfWeek', 'TimeOfDay'], target)
+        if 1440 % int(bucketMinutes) != 0:
+            raise ValueError("bucketMinutes must divide a day, got {}".format(bucketMinutes))
+        self.bucketMinutes = int(bucketMinutes)
+        self.timeColumn = timeColumn
+        self.bucketNanoseconds = self.bucketMinutes * 60 * 1000000000
+        self.numBuckets = 1440 // self.bucketMinutes
+
+    def learnCategories(self, data):
+        '''
+        Gives the weekdays and the start of every time-of-day bucket
+
+        @param {DataFrame} data - Training data
+        @returns {List<list>} - Values of every key
+        '''
+
+        starts = range(0, 1440, self.bucketMinutes)
+        return [WEEKDAYS, ['{:02d}:{:02d}'.format(minute // 60, minute % 60) for minute in starts]]
+
+    def groupCodes(self, data):
+        '''
+        Gives the flat index into the table for every row
+
+        @param {DataFrame} data - Data holding the timestamp column
+        @returns {ndarray} - int64 flat indices
+        '''
+
+        return self.groupCodesAt(toEpochNanoseconds(data[self.timeColumn]))
+
+    def groupCodesAt(self, nanoseconds):
+        '''
+        Gives the flat index into the table of epoch nanoseconds, 
+        1970-01-01 being a Thursday
+
+        @param {int|ndarray} nanoseconds - Epoch nanoseconds
+        @returns {int|ndarray} - Flat indices
+        '''
+
+        weekday = (nanoseconds // NANOSECONDS_PER_DAY + 3) % 7
+        return weekday * self.numBuckets + (nanoseconds % NANOSECONDS_PER_DAY) // self.bucketNanoseconds
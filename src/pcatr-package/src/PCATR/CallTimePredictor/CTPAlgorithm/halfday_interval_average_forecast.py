@@ -23,6 +23,7 @@ import matplotlib.pyplot as plt
 
 # Owned
 from PCATR.Logger import logger
+from PCATR.CallTimePredictor.CTPAlgorithm.grouped_average import GroupedAverage
 
 class HalfdayIntervalAverageForecast:
     '''
@@ -38,6 +39,7 @@ class HalfdayIntervalAverageForecast:
         self.testData = None
         self.forecastData = None
 
+    @logger.timed()
     def fit(self, trainData):
         '''
         Fits the training model using halfday interval average forecast
@@ -48,13 +50,14 @@ class HalfdayIntervalAverageForecast:
 
         try:
             self.trainData = trainData
-            self.model = pd.DataFrame(self.trainData.groupby(['DayOfWeek', 'IntervalOfDay'])['CallDifferenceInterval'].mean())
+            self.model = GroupedAverage(['DayOfWeek', 'IntervalOfDay']).fit(self.trainData)
 
             return self
         except:
             logger.Logger.LOGERROR("halfday_interval_average_forecast.py", "HalfdayIntervalAverageForecast::fit", "Unable to train model")
             return None 
 
+    @logger.timed()
     def predict(self, testData):
         '''
         Predicts using the training model for halfday interval average forecast
@@ -65,132 +68,26 @@ class HalfdayIntervalAverageForecast:
 
         try:
             self.testData = testData
-            self.forecastData = self.testData.copy()
-
-            # Monday
-            monday = (self.forecastData['DayOfWeek'] == 'Monday')&(self.forecastData['IntervalOfDay'] == 'morning')
-            self.forecastData.loc[monday,'CallDifferenceInterval'] = \
-                self.model['CallDifferenceInterval'].iloc[6]
-
-            monday = (self.forecastData['DayOfWeek'] == 'Monday')&(self.forecastData['IntervalOfDay'] == 'afternoon')
-            self.forecastData.loc[monday,'CallDifferenceInterval'] = \
-                self.model['CallDifferenceInterval'].iloc[4]
-
-            monday = (self.forecastData['DayOfWeek'] == 'Monday')&(self.forecastData['IntervalOfDay'] == 'evening')
-            self.forecastData.loc[monday,'CallDifferenceInterval'] = \
-                self.model['CallDifferenceInterval'].iloc[5]
-
-            monday = (self.forecastData['DayOfWeek'] == 'Monday')&(self.forecastData['IntervalOfDay'] == 'night')
-            self.forecastData.loc[monday,'CallDifferenceInterval'] = \
-                self.model['CallDifferenceInterval'].iloc[7]
-
-            # Tuesday
-            tuesday = (self.forecastData['DayOfWeek'] == 'Tuesday')&(self.forecastData['IntervalOfDay'] == 'morning')
-            self.forecastData.loc[tuesday,'CallDifferenceInterval'] = \
-                self.model['CallDifferenceInterval'].iloc[22]
-
-            tuesday = (self.forecastData['DayOfWeek'] == 'Tuesday')&(self.forecastData['IntervalOfDay'] == 'afternoon')
-            self.forecastData.loc[tuesday,'CallDifferenceInterval'] = \
-                self.model['CallDifferenceInterval'].iloc[20]
-
-            tuesday = (self.forecastData['DayOfWeek'] == 'Tuesday')&(self.forecastData['IntervalOfDay'] == 'evening')
-            self.forecastData.loc[tuesday,'CallDifferenceInterval'] = \
-                self.model['CallDifferenceInterval'].iloc[21]
-
-            tuesday = (self.forecastData['DayOfWeek'] == 'Tuesday')&(self.forecastData['IntervalOfDay'] == 'night')
-            self.forecastData.loc[tuesday,'CallDifferenceInterval'] = \
-                self.model['CallDifferenceInterval'].iloc[23]
-            
-            # Wednesday
-            wednesday = (self.forecastData['DayOfWeek'] == 'Wednesday')&(self.forecastData['IntervalOfDay'] == 'morning')
-            self.forecastData.loc[wednesday,'CallDifferenceInterval'] = \
-                self.model['CallDifferenceInterval'].iloc[26]
-
-            wednesday = (self.forecastData['DayOfWeek'] == 'Wednesday')&(self.forecastData['IntervalOfDay'] == 'afternoon')
-            self.forecastData.loc[wednesday,'CallDifferenceInterval'] = \
-                self.model['CallDifferenceInterval'].iloc[24]
-
-            wednesday = (self.forecastData['DayOfWeek'] == 'Wednesday')&(self.forecastData['IntervalOfDay'] == 'evening')
-            self.forecastData.loc[wednesday,'CallDifferenceInterval'] = \
-                self.model['CallDifferenceInterval'].iloc[25]
-
-            wednesday = (self.forecastData['DayOfWeek'] == 'Wednesday')&(self.forecastData['IntervalOfDay'] == 'night')
-            self.forecastData.loc[wednesday,'CallDifferenceInterval'] = \
-                self.model['CallDifferenceInterval'].iloc[27]
-
-            # Thursday
-            thursday = (self.forecastData['DayOfWeek'] == 'Thursday')&(self.forecastData['IntervalOfDay'] == 'morning')
-            self.forecastData.loc[thursday,'CallDifferenceInterval'] = \
-                self.model['CallDifferenceInterval'].iloc[18]
-
-            thursday = (self.forecastData['DayOfWeek'] == 'Thursday')&(self.forecastData['IntervalOfDay'] == 'afternoon')
-            self.forecastData.loc[thursday,'CallDifferenceInterval'] = \
-                self.model['CallDifferenceInterval'].iloc[16]
-
-            thursday = (self.forecastData['DayOfWeek'] == 'Thursday')&(self.forecastData['IntervalOfDay'] == 'evening')
-            self.forecastData.loc[thursday,'CallDifferenceInterval'] = \
-                self.model['CallDifferenceInterval'].iloc[17]
-
-            thursday = (self.forecastData['DayOfWeek'] == 'Thursday')&(self.forecastData['IntervalOfDay'] == 'night')
-            self.forecastData.loc[thursday,'CallDifferenceInterval'] = \
-                self.model['CallDifferenceInterval'].iloc[19]
-
-            # Friday
-            friday = (self.forecastData['DayOfWeek'] == 'Friday')&(self.forecastData['IntervalOfDay'] == 'morning')
-            self.forecastData.loc[friday,'CallDifferenceInterval'] = \
-                self.model['CallDifferenceInterval'].iloc[2]
-
-            friday = (self.forecastData['DayOfWeek'] == 'Friday')&(self.forecastData['IntervalOfDay'] == 'afternoon')
-            self.forecastData.loc[friday,'CallDifferenceInterval'] = \
-                self.model['CallDifferenceInterval'].iloc[0]
-
-            friday = (self.forecastData['DayOfWeek'] == 'Friday')&(self.forecastData['IntervalOfDay'] == 'evening')
-            self.forecastData.loc[friday,'CallDifferenceInterval'] = \
-                self.model['CallDifferenceInterval'].iloc[1]
-
-            friday = (self.forecastData['DayOfWeek'] == 'Friday')&(self.forecastData['IntervalOfDay'] == 'night')
-            self.forecastData.loc[friday,'CallDifferenceInterval'] = \
-                self.model['CallDifferenceInterval'].iloc[3]
-
-            # Saturday
-            saturday = (self.forecastData['DayOfWeek'] == 'Saturday')&(self.forecastData['IntervalOfDay'] == 'morning')
-            self.forecastData.loc[saturday,'CallDifferenceInterval'] = \
-                self.model['CallDifferenceInterval'].iloc[10]
-
-            saturday = (self.forecastData['DayOfWeek'] == 'Saturday')&(self.forecastData['IntervalOfDay'] == 'afternoon')
-            self.forecastData.loc[saturday,'CallDifferenceInterval'] = \
-                self.model['CallDifferenceInterval'].iloc[8]
-
-            saturday = (self.forecastData['DayOfWeek'] == 'Saturday')&(self.forecastData['IntervalOfDay'] == 'evening')
-            self.forecastData.loc[saturday,'CallDifferenceInterval'] = \
-                self.model['CallDifferenceInterval'].iloc[9]
-
-            saturday = (self.forecastData['DayOfWeek'] == 'Saturday')&(self.forecastData['IntervalOfDay'] == 'night')
-            self.forecastData.loc[saturday,'CallDifferenceInterval'] = \
-                self.model['CallDifferenceInterval'].iloc[11]
-
-            # Sunday
-            sunday = (self.forecastData['DayOfWeek'] == 'Sunday')&(self.forecastData['IntervalOfDay'] == 'morning')
-            self.forecastData.loc[sunday,'CallDifferenceInterval'] = \
-                self.model['CallDifferenceInterval'].iloc[10]
-
-            sunday = (self.forecastData['DayOfWeek'] == 'Sunday')&(self.forecastData['IntervalOfDay'] == 'afternoon')
-            self.forecastData.loc[sunday,'CallDifferenceInterval'] = \
-                self.model['CallDifferenceInterval'].iloc[8]
-
-            sunday = (self.forecastData['DayOfWeek'] == 'Sunday')&(self.forecastData['IntervalOfDay'] == 'evening')
-            self.forecastData.loc[sunday,'CallDifferenceInterval'] = \
-                self.model['CallDifferenceInterval'].iloc[9]
-
-            sunday = (self.forecastData['DayOfWeek'] == 'Sunday')&(self.forecastData['IntervalOfDay'] == 'night')
-            self.forecastData.loc[sunday,'CallDifferenceInterval'] = \
-                self.model['CallDifferenceInterval'].iloc[11]
+            # Shallow copy, only the forecast column is replaced
+            self.forecastData = self.testData.copy(deep=False)
+            self.forecastData['CallDifferenceInterval'] = self.model.predict(self.testData)
 
             return self.forecastData
         except:
             logger.Logger.LOGERROR("halfday_interval_average_forecast.py", "HalfdayIntervalAverageForecast::predict", "Unable to predict forecast")
             return None
     
+    def predictAt(self, timestamps):
+        '''
+        Predicts the time until the next call for a single timestamp, or an 
+        array of timestamps, without building a DataFrame
+
+        @param {datetime|string|int|ndarray} timestamps - Time(s) of the call, integers are epoch nanoseconds
+        @returns {float|ndarray} - Predicted value(s)
+        '''
+
+        return self.model.predictAt(timestamps)
+
     def showPlot(self):
         '''
         Displays the plot of train data, test data and predicted results
@@ -4,9 +4,10 @@
 """
 This file implements the 'HourlyIntervalAverageForecast' class 
 to compute a set of average values and each value is associated 
-with a specific day and a specific hour gap. It distinguishes 
-between hours and determines associated average value and predicts 
-the time until the next call.
+with a specific day and a specific hour gap (or any bucket of 
+minutes dividing a day). It distinguishes between hours and 
+determines associated average value and predicts the time 
+until the next call.
 """
 
 __author__ = 'Emad Bin Abid, Ateeb Ahmed, Syed Bilal Hoda'
@@ -22,6 +23,7 @@ import matplotlib.pyplot as plt
 
 # Owned
 from PCATR.Logger import logger
+from PCATR.CallTimePredictor.CTPAlgorithm.grouped_average import TimeBucketAverage
 
 class HourlyIntervalAverageForecast:
     '''
@@ -30,30 +32,36 @@ class HourlyIntervalAverageForecast:
     specific day and a specific hour gap. It distinguishes 
     between hours and determines associated average value 
     and predicts the time until the next call
+
+    @param {int} bucketMinutes - Width of the time-of-day buckets, 60 for hours
     '''
 
-    def __init__(self):
+    def __init__(self, bucketMinutes=60):
+        self.bucketMinutes = bucketMinutes
         self.model = None
         self.trainData = None
         self.testData = None
         self.forecastData = None
 
+    @logger.timed()
     def fit(self, trainData):
         '''
-        Fits the training model using hourly interval average forecast
+        Fits the training model using hourly interval average forecast, a 
+        weekday x time-of-day table built in one pass over the data
 
         @param {DataFrame} trainData - Training data
         @returns {HourlyIntervalAverageForecast} - self
         '''
         try:
             self.trainData = trainData
-            self.model = pd.DataFrame(self.trainData.groupby(['DayOfWeek'])['CallDifferenceInterval'].mean())
+            self.model = TimeBucketAverage(self.bucketMinutes).fit(self.trainData)
 
             return self
         except:
             logger.Logger.LOGERROR("hourly_interval_average_forecast.py", "HourlyIntervalAverageForecast::fit", "Unable to train model")
             return None 
 
+    @logger.timed()
     def predict(self, testData):
         '''
         Predicts using the training model for hourly interval average forecast
@@ -64,41 +72,27 @@ class HourlyIntervalAverageForecast:
 
         try:
             self.testData = testData
-            self.forecastData = self.testData.copy()
-
-            monday = self.forecastData['DayOfWeek'] == 'Monday'
-            self.forecastData.loc[monday,'CallDifferenceInterval'] = \
-                self.model['CallDifferenceInterval'].iloc[1]
-
-            tuesday = self.forecastData['DayOfWeek'] == 'Tuesday'
-            self.forecastData.loc[tuesday,'CallDifferenceInterval'] = \
-                self.model['CallDifferenceInterval'].iloc[5]
-
-            wednesday = self.forecastData['DayOfWeek'] == 'Wednesday'
-            self.forecastData.loc[wednesday,'CallDifferenceInterval'] = \
-                self.model['CallDifferenceInterval'].iloc[6]
-
-            thursday = self.forecastData['DayOfWeek'] == 'Thursday'
-            self.forecastData.loc[thursday,'CallDifferenceInterval'] = \
-                self.model['CallDifferenceInterval'].iloc[4]
-
-            friday = self.forecastData['DayOfWeek'] == 'Friday'
-            self.forecastData.loc[friday,'CallDifferenceInterval'] = \
-                self.model['CallDifferenceInterval'].iloc[0]
-
-            saturday = self.forecastData['DayOfWeek'] == 'Saturday'
-            self.forecastData.loc[saturday,'CallDifferenceInterval'] = \
-                self.model['CallDifferenceInterval'].iloc[2]
-
-            sunday = self.forecastData['DayOfWeek'] == 'Sunday'
-            self.forecastData.loc[sunday,'CallDifferenceInterval'] = \
-                self.model['CallDifferenceInterval'].iloc[3]
+            # Shallow copy, only the forecast column is replaced
+            self.forecastData = self.testData.copy(deep=False)
+            self.forecastData['CallDifferenceInterval'] = self.model.predict(self.testData)
 
             return self.forecastData
         except:
             logger.Logger.LOGERROR("hourly_interval_average_forecast.py", "HourlyIntervalAverageForecast::predict", "Unable to predict forecast")
             return None
-    
+
+    def predictAt(self, timestamps):
+        '''
+        Predicts the time until the next call for a single timestamp, or an 
+        array of timestamps, without building a DataFrame. A single timestamp 
+        is answered in O(1)
+
+        @param {datetime|string|int|ndarray} timestamps - Time(s) of the call, integers are epoch nanoseconds
+        @returns {float|ndarray} - Predicted value(s)
+        '''
+
+        return self.model.predictAt(timestamps)
+
     def showPlot(self):
         '''
         Displays the plot of train data, test data and predicted results
@@ -22,6 +22,7 @@ import matplotlib.pyplot as plt
 
 # Owned
 from PCATR.Logger import logger
+from PCATR.CallTimePredictor.CTPAlgorithm.grouped_average import GroupedAverage
 
 class InterdayAverageForecast:
     '''
@@ -37,6 +38,7 @@ class InterdayAverageForecast:
         self.testData = None
         self.forecastData = None
 
+    @logger.timed()
     def fit(self, trainData):
         '''
         Fits the training model using interday average forecast
@@ -46,13 +48,14 @@ class InterdayAverageForecast:
         '''
         try:
             self.trainData = trainData
-            self.model = pd.DataFrame(self.trainData.groupby(['DayOfWeek'])['CallDifferenceInterval'].mean())
+            self.model = GroupedAverage(['DayOfWeek']).fit(self.trainData)
 
             return self
         except:
             logger.Logger.LOGERROR("interday_average_forecast.py", "InterdayAverageForecast::fit", "Unable to train model")
             return None 
 
+    @logger.timed()
     def predict(self, testData):
         '''
         Predicts using the training model for interday average forecast
@@ -63,41 +66,26 @@ class InterdayAverageForecast:
 
         try:
             self.testData = testData
-            self.forecastData = self.testData.copy()
-
-            monday = self.forecastData['DayOfWeek'] == 'Monday'
-            self.forecastData.loc[monday,'CallDifferenceInterval'] = \
-                self.model['CallDifferenceInterval'].iloc[1]
-
-            tuesday = self.forecastData['DayOfWeek'] == 'Tuesday'
-            self.forecastData.loc[tuesday,'CallDifferenceInterval'] = \
-                self.model['CallDifferenceInterval'].iloc[5]
-
-            wednesday = self.forecastData['DayOfWeek'] == 'Wednesday'
-            self.forecastData.loc[wednesday,'CallDifferenceInterval'] = \
-                self.model['CallDifferenceInterval'].iloc[6]
-
-            thursday = self.forecastData['DayOfWeek'] == 'Thursday'
-            self.forecastData.loc[thursday,'CallDifferenceInterval'] = \
-                self.model['CallDifferenceInterval'].iloc[4]
-
-            friday = self.forecastData['DayOfWeek'] == 'Friday'
-            self.forecastData.loc[friday,'CallDifferenceInterval'] = \
-                self.model['CallDifferenceInterval'].iloc[0]
-
-            saturday = self.forecastData['DayOfWeek'] == 'Saturday'
-            self.forecastData.loc[saturday,'CallDifferenceInterval'] = \
-                self.model['CallDifferenceInterval'].iloc[2]
-
-            sunday = self.forecastData['DayOfWeek'] == 'Sunday'
-            self.forecastData.loc[sunday,'CallDifferenceInterval'] = \
-                self.model['CallDifferenceInterval'].iloc[3]
+            # Shallow copy, only the forecast column is replaced
+            self.forecastData = self.testData.copy(deep=False)
+            self.forecastData['CallDifferenceInterval'] = self.model.predict(self.testData)
 
             return self.forecastData
         except:
             logger.Logger.LOGERROR("interday_average_forecast.py", "InterdayAverageForecast::predict", "Unable to predict forecast")
             return None
     
+    def predictAt(self, timestamps):
+        '''
+        Predicts the time until the next call for a single timestamp, or an 
+        array of timestamps, without building a DataFrame
+
+        @param {datetime|string|int|ndarray} timestamps - Time(s) of the call, integers are epoch nanoseconds
+        @returns {float|ndarray} - Predicted value(s)
+        '''
+
+        return self.model.predictAt(timestamps)
+
     def showPlot(self):
         '''
         Displays the plot of train data, test data and predicted results
@@ -6,7 +6,7 @@ This file implements the 'LstmForecast' class
 to compute the prediction results using a deep 
 learning technique. It uses LSTM network 
 (special kind of recurrent neural network) with 
-sequence length of over 100.
+a configurable sequence length, of over 100 if needed.
 """
 
 __author__ = 'Emad Bin Abid, Ateeb Ahmed, Syed Bilal Hoda'
@@ -17,28 +17,168 @@ __maintainer__ = 'Emad Bin Abid, Ateeb Ahmed, Syed Bilal Hoda'
 __status__ = 'dev'
 
 # Libs
+import os
+import copy
+import hashlib
 import numpy as np
 import matplotlib.pyplot as plt
 import pandas as pd
 import torch
 import torch.nn as nn
-from torch.autograd import Variable
+from typing import Optional, Tuple
+from torch.utils.data import Dataset, DataLoader, BatchSampler, RandomSampler, SequentialSampler
+from numpy.lib.stride_tricks import sliding_window_view
 
 # Owned
 from PCATR.Logger import logger
+from PCATR.DataTank.data_tank import NANOSECONDS_PER_SECOND, NANOSECONDS_PER_DAY, toEpochNanoseconds
 
 
-def slidingWindows(data, seq_length):
-    x = []
-    y = []
+def slidingWindows(data, sequenceLength):
+    '''
+    Gives every window of 'sequenceLength' consecutive rows and the row following 
+    it. Windows are a strided view of 'data', nothing is copied whatever the 
+    sequence length
+
+    @param {ndarray} data - Rows in time order, shape (rows, features)
+    @param {int} sequenceLength - Rows in a window
+    @returns {tuple} - (windows of shape (rows - sequenceLength, sequenceLength, features), following rows)
+    '''
+
+    windows = sliding_window_view(data[:-1], sequenceLength, axis=0, writeable=True)
+    return windows.transpose(0, 2, 1), data[sequenceLength:]
+
+# Named input features, computed from processed data. Time of day and weekday are encoded on the unit circle
+FEATURES = {
+    'CallDifferenceInterval': lambda frame: frame['CallDifferenceInterval'].values,
+    'DialerCallArrivalTime': lambda frame: frame['DialerCallArrivalTime'].values,
+    'HourSin': lambda frame: np.sin(2 * np.pi * _dayFraction(frame)),
+    'HourCos': lambda frame: np.cos(2 * np.pi * _dayFraction(frame)),
+    'WeekdaySin': lambda frame: np.sin(2 * np.pi * _weekday(frame) / 7),
+    'WeekdayCos': lambda frame: np.cos(2 * np.pi * _weekday(frame) / 7)
+}
+# Windows in a batch of 'LstmForecast.predict'
+INFERENCE_BATCH_SIZE = 65536
+
+DEFAULT_FEATURES = ['CallDifferenceInterval', 'HourSin', 'HourCos', 'WeekdaySin', 'WeekdayCos']
+TARGET = 'CallDifferenceInterval'
+
+def _dayFraction(frame):
+    '''
+    Gives the time of every call as a fraction of its day
+
+    @param {DataFrame} frame - Processed data
+    @returns {ndarray} - Fractions in [0, 1)
+    '''
+
+    return (toEpochNanoseconds(frame['CallArrivalTime']) % NANOSECONDS_PER_DAY) / NANOSECONDS_PER_DAY
+
+def _weekday(frame):
+    '''
+    Gives the weekday of every call, Monday being 0. 1970-01-01 is a Thursday
+
+    @param {DataFrame} frame - Processed data
+    @returns {ndarray} - Weekdays in [0, 6]
+    '''
+
+    return (toEpochNanoseconds(frame['CallArrivalTime']) // NANOSECONDS_PER_DAY + 3) % 7
+
+def _lastCall(frame):
+    '''
+    Gives the time of the last call, the start of recursive forecasts
+
+    @param {DataFrame} frame - Processed data
+    @returns {ndarray} - float64 [epoch nanoseconds of 'CallArrivalTime', 'DialerCallArrivalTime']
+    '''
+
+    return np.array([toEpochNanoseconds(frame['CallArrivalTime'].iloc[-1:])[0], frame['DialerCallArrivalTime'].iloc[-1]], dtype='float64')
+
+def featureMatrix(frame, features):
+    '''
+    Gives the named features of every call
+
+    @param {DataFrame} frame - Processed data
+    @param {List<string>} features - Names of 'FEATURES'
+    @returns {ndarray} - float32 array of shape (calls, features)
+    '''
+
+    return np.column_stack([FEATURES[name](frame) for name in features]).astype('float32')
+
+def _quantizeDynamic(model):
+    '''
+    Converts the weights of the LSTM and Linear layers of a network to int8
+
+    @param {nn.Module} model - Network in float32
+    @returns {nn.Module} - Network with dynamically quantized layers
+    '''
+
+    return torch.ao.quantization.quantize_dynamic(model.eval(), {nn.LSTM, nn.Linear}, dtype=torch.qint8)
+
+class FeatureScaler:
+    '''
+    This class implements standardization of features to zero 
+    mean and unit variance, fitted on train data and persisted 
+    with the model.
+    '''
+
+    def __init__(self):
+        self.mean = None
+        self.std = None
+
+    def fit(self, values):
+        '''
+        Learns the mean and standard deviation of every feature
+
+        @param {ndarray} values - Features of shape (rows, features)
+        @returns {FeatureScaler} - self
+        '''
+
+        self.mean = values.mean(axis=0).astype('float32')
+        std = values.std(axis=0)
+        self.std = np.where(std > 0, std, 1).astype('float32')
+        return self
+
+    def transform(self, values):
+        '''
+        Standardizes features
+
+        @param {ndarray} values - Features of shape (rows, features)
+        @returns {ndarray} - float32 standardized features
+        '''
+
+        return ((values - self.mean) / self.std).astype('float32')
+
+    def inverseTransform(self, values, column):
+        '''
+        Reverts the standardization of one feature
+
+        @param {ndarray} values - Standardized values of the feature
+        @param {int} column - Position of the feature
+        @returns {ndarray} - Values of the feature
+        '''
+
+        return values * self.std[column] + self.mean[column]
+
+    def getState(self):
+        '''
+        Gives the fitted mean and standard deviation
+
+        @returns {dict} - Serializable state
+        '''
+
+        return {'mean': self.mean.tolist(), 'std': self.std.tolist()}
+
+    def setState(self, state):
+        '''
+        Restores a state given by 'getState'
 
-    for i in range(len(data)-seq_length-1):
-        _x = data[i:(i+seq_length)]
-        _y = data[i+seq_length]
-        x.append(_x)
-        y.append(_y)
+        @param {dict} state - State given by 'getState'
+        @returns {FeatureScaler} - self
+        '''
 
-    return np.array(x),np.array(y)
+        self.mean = np.array(state['mean'], dtype='float32')
+        self.std = np.array(state['std'], dtype='float32')
+        return self
 
 class LSTM(nn.Module):
 
@@ -56,33 +196,263 @@ class LSTM(nn.Module):
         self.fc = nn.Linear(hidden_size, num_classes)
 
     def forward(self, x):
-        h_0 = Variable(torch.zeros(
-            self.num_layers, x.size(0), self.hidden_size))
-        
-        c_0 = Variable(torch.zeros(
-            self.num_layers, x.size(0), self.hidden_size))
-        
-        # Propagate input through LSTM
-        ula, (h_out, _) = self.lstm(x, (h_0, c_0))
-        h_out = h_out.view(-1, self.hidden_size)
-        out = self.fc(h_out)
+        # Propagate input through LSTM from zero states, the prediction is read from the last layer
+        _, (h_out, _) = self.lstm(x)
+        out = self.fc(h_out[-1])
         
         return out
 
+    @torch.jit.export
+    def forwardWithState(self, x, state: Optional[Tuple[torch.Tensor, torch.Tensor]] = None):
+        '''
+        Propagates input through LSTM from a given recurrent state, so that a stream 
+        of calls can be fed a few at a time
+
+        @param {Tensor} x - Input of shape (batch, calls, features)
+        @param {tuple} state - (h, c) given by the previous call, zero states if None
+        @returns {tuple} - (prediction after every call of shape (batch, calls, classes), (h, c))
+        '''
+
+        output, state = self.lstm(x, state)
+        return self.fc(output), state
+
+class ScaledLstm(nn.Module):
+    '''
+    This class implements a self-contained inference network that 
+    standardizes raw features and gives intervals in seconds, to be 
+    exported to TorchScript or ONNX together with its scaler.
+
+    @param {LSTM} lstm - Trained network
+    @param {FeatureScaler} scaler - Fitted scaler of the features
+    @param {int} targetColumn - Position of 'CallDifferenceInterval' in the features
+    '''
+
+    def __init__(self, lstm, scaler, targetColumn):
+        super(ScaledLstm, self).__init__()
+        self.lstm = lstm
+        self.register_buffer('mean', torch.from_numpy(scaler.mean.copy()))
+        self.register_buffer('std', torch.from_numpy(scaler.std.copy()))
+        self.targetColumn = targetColumn
+
+    def forward(self, x):
+        out = self.lstm((x - self.mean) / self.std)
+        return out * self.std[self.targetColumn] + self.mean[self.targetColumn]
+
+class WindowDataset(Dataset):
+    '''
+    This class implements a dataset of windows and their targets 
+    that is indexed by whole batches of indices, so a mini-batch 
+    is gathered from the strided windows with one copy.
+
+    @param {ndarray} windows - Windows of shape (windows, sequenceLength, features)
+    @param {ndarray} targets - Target of every window
+    '''
+
+    def __init__(self, windows, targets):
+        self.windows = windows
+        self.targets = targets
+
+    def __len__(self):
+        return len(self.windows)
+
+    def __getitem__(self, indices):
+        return torch.from_numpy(self.windows[indices]), torch.from_numpy(self.targets[indices])
+
+class LstmTrainer:
+    '''
+    This class implements the training engine of 'LstmForecast'. 
+    Mini-batches are streamed from a 'WindowDataset', the last 
+    windows in time are held out for validation, the learning rate 
+    is reduced when validation loss stalls and training stops early 
+    once it stops improving, keeping the best weights. A checkpoint
+    is only resumed when asked and when it was written for the same
+    windows, network and settings.
+
+    @param {int} maxEpochs - Largest number of passes over train windows
+    @param {int} batchSize - Windows in a mini-batch
+    @param {float} learningRate - Initial learning rate of Adam
+    @param {float} validationSplit - Fraction of the last windows held out for validation, no early stopping if 0
+    @param {int} patience - Epochs without improvement of validation loss before stopping
+    @param {int} numThreads - Threads used by torch, torch's default if None
+    @param {string} checkpointPath - File the training state is saved to after every epoch, none if None
+    @param {int} seed - Seed of the order of mini-batches, not seeded if None
+    @param {boolean} resume - Resumes from the checkpoint of an interrupted training of the same windows and settings
+    '''
+
+    def __init__(self, maxEpochs=100, batchSize=256, learningRate=0.01, validationSplit=0.1, patience=10,
+            numThreads=None, checkpointPath=None, seed=None, resume=False):
+        self.maxEpochs = maxEpochs
+        self.batchSize = batchSize
+        self.learningRate = learningRate
+        self.validationSplit = validationSplit
+        self.patience = patience
+        self.numThreads = numThreads
+        self.checkpointPath = checkpointPath
+        self.seed = seed
+        self.resume = resume
+        self.history = []
+
+    def train(self, model, windows, targets):
+        '''
+        Trains the model on windows and their targets
+
+        @param {nn.Module} model - Model to train in place
+        @param {ndarray} windows - Windows of shape (windows, sequenceLength, features)
+        @param {ndarray} targets - Target of every window
+        @returns {nn.Module} - The model with the weights of the best epoch
+        '''
+
+        if self.numThreads is not None:
+            torch.set_num_threads(self.numThreads)
+        generator = torch.Generator()
+        if self.seed is not None:
+            generator.manual_seed(self.seed)
+
+        numValidation = int(len(windows) * self.validationSplit)
+        numTrain = len(windows) - numValidation
+        trainSet = WindowDataset(windows[:numTrain], targets[:numTrain])
+        validationSet = WindowDataset(windows[numTrain:], targets[numTrain:])
+
+        trainLoader = DataLoader(trainSet, batch_size=None,
+            sampler=BatchSampler(RandomSampler(trainSet, generator=generator), self.batchSize, drop_last=False))
+        validationLoader = DataLoader(validationSet, batch_size=None,
+            sampler=BatchSampler(SequentialSampler(validationSet), self.batchSize, drop_last=False))
+
+        criterion = torch.nn.MSELoss()    # mean-squared error for regression
+        optimizer = torch.optim.Adam(model.parameters(), lr=self.learningRate)
+        scheduler = torch.optim.lr_scheduler.ReduceLROnPlateau(optimizer, factor=0.5, patience=max(1, self.patience // 2))
+
+        self.history = []
+        firstEpoch, bestLoss, bestState, staleEpochs = 0, np.inf, copy.deepcopy(model.state_dict()), 0
+        fingerprint = self._fingerprint(model, windows, targets) if self.checkpointPath is not None else None
+        checkpoint = None
+        if self.resume and self.checkpointPath is not None and os.path.exists(self.checkpointPath):
+            checkpoint = torch.load(self.checkpointPath)
+            if checkpoint.get('fingerprint') != fingerprint:
+                logger.Logger.LOGINFO("lstm_forecast.py", "LstmTrainer::train",
+                    "Checkpoint %s is of other windows or settings, training from scratch", self.checkpointPath)
+                checkpoint = None
+        if checkpoint is not None:
+            model.load_state_dict(checkpoint['modelState'])
+            optimizer.load_state_dict(checkpoint['optimizerState'])
+            scheduler.load_state_dict(checkpoint['schedulerState'])
+            firstEpoch, bestLoss, bestState = checkpoint['epoch'] + 1, checkpoint['bestLoss'], checkpoint['bestState']
+            staleEpochs, self.history = checkpoint['staleEpochs'], checkpoint['history']
+
+        for epoch in range(firstEpoch, self.maxEpochs):
+            model.train()
+            trainLoss = 0.0
+            for batchX, batchY in trainLoader:
+                optimizer.zero_grad()
+                loss = criterion(model(batchX), batchY)
+                loss.backward()
+                optimizer.step()
+                trainLoss += loss.item() * len(batchX)
+            trainLoss /= max(numTrain, 1)
+
+            validationLoss = self._evaluate(model, validationLoader, criterion) if numValidation else trainLoss
+            scheduler.step(validationLoss)
+            self.history.append({'epoch': epoch, 'trainLoss': trainLoss, 'validationLoss': validationLoss,
+                'learningRate': optimizer.param_groups[0]['lr']})
+            logger.Logger.LOGDEBUG("lstm_forecast.py", "LstmTrainer::train",
+                "Epoch: %d, loss: %1.5f, validation loss: %1.5f", epoch, trainLoss, validationLoss)
+
+            if validationLoss < bestLoss:
+                bestLoss, bestState, staleEpochs = validationLoss, copy.deepcopy(model.state_dict()), 0
+            else:
+                staleEpochs += 1
+
+            if self.checkpointPath is not None:
+                torch.save({'epoch': epoch, 'modelState': model.state_dict(), 'optimizerState': optimizer.state_dict(),
+                    'schedulerState': scheduler.state_dict(), 'bestLoss': bestLoss, 'bestState': bestState,
+                    'staleEpochs': staleEpochs, 'history': self.history, 'fingerprint': fingerprint}, self.checkpointPath)
+
+            if numValidation and staleEpochs >= self.patience:
+                break
+
+        model.load_state_dict(bestState)
+        return model
+
+    def _fingerprint(self, model, windows, targets):
+        '''
+        Gives a digest of the windows, targets, network shape and settings of a
+        training, to tell whether a checkpoint belongs to it
+
+        @param {nn.Module} model - Model to train
+        @param {ndarray} windows - Windows of shape (windows, sequenceLength, features)
+        @param {ndarray} targets - Target of every window
+        @returns {string} - Hexadecimal SHA-1 digest
+        '''
+
+        digest = hashlib.sha1()
+        digest.update(repr((windows.shape, targets.shape, self.batchSize, self.learningRate,
+            self.validationSplit, self.patience, self.seed,
+            [(name, tuple(value.shape)) for name, value in model.state_dict().items()])).encode())
+        # Hashed in slices so that windows viewed over the data are not copied at once
+        for start in range(0, len(windows), INFERENCE_BATCH_SIZE):
+            digest.update(np.ascontiguousarray(windows[start:start + INFERENCE_BATCH_SIZE]).data)
+        digest.update(np.ascontiguousarray(targets).data)
+        return digest.hexdigest()
+
+    def _evaluate(self, model, loader, criterion):
+        '''
+        Gives the mean loss of the model over a loader without tracking gradients
+
+        @param {nn.Module} model - Model to evaluate
+        @param {DataLoader} loader - Batches of windows and targets
+        @param {nn.Module} criterion - Loss function
+        @returns {float} - Mean loss per window
+        '''
+
+        model.eval()
+        totalLoss, count = 0.0, 0
+        with torch.no_grad():
+            for batchX, batchY in loader:
+                totalLoss += criterion(model(batchX), batchY).item() * len(batchX)
+                count += len(batchX)
+        return totalLoss / max(count, 1)
+
 class LstmForecast:
     '''
     This class implements algorithm 
     to compute the prediction results using a deep 
     learning technique. It uses LSTM network 
     (special kind of recurrent neural network) with 
-    sequence length of over 100.
+    a configurable sequence length, of over 100 if needed.
+
+    @param {int} sequenceLength - Calls in the window the next interval is predicted from
+    @param {int} hiddenSize - Features of the hidden state of the LSTM
+    @param {int} numLayers - Stacked LSTM layers
+    @param {LstmTrainer} trainer - Training engine, the default 'LstmTrainer' if None
+    @param {List<string>} features - Names of 'FEATURES' fed to the network, 'CallDifferenceInterval' included
+    @param {int} horizon - Following intervals the network outputs at once, for direct multi-step forecasts
     '''
-    def __init__(self):
+    def __init__(self, sequenceLength=2, hiddenSize=2, numLayers=1, trainer=None, features=None, horizon=1):
+        self.features = list(features) if features is not None else list(DEFAULT_FEATURES)
+        if TARGET not in self.features:
+            raise ValueError("features must include '{}'".format(TARGET))
+        unknown = [name for name in self.features if name not in FEATURES]
+        if unknown:
+            raise ValueError("Unknown features {}".format(unknown))
+
+        self.targetColumn = self.features.index(TARGET)
+        self.scaler = FeatureScaler()
+        self.sequenceLength = int(sequenceLength)
+        self.hiddenSize = hiddenSize
+        self.numLayers = numLayers
+        self.horizon = int(horizon)
+        self.trainer = trainer if trainer is not None else LstmTrainer()
         self.model = None
         self.trainData = None
         self.testData = None
         self.forecastData = None
+        self.nextInterval = None
+        self.lastWindow = None
+        self.lastCall = None
+        self.streamState = None
+        self.quantized = False
 
+    @logger.timed()
     def fit(self, trainData):
         '''
         Fits the training model using lstm forecast
@@ -92,58 +462,38 @@ class LstmForecast:
         '''
 
         try:
-            # pass
             self.trainData = trainData
 
-            training_data = self.trainData.iloc[:,6:7].values
-            seq_length = 2
+            # Standardized features, the target is the standardized interval of the following call
+            features = featureMatrix(self.trainData, self.features)
+            training_data = self.scaler.fit(features).transform(features)
+            seq_length = self.sequenceLength
             self.x, self.y = slidingWindows(training_data, seq_length)
 
-            dataX = Variable(torch.Tensor(np.array(self.x)))
-            dataY = Variable(torch.Tensor(np.array(self.y)))
-
-            trainX = Variable(torch.Tensor(np.array(self.x[0:len(self.trainData)])))
-            trainY = Variable(torch.Tensor(np.array(self.y[0:len(self.trainData)])))
-
-            testX = Variable(torch.Tensor(np.array(self.x[len(self.trainData):len(self.x)])))
-            testY = Variable(torch.Tensor(np.array(self.y[len(self.trainData):len(self.y)])))
-
-            num_epochs = 1000
-            learning_rate = 0.01
-
-            input_size = 1
-            hidden_size = 2
-            num_layers = 1
-
-            num_classes = 1
+            # Every window is followed by 'horizon' intervals, windows too close to the end are dropped
+            self.y = sliding_window_view(self.y[:, self.targetColumn], self.horizon, writeable=True)
+            self.x = self.x[:len(self.y)]
 
-            lstm = LSTM(num_classes, input_size, hidden_size, num_layers)
+            input_size = len(self.features)
+            num_classes = self.horizon
 
-            criterion = torch.nn.MSELoss()    # mean-squared error for regression
-            optimizer = torch.optim.Adam(lstm.parameters(), lr=learning_rate)
-            #optimizer = torch.optim.SGD(lstm.parameters(), lr=learning_rate)
+            lstm = LSTM(num_classes, input_size, self.hiddenSize, self.numLayers)
+            self.model = self.trainer.train(lstm, self.x, self.y)
+            self.quantized = False
 
-            # Train the model
-            for epoch in range(num_epochs + 1):
-                outputs = lstm(trainX)
-                optimizer.zero_grad()
-                
-                # obtain the loss function
-                loss = criterion(outputs, trainY)
-                
-                loss.backward()
-                
-                optimizer.step()
-                if epoch % 100 == 0:
-                    print("Epoch: %d, loss: %1.5f" % (epoch, loss.item()))
-            
-            self.model = lstm
+            # Prediction from the last window of train data, given by point queries
+            self.lastWindow = training_data[-seq_length:].copy()
+            self.lastCall = _lastCall(self.trainData)
+            with torch.inference_mode():
+                lastWindow = torch.from_numpy(self.lastWindow).unsqueeze(0)
+                self.nextInterval = float(self.scaler.inverseTransform(self.model(lastWindow)[0, 0].item(), self.targetColumn))
             return self
 
         except:
             logger.Logger.LOGERROR("lstm_forecast.py", "LstmForecast::fit", "Unable to train model")
             return None
 
+    @logger.timed()
     def predict(self, testData):
         '''
         Predicts using the training model for lstm forecast
@@ -152,23 +502,199 @@ class LstmForecast:
         @returns {DataFrame} - Predicted values
         '''
 
-        # try:
-        if True:
+        try:
             self.testData = testData
-            
-            testX = Variable(torch.Tensor(np.array(self.x[len(self.trainData):len(self.x)])))
-            testY = Variable(torch.Tensor(np.array(self.y[len(self.trainData):len(self.y)])))
-
-            lstm = self.model
-            lstm.eval()
-            train_predict = lstm(testX)
 
-            self.forecastData = train_predict.data.cpu().numpy()
+            # Windows over the end of train data and test data, one for every test call
+            history = np.concatenate([self.lastWindow, self.scaler.transform(featureMatrix(self.testData, self.features))])
+            testX, _ = slidingWindows(history, self.sequenceLength)
+
+            self.model.eval()
+            test_predict = np.empty((len(testX), 1), dtype='float32')
+            with torch.inference_mode():
+                # Batches bound the memory of the copied windows
+                for start in range(0, len(testX), INFERENCE_BATCH_SIZE):
+                    batch = torch.from_numpy(testX[start:start + INFERENCE_BATCH_SIZE])
+                    test_predict[start:start + len(batch)] = self.model(batch)[:, :1].numpy()
+            test_predict = self.scaler.inverseTransform(test_predict, self.targetColumn)
+
+            # Shallow copy, only the forecast column is replaced
+            self.forecastData = self.testData.copy(deep=False)
+            self.forecastData['CallDifferenceInterval'] = test_predict[:, 0]
             return self.forecastData
-        # except:
-        #     logger.Logger.LOGERROR("lstm_forecast.py", "LstmForecast::predict", "Unable to predict forecast")
-        #     return None
+        except:
+            logger.Logger.LOGERROR("lstm_forecast.py", "LstmForecast::predict", "Unable to predict forecast")
+            return None
             
+    def predictAt(self, timestamps):
+        '''
+        Predicts the time until the next call for a single timestamp, or an 
+        array of timestamps, without building a DataFrame. The prediction following 
+        the last window of train data is given for every timestamp
+
+        @param {datetime|string|int|ndarray} timestamps - Time(s) of the call, integers are epoch nanoseconds
+        @returns {float|ndarray} - Predicted value(s)
+        '''
+
+        if np.ndim(timestamps) == 0:
+            return self.nextInterval
+        return np.full(len(timestamps), self.nextInterval)
+
+    def forecast(self, steps, method='recursive', histories=None):
+        '''
+        Forecasts the next 'steps' intervals of one or many series of calls in batched 
+        forward passes. The recursive method feeds every predicted call back as the 
+        next input, its time features following from the predicted interval. The direct 
+        method reads all steps from one pass of a network fitted with 'horizon' >= steps
+
+        @param {int} steps - Number of following intervals
+        @param {string} method - 'recursive' or 'direct'
+        @param {List<DataFrame>} histories - Processed data of the latest calls of every series, at least 'sequenceLength' each. The end of train data if None
+        @returns {ndarray} - Forecast intervals in seconds of shape (series, steps)
+        '''
+
+        if histories is None:
+            windows, lastCalls = self.lastWindow[None], self.lastCall[None]
+        else:
+            windows = np.stack([self.scaler.transform(featureMatrix(history.iloc[-self.sequenceLength:], self.features))
+                for history in histories])
+            lastCalls = np.stack([_lastCall(history) for history in histories])
+
+        self.model.eval()
+        with torch.inference_mode():
+            if method == 'direct':
+                if steps > self.horizon:
+                    raise ValueError("Direct forecasts reach {} steps, the horizon of the network".format(self.horizon))
+                output = self.model(torch.from_numpy(np.ascontiguousarray(windows))).numpy()[:, :steps]
+                return self.scaler.inverseTransform(output, self.targetColumn)
+            elif method != 'recursive':
+                raise ValueError("method must be 'recursive' or 'direct', got {}".format(method))
+
+            intervals = np.empty((len(windows), steps), dtype='float32')
+            for step in range(steps):
+                output = self.model(torch.from_numpy(np.ascontiguousarray(windows))).numpy()[:, 0]
+                intervals[:, step] = self.scaler.inverseTransform(output, self.targetColumn)
+
+                # The predicted call of every series, as the last row of its next window
+                interval = np.maximum(intervals[:, step], 0).astype('float64')
+                lastCalls = lastCalls + np.column_stack([interval * NANOSECONDS_PER_SECOND, interval])
+                nextCalls = pd.DataFrame({
+                    'CallDifferenceInterval': intervals[:, step],
+                    'DialerCallArrivalTime': lastCalls[:, 1],
+                    'CallArrivalTime': lastCalls[:, 0].astype('int64').astype('datetime64[ns]')
+                })
+                nextRows = self.scaler.transform(featureMatrix(nextCalls, self.features))
+                windows = np.concatenate([windows[:, 1:], nextRows[:, None]], axis=1)
+            return intervals
+
+    def startStream(self):
+        '''
+        Starts streaming predictions from the end of train data, the recurrent 
+        state of the last window of train data is kept for 'streamPredict'
+
+        @returns {float} - Predicted time until the next call
+        '''
+
+        self.model.eval()
+        with torch.inference_mode():
+            output, self.streamState = self.model.forwardWithState(torch.from_numpy(self.lastWindow).unsqueeze(0))
+        return float(self.scaler.inverseTransform(output[0, -1, 0].item(), self.targetColumn))
+
+    def streamPredict(self, newCalls):
+        '''
+        Feeds new calls to the network from the kept recurrent state, in O(1) per call 
+        whatever the history. The state then carries every call since 'startStream', 
+        not only the last window
+
+        @param {DataFrame} newCalls - Processed data of the calls since the previous call
+        @returns {ndarray} - Predicted time until the next call after every new call
+        '''
+
+        x = torch.from_numpy(self.scaler.transform(featureMatrix(newCalls, self.features))).unsqueeze(0)
+        with torch.inference_mode():
+            output, self.streamState = self.model.forwardWithState(x, self.streamState)
+        return self.scaler.inverseTransform(output[0, :, 0].numpy(), self.targetColumn)
+
+    def quantize(self):
+        '''
+        Converts the weights of the LSTM and Linear layers to int8 with dynamic 
+        quantization, for faster inference on CPU
+
+        @returns {LstmForecast} - self
+        '''
+
+        self.model = _quantizeDynamic(self.model)
+        self.quantized = True
+        return self
+
+    def export(self, path, format='torchscript'):
+        '''
+        Exports the network with its scaler, taking raw features of shape 
+        (batch, sequenceLength, features) and giving intervals in seconds
+
+        @param {string} path - File to export to
+        @param {string} format - 'torchscript' or 'onnx', the latter needs the 'onnx' package
+        @returns {None}
+        '''
+
+        network = ScaledLstm(self.model, self.scaler, self.targetColumn).eval()
+        if format == 'torchscript':
+            torch.jit.script(network).save(path)
+        elif format == 'onnx':
+            example = torch.zeros(1, self.sequenceLength, len(self.features))
+            torch.onnx.export(network, example, path, input_names=['windows'], output_names=['intervals'],
+                dynamic_axes={'windows': {0: 'batch', 1: 'calls'}, 'intervals': {0: 'batch'}})
+        else:
+            raise ValueError("format must be 'torchscript' or 'onnx', got {}".format(format))
+
+    def save(self, path):
+        '''
+        Saves the network together with its configuration, features and fitted scaler.
+        A quantized network is saved quantized and quantized again by 'load'
+
+        @param {string} path - File to save to
+        @returns {None}
+        '''
+
+        torch.save({
+            'sequenceLength': self.sequenceLength,
+            'hiddenSize': self.hiddenSize,
+            'numLayers': self.numLayers,
+            'features': self.features,
+            'scaler': self.scaler.getState(),
+            'horizon': self.horizon,
+            'nextInterval': self.nextInterval,
+            'lastWindow': torch.from_numpy(self.lastWindow),
+            'lastCall': torch.from_numpy(self.lastCall),
+            'quantized': self.quantized,
+            'modelState': self.model.state_dict()
+        }, path)
+
+    @staticmethod
+    def load(path):
+        '''
+        Loads a forecaster saved by 'save', ready to predict
+
+        @param {string} path - File to load from
+        @returns {LstmForecast} - Fitted forecaster
+        '''
+
+        # Packed weights of a quantized network are not plain tensors and need the full unpickler
+        saved = torch.load(path, weights_only=False)
+        forecaster = LstmForecast(saved['sequenceLength'], saved['hiddenSize'], saved['numLayers'],
+            features=saved['features'], horizon=saved['horizon'])
+        forecaster.scaler.setState(saved['scaler'])
+        forecaster.nextInterval = saved['nextInterval']
+        forecaster.lastWindow = saved['lastWindow'].numpy()
+        forecaster.lastCall = saved['lastCall'].numpy()
+        forecaster.model = LSTM(forecaster.horizon, len(forecaster.features), forecaster.hiddenSize, forecaster.numLayers)
+        # The saved state of a quantized network only fits a network quantized the same way
+        if saved.get('quantized', False):
+            forecaster.model = _quantizeDynamic(forecaster.model)
+            forecaster.quantized = True
+        forecaster.model.load_state_dict(saved['modelState'])
+        return forecaster
+
     def showPlot(self):
         '''
         Displays the plot of train data, test data and predicted results
@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+This file implements the 'OrderSearch' class to select the
+(p, d, q)(P, D, Q, s) order of 'TimeSeriesForecast'. The
+differencing is chosen first by unit-root and seasonal strength
+tests, then the other orders by information criterion, fitted
+in a pool of processes.
+"""
+
+__author__ = 'Emad Bin Abid, Ateeb Ahmed, Syed Bilal Hoda'
+__copyright__ = 'Copyright 2019, Prediction of Call Arrival Times and Rates'
+__credits__ = ['Afiniti Software Solutions (Pvt.) Ltd.']
+__version__ = '0.0.1'
+__maintainer__ = 'Emad Bin Abid, Ateeb Ahmed, Syed Bilal Hoda'
+__status__ = 'dev'
+
+# Libs
+import itertools
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import numpy as np
+import statsmodels.api as sm
+from statsmodels.tsa.stattools import adfuller
+from statsmodels.tsa.seasonal import STL
+
+# Owned
+from PCATR.Logger import logger
+from PCATR.CallTimePredictor.CTPAlgorithm.time_series_forecast import TimeSeriesForecast
+
+# Candidates are scored and the best one is fitted as stationary and invertible models, so that no
+# observations are burned by a diffuse initialization and every candidate is scored on the same data
+ENFORCE_STATIONARITY = True
+ENFORCE_INVERTIBILITY = True
+
+# Criterion above the best converged screening fit from which an unconverged candidate is abandoned
+ABANDON_MARGIN = 50.0
+
+# Series of the worker process, set once per worker by '_initializeWorker'
+_workerSeries = None
+
+class OrderSearch:
+    '''
+    This class implements the order selection of 'TimeSeriesForecast'.
+    Information criteria of models with different differencing are
+    computed on different data and are not comparable, so d and D are
+    chosen first: D by the strength of the seasonality and d by the
+    augmented Dickey-Fuller test. The AR and MA orders are then ranked
+    by criterion, models without differencing have a constant. Every
+    candidate is first fitted with a few optimizer iterations. Those
+    that converge are done, those whose criterion is still worse than
+    the best converged one by more than 'abandonMargin' are abandoned
+    and the rest are fitted to convergence from where screening stopped.
+
+    @param {tuple} maxOrder - Largest (p, d, q) to try
+    @param {tuple} maxSeasonalOrder - Largest (P, D, Q) to try
+    @param {int} seasonalPeriods - Season length s, no seasonal terms are tried if 0
+    @param {string} criterion - 'aic' or 'bic', to rank candidates by
+    @param {float} abandonMargin - Criterion above the best converged screening fit from which a candidate is abandoned, none are if None
+    @param {int} screeningIterations - Optimizer iterations of the screening fits
+    @param {int} maxWorkers - Number of processes, the number of CPUs if None and in this process if 1
+    @param {float} significance - Level of the Dickey-Fuller test, below which no further differencing is taken
+    @param {float} seasonalStrength - Strength of the seasonality from which the season is differenced
+    '''
+
+    def __init__(self, maxOrder=(2, 1, 2), maxSeasonalOrder=(0, 0, 0), seasonalPeriods=0, criterion='aic',
+            abandonMargin=ABANDON_MARGIN, screeningIterations=10, maxWorkers=None, significance=0.05, seasonalStrength=0.64):
+        if criterion not in ('aic', 'bic'):
+            raise ValueError("criterion must be 'aic' or 'bic', got {}".format(criterion))
+
+        self.maxOrder = tuple(maxOrder)
+        self.maxSeasonalOrder = tuple(maxSeasonalOrder) if seasonalPeriods else (0, 0, 0)
+        self.seasonalPeriods = int(seasonalPeriods)
+        self.criterion = criterion
+        self.abandonMargin = abandonMargin
+        self.screeningIterations = screeningIterations
+        self.maxWorkers = maxWorkers
+        self.significance = significance
+        self.seasonalStrength = seasonalStrength
+        self.differencing = None
+        self.results = None
+
+    def selectDifferencing(self, series):
+        '''
+        Chooses the seasonal differencing D by the strength of the seasonality
+        of an STL decomposition, then the differencing d as the fewest differences
+        for which the Dickey-Fuller test rejects a unit root
+
+        @param {ndarray} series - Values of 'CallDifferenceInterval' of train data
+        @returns {tuple} - (d, D)
+        '''
+
+        seasonalDifferencing = 0
+        if self.maxSeasonalOrder[1] > 0 and len(series) >= 2 * self.seasonalPeriods:
+            decomposition = STL(series, period=self.seasonalPeriods).fit()
+            strength = 1 - np.var(decomposition.resid) / np.var(decomposition.seasonal + decomposition.resid)
+            if strength > self.seasonalStrength:
+                seasonalDifferencing = 1
+                series = series[self.seasonalPeriods:] - series[:-self.seasonalPeriods]
+
+        differencing = 0
+        while differencing < self.maxOrder[1] and adfuller(series, autolag='AIC')[1] > self.significance:
+            differencing += 1
+            series = np.diff(series)
+        return differencing, seasonalDifferencing
+
+    def candidates(self, differencing=None):
+        '''
+        Gives every (order, seasonal order) combination up to the largest orders
+        with the given differencing
+
+        @param {tuple} differencing - (d, D) of every candidate, as chosen by 'selectDifferencing' if None
+        @returns {List<tuple>} - (order, seasonalOrder) of every candidate
+        '''
+
+        d, D = differencing if differencing is not None else self.differencing
+        maxP, _, maxQ = self.maxOrder
+        maxSeasonalP, _, maxSeasonalQ = self.maxSeasonalOrder
+        orders = [(p, d, q) for p in range(maxP + 1) for q in range(maxQ + 1)]
+        seasonalOrders = [(P, D, Q, self.seasonalPeriods) if (P, D, Q) != (0, 0, 0) else (0, 0, 0, 0)
+            for P in range(maxSeasonalP + 1) for Q in range(maxSeasonalQ + 1)]
+        return [(order, seasonalOrder) for order in orders for seasonalOrder in seasonalOrders]
+
+    def search(self, trainData):
+        '''
+        Selects the differencing and then the order of the best candidate on
+        train data, keeping the criterion of every candidate in 'results'
+
+        @param {DataFrame} trainData - Training data
+        @returns {TimeSeriesForecast} - Fitted forecaster of the best order
+        '''
+
+        try:
+            series = np.asarray(trainData['CallDifferenceInterval'], dtype='float64')
+            self.differencing = self.selectDifferencing(series)
+            candidates = self.candidates()
+
+            # Screening fits that converge are final, the others are abandoned or fitted on from their parameters
+            screeningTasks = [(order, seasonalOrder, self.criterion, self.screeningIterations, None)
+                for order, seasonalOrder in candidates]
+            screening, converged, parameters = self._run(series, screeningTasks)
+
+            final = np.where(converged, screening, np.inf)
+            abandoned = np.zeros(len(candidates), dtype=bool)
+            if self.abandonMargin is not None:
+                abandoned = ~converged & (screening > final.min() + self.abandonMargin)
+            refitted = np.flatnonzero(~converged & ~abandoned)
+            if len(refitted):
+                finalTasks = [(candidates[i][0], candidates[i][1], self.criterion, None, parameters[i]) for i in refitted]
+                final[refitted] = self._run(series, finalTasks)[0]
+            if not np.isfinite(final).any():
+                raise ValueError("No candidate order could be fitted")
+
+            self.results = pd.DataFrame({
+                'Order': [order for order, _ in candidates],
+                'SeasonalOrder': [seasonalOrder for _, seasonalOrder in candidates],
+                'Trend': [defaultTrend(order, seasonalOrder) for order, seasonalOrder in candidates],
+                self.criterion.upper(): np.where(abandoned, np.nan, final),
+                'ConvergedInScreening': converged,
+                'Abandoned': abandoned
+            }).sort_values(self.criterion.upper(), kind='stable').reset_index(drop=True)
+
+            order, seasonalOrder = candidates[int(np.argmin(final))]
+            return TimeSeriesForecast(order, seasonalOrder, defaultTrend(order, seasonalOrder),
+                ENFORCE_STATIONARITY, ENFORCE_INVERTIBILITY).fit(trainData)
+        except:
+            logger.Logger.LOGERROR("order_search.py", "OrderSearch::search", "Unable to search orders")
+            return None
+
+    def _run(self, series, tasks):
+        '''
+        Fits the tasks in a pool of processes, or in this process if 'maxWorkers' is 1
+
+        @param {ndarray} series - Values of 'CallDifferenceInterval' of train data
+        @param {List<tuple>} tasks - Arguments of '_criterionOf' for every candidate
+        @returns {tuple} - (criterion of every task, whether every fit converged, fitted parameters of every task)
+        '''
+
+        if self.maxWorkers == 1:
+            _initializeWorker(series)
+            outputs = [_criterionOf(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=self.maxWorkers, initializer=_initializeWorker,
+                    initargs=(series,)) as executor:
+                outputs = list(executor.map(_criterionOf, tasks))
+        return (np.array([value for value, _, _ in outputs]), np.array([done for _, done, _ in outputs], dtype=bool),
+            [params for _, _, params in outputs])
+
+def _initializeWorker(series):
+    '''
+    Keeps the series in the worker process, so that tasks only carry the orders
+
+    @param {ndarray} series - Values of 'CallDifferenceInterval' of train data
+    @returns {None}
+    '''
+
+    global _workerSeries
+    _workerSeries = series
+
+def _criterionOf(task):
+    '''
+    Fits one candidate order, with a constant when it has no differencing, and
+    gives its information criterion, infinity if the fit fails
+
+    @param {tuple} task - (order, seasonal order, 'aic' or 'bic', optimizer iterations or None to converge, start parameters or None)
+    @returns {tuple} - (information criterion, whether the optimizer converged, fitted parameters or None)
+    '''
+
+    order, seasonalOrder, criterion, maxIterations, startParameters = task
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            model = sm.tsa.statespace.SARIMAX(_workerSeries,
+                                            order=order,
+                                            seasonal_order=seasonalOrder,
+                                            trend=defaultTrend(order, seasonalOrder),
+                                            enforce_stationarity=ENFORCE_STATIONARITY,
+                                            enforce_invertibility=ENFORCE_INVERTIBILITY)
+            fitOptions = {'disp': False, 'start_params': startParameters}
+            if maxIterations is not None:
+                fitOptions['maxiter'] = maxIterations
+            result = model.fit(**fitOptions)
+            value = float(getattr(result, criterion))
+            converged = bool(result.mle_retvals.get('converged', True)) if result.mle_retvals else True
+        return (value, converged, np.asarray(result.params)) if np.isfinite(value) else (np.inf, True, None)
+    except:
+        return np.inf, True, None
+
+def defaultTrend(order, seasonalOrder):
+    '''
+    Gives a constant for models without differencing, so that a series with a
+    non-zero mean can be fitted, and no trend for differenced models
+
+    @param {tuple} order - (p, d, q) order of the model
+    @param {tuple} seasonalOrder - (P, D, Q, s) seasonal order of the model
+    @returns {string} - 'c' or 'n'
+    '''
+
+    return 'c' if order[1] == 0 and seasonalOrder[1] == 0 else 'n'
@@ -0,0 +1,250 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+This file implements the 'ParameterSearch' class to tune
+the constructor parameters of a forecaster, e.g. the smoothing
+factors of 'SmoothingForecast' and 'DoubleSmoothingForecast'.
+Candidates are scored with 'ValidationMetric' over the
+rolling-origin folds of the data in a pool of processes, either
+all of them or those a Bayesian optimization picks in turn.
+"""
+
+__author__ = 'Emad Bin Abid, Ateeb Ahmed, Syed Bilal Hoda'
+__copyright__ = 'Copyright 2019, Prediction of Call Arrival Times and Rates'
+__credits__ = ['Afiniti Software Solutions (Pvt.) Ltd.']
+__version__ = '0.0.1'
+__maintainer__ = 'Emad Bin Abid, Ateeb Ahmed, Syed Bilal Hoda'
+__status__ = 'dev'
+
+# Libs
+import os
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import numpy as np
+from scipy.stats import norm
+from sklearn.gaussian_process import GaussianProcessRegressor
+from sklearn.gaussian_process.kernels import ConstantKernel, Matern, WhiteKernel
+
+# Owned
+from PCATR.Logger import logger
+from PCATR.DataTank.data_tank import DataTank
+from PCATR.ValidationMetric.validation_metric import ValidationMetric
+
+# Data and folds of the worker process, set once per worker by '_initializeWorker'
+_workerData = None
+_workerFolds = None
+
+class ParameterSearch:
+    '''
+    This class implements the search of the constructor parameters
+    of a forecaster. Every candidate is fitted and scored on the
+    rolling-origin folds of the data, candidates are spread over a
+    pool of processes that receive the data once.
+
+    The 'grid' strategy scores every combination of the parameter grid.
+    The 'bayesian' strategy scores a few random combinations, then fits a
+    Gaussian process to the scores of the scored ones and scores next the
+    combinations of largest expected improvement, one per process, until
+    'numEvaluations' are scored. Parameter values are placed by their
+    position in the grid, so the values of a parameter should be given in order.
+
+    @param {class} forecaster - Forecaster class, e.g. SmoothingForecast
+    @param {dict} parameterGrid - Candidate values of every constructor parameter, e.g. {'smoothingLevel': [0.2, 0.4, 0.6]}
+    @param {string} metric - Name of the 'ValidationMetric' method to minimize
+    @param {int} maxWorkers - Number of processes, the number of CPUs if None and in this process if 1
+    @param {string} strategy - 'grid' or 'bayesian'
+    @param {int} numEvaluations - Candidates scored by the 'bayesian' strategy, a quarter of the grid if None
+    @param {int} initialEvaluations - Random candidates scored before the 'bayesian' strategy fits its model
+    @param {int} seed - Seed of the random candidates of the 'bayesian' strategy
+    '''
+
+    def __init__(self, forecaster, parameterGrid, metric='rootMeanSquaredError', maxWorkers=None, strategy='grid',
+            numEvaluations=None, initialEvaluations=5, seed=None):
+        if strategy not in ('grid', 'bayesian'):
+            raise ValueError("strategy must be 'grid' or 'bayesian', got {}".format(strategy))
+
+        self.forecaster = forecaster
+        self.parameterGrid = parameterGrid
+        self.metric = metric
+        self.maxWorkers = maxWorkers
+        self.strategy = strategy
+        self.numEvaluations = numEvaluations
+        self.initialEvaluations = initialEvaluations
+        self.seed = seed
+        self.results = None
+        self.bestParameters = None
+
+    def candidates(self):
+        '''
+        Gives every combination of the parameter grid
+
+        @returns {List<dict>} - Constructor parameters of every candidate
+        '''
+
+        names = list(self.parameterGrid)
+        return [dict(zip(names, values)) for values in itertools.product(*(self.parameterGrid[name] for name in names))]
+
+    def search(self, fullData, numTrainWeeks, numTestWeeks=1, stepWeeks=1, expanding=True, maxFolds=None):
+        '''
+        Scores the candidates of the strategy on the rolling-origin folds of processed
+        data and keeps the scores of the scored candidates in 'results', in the order
+        they were scored in 'Evaluation'
+
+        @param {DataFrame} fullData - Processed data in arrival order
+        @param {int} numTrainWeeks - Number of weeks in train data of the first fold
+        @param {int} numTestWeeks - Number of weeks in test data of every fold
+        @param {int} stepWeeks - Number of weeks the origin moves between folds
+        @param {bool} expanding - Keeps train data starting at the first week, otherwise the train window slides
+        @param {int} maxFolds - Maximum number of folds, all folds if None
+        @returns {dict} - Constructor parameters of the best candidate
+        '''
+
+        try:
+            dataTank = DataTank()
+            dataTank.fullData = fullData
+            folds = dataTank.rollingOriginSplits(numTrainWeeks, numTestWeeks, stepWeeks, expanding, maxFolds)
+            if not folds:
+                raise ValueError("No rolling-origin fold fits in the data")
+
+            candidates = self.candidates()
+            if self.maxWorkers == 1:
+                _initializeWorker(fullData, folds)
+                evaluated, scores = self._searchWith(candidates, lambda tasks: [_scoreCandidate(task) for task in tasks])
+            else:
+                with ProcessPoolExecutor(max_workers=self.maxWorkers, initializer=_initializeWorker,
+                        initargs=(fullData, folds)) as executor:
+                    evaluated, scores = self._searchWith(candidates, lambda tasks: list(executor.map(_scoreCandidate, tasks)))
+
+            meanScores = [np.mean(foldScores) for foldScores in scores]
+            self.results = pd.DataFrame([candidates[i] for i in evaluated])
+            self.results[self.metric] = meanScores
+            self.results['FoldScores'] = scores
+            self.results['Evaluation'] = np.arange(len(evaluated))
+            self.results = self.results.sort_values(self.metric, kind='stable').reset_index(drop=True)
+
+            self.bestParameters = candidates[evaluated[int(np.argmin(meanScores))]]
+            return self.bestParameters
+        except:
+            logger.Logger.LOGERROR("parameter_search.py", "ParameterSearch::search", "Unable to search parameters")
+            return None
+
+    def _searchWith(self, candidates, scoreTasks):
+        '''
+        Scores the candidates of the strategy
+
+        @param {List<dict>} candidates - Constructor parameters of every candidate
+        @param {function} scoreTasks - Gives the fold scores of a list of '_scoreCandidate' tasks
+        @returns {tuple} - (indices of the scored candidates in scoring order, fold scores of every one)
+        '''
+
+        def tasksOf(indices):
+            return [(self.forecaster, candidates[i], self.metric) for i in indices]
+
+        if self.strategy == 'grid':
+            evaluated = list(range(len(candidates)))
+            return evaluated, scoreTasks(tasksOf(evaluated))
+
+        numEvaluations = self.numEvaluations if self.numEvaluations is not None else max(1, len(candidates) // 4)
+        numEvaluations = min(numEvaluations, len(candidates))
+        batchSize = self.maxWorkers if self.maxWorkers is not None else os.cpu_count() or 1
+        positions = self._positions(candidates)
+        rng = np.random.default_rng(self.seed)
+
+        evaluated = [int(i) for i in rng.choice(len(candidates), min(self.initialEvaluations, numEvaluations), replace=False)]
+        scores = scoreTasks(tasksOf(evaluated))
+        while len(evaluated) < numEvaluations:
+            remaining = np.setdiff1d(np.arange(len(candidates)), evaluated)
+            improvement = _expectedImprovement(positions[evaluated], np.array([np.mean(s) for s in scores]),
+                positions[remaining], self.seed)
+            # The best candidates of one model are scored together, one per process
+            batch = [int(i) for i in remaining[np.argsort(-improvement, kind='stable')[:min(batchSize, numEvaluations - len(evaluated))]]]
+            evaluated += batch
+            scores += scoreTasks(tasksOf(batch))
+        return evaluated, scores
+
+    def _positions(self, candidates):
+        '''
+        Places every candidate in the unit cube by the position of its values in the grid
+
+        @param {List<dict>} candidates - Constructor parameters of every candidate
+        @returns {ndarray} - Positions of shape (candidates, parameters)
+        '''
+
+        names = list(self.parameterGrid)
+        sizes = np.array([max(len(self.parameterGrid[name]) - 1, 1) for name in names], dtype='float64')
+        indices = itertools.product(*(range(len(self.parameterGrid[name])) for name in names))
+        return np.array(list(indices), dtype='float64').reshape(len(candidates), len(names)) / sizes
+
+    def bestForecaster(self):
+        '''
+        Gives an unfitted forecaster with the best parameters found by 'search'
+
+        @returns {object} - Forecaster
+        '''
+
+        return self.forecaster(**self.bestParameters)
+
+def _initializeWorker(fullData, folds):
+    '''
+    Keeps the data and the folds in the worker process, so that
+    tasks only carry the parameters of a candidate
+
+    @param {DataFrame} fullData - Processed data in arrival order
+    @param {List<tuple>} folds - (trainRange, testRange) slices of rows for every fold
+    @returns {None}
+    '''
+
+    global _workerData, _workerFolds
+    _workerData = fullData
+    _workerFolds = folds
+
+def _expectedImprovement(positions, scores, newPositions, seed=None):
+    '''
+    Fits a Gaussian process to the mean scores of scored candidates and gives
+    the expected decrease of the best score by every other candidate. Scores of
+    failed candidates are replaced by the worst finite score
+
+    @param {ndarray} positions - Positions of the scored candidates
+    @param {ndarray} scores - Mean score of every scored candidate
+    @param {ndarray} newPositions - Positions of the other candidates
+    @param {int} seed - Seed of the restarts of the kernel optimizer
+    @returns {ndarray} - Expected improvement of every other candidate
+    '''
+
+    finite = np.isfinite(scores)
+    if not finite.any():
+        return np.ones(len(newPositions))
+    scores = np.where(finite, scores, scores[finite].max())
+
+    kernel = ConstantKernel() * Matern(length_scale=np.full(positions.shape[1], 0.5), nu=2.5) + WhiteKernel(1e-3)
+    model = GaussianProcessRegressor(kernel, normalize_y=True, n_restarts_optimizer=2, random_state=seed)
+    model.fit(positions, scores)
+    mean, std = model.predict(newPositions, return_std=True)
+
+    improvement = scores.min() - mean
+    std = np.maximum(std, 1e-12)
+    return improvement * norm.cdf(improvement / std) + std * norm.pdf(improvement / std)
+
+def _scoreCandidate(task):
+    '''
+    Fits and scores one candidate on every fold, a fold the candidate
+    fails on scores infinity
+
+    @param {tuple} task - (forecaster class, constructor parameters, name of the 'ValidationMetric' method)
+    @returns {List<float>} - Score of every fold
+    '''
+
+    forecaster, parameters, metric = task
+    score = getattr(ValidationMetric(), metric)
+    scores = []
+    for trainRange, testRange in _workerFolds:
+        trainData, testData = _workerData.iloc[trainRange], _workerData.iloc[testRange]
+        model = forecaster(**parameters).fit(trainData)
+        forecastData = model.predict(testData) if model is not None else None
+        if forecastData is None or forecastData['CallDifferenceInterval'].isna().any():
+            scores.append(np.inf)
+        else:
+            scores.append(float(score(testData['CallDifferenceInterval'], forecastData['CallDifferenceInterval'])))
+    return scores
@@ -1,13 +1,195 @@
+#!/usr/bin/env python
+# coding: utf-8
+
 """
-Some Meaningful Header Comment
+This file implements the 'PoissonForecast' class
+to estimate the arrival rate of calls as a non-homogeneous
+Poisson process. The rate is piecewise constant over
+buckets of minutes of every weekday, so the expected number
+of calls in any interval and its quantiles follow in closed form.
 """
 
+__author__ = 'Emad Bin Abid, Ateeb Ahmed, Syed Bilal Hoda'
+__copyright__ = 'Copyright 2019, Prediction of Call Arrival Times and Rates'
+__credits__ = ['Afiniti Software Solutions (Pvt.) Ltd.']
+__version__ = '0.0.1'
+__maintainer__ = 'Emad Bin Abid, Ateeb Ahmed, Syed Bilal Hoda'
+__status__ = 'dev'
+
+# Libs
+import numpy as np
+import matplotlib.pyplot as plt
+from scipy.stats import poisson
+
+# Owned
+from PCATR.Logger import logger
+from PCATR.DataTank.data_tank import WEEKDAYS, NANOSECONDS_PER_DAY, toEpochNanoseconds
+
+NANOSECONDS_PER_WEEK = 7 * NANOSECONDS_PER_DAY
+
 class PoissonForecast:
-    def __init__(self):
-        pass
+    '''
+    This class implements algorithm to estimate the arrival
+    rate of calls as a non-homogeneous Poisson process. The
+    rate is piecewise constant over buckets of minutes of every
+    weekday, so the expected number of calls in any interval
+    and its quantiles follow in closed form.
+
+    @param {int} bucketMinutes - Width of the buckets the rate is constant over, must divide a day
+    '''
+    def __init__(self, bucketMinutes=15):
+        if 1440 % int(bucketMinutes) != 0:
+            raise ValueError("bucketMinutes must divide a day, got {}".format(bucketMinutes))
+
+        self.bucketMinutes = int(bucketMinutes)
+        self.bucketNanoseconds = self.bucketMinutes * 60 * 1000000000
+        self.numBuckets = 1440 // self.bucketMinutes
+        self.model = None
+        self.trainData = None
+        self.testData = None
+        self.forecastData = None
+        self.cumulativeCalls = None
+
+    @logger.timed()
+    def fit(self, trainData):
+        '''
+        Fits the training model using poisson forecast. Calls are histogrammed
+        into (weekday, bucket) cells in one pass and divided by the number of
+        calendar days of each weekday from the first to the last day of train
+        data, days without calls included
+
+        @param {DataFrame} trainData - Training data
+        @returns {PoissonForecast} - self
+        '''
+
+        try:
+            self.trainData = trainData
+            nanoseconds = toEpochNanoseconds(self.trainData['CallArrivalTime'])
+
+            days = nanoseconds // NANOSECONDS_PER_DAY
+            cells = ((days + 3) % 7) * self.numBuckets + (nanoseconds % NANOSECONDS_PER_DAY) // self.bucketNanoseconds
+            calls = np.bincount(cells, minlength=7 * self.numBuckets).reshape(7, self.numBuckets)
+            observedDays = np.bincount((np.arange(days.min(), days.max() + 1) + 3) % 7, minlength=7)
+
+            # Expected calls in every bucket, weekdays outside the span of train data get the average weekday
+            rates = calls / np.maximum(observedDays, 1)[:, None]
+            rates[observedDays == 0] = rates[observedDays > 0].mean(axis=0)
+            self.model = rates
+
+            # Expected calls from the start of the week (Monday 00:00) to the start of every bucket
+            self.cumulativeCalls = np.concatenate([[0.0], np.cumsum(rates.ravel())])
+
+            return self
+        except:
+            logger.Logger.LOGERROR("poisson_forecast.py", "PoissonForecast::fit", "Unable to train model")
+            return None
+
+    @logger.timed()
+    def predict(self, testData):
+        '''
+        Predicts using the training model for poisson forecast, the expected
+        time until the next call at the rate of the bucket of every call
+
+        @param {DataFrame} testData - Testing data
+        @returns {DataFrame} - Predicted values
+        '''
+
+        try:
+            self.testData = testData
+            # Shallow copy, only the forecast column is replaced
+            self.forecastData = self.testData.copy(deep=False)
+            self.forecastData['CallDifferenceInterval'] = self.predictAt(self.testData['CallArrivalTime'].values)
+            return self.forecastData
+        except:
+            logger.Logger.LOGERROR("poisson_forecast.py", "PoissonForecast::predict", "Unable to predict forecast")
+            return None
+
+    def predictAt(self, timestamps):
+        '''
+        Predicts the time until the next call for a single timestamp, or an
+        array of timestamps, without building a DataFrame. It is the mean
+        inter-arrival time at the rate of the bucket, or of the whole week
+        for buckets without calls
+
+        @param {datetime|string|int|ndarray} timestamps - Time(s) of the call, integers are epoch nanoseconds
+        @returns {float|ndarray} - Predicted value(s) in seconds
+        '''
+
+        nanoseconds = toEpochNanoseconds(timestamps)
+        offset = (nanoseconds + 3 * NANOSECONDS_PER_DAY) % NANOSECONDS_PER_WEEK
+        rates = self.model.ravel()[offset // self.bucketNanoseconds]
+        weeklyRate = self.cumulativeCalls[-1] / (7 * self.numBuckets)
+
+        with np.errstate(divide='ignore'):
+            intervals = self.bucketMinutes * 60.0 / np.where(rates > 0, rates, weeklyRate)
+        return float(intervals) if np.ndim(intervals) == 0 else intervals
+
+    def expectedCalls(self, start, end):
+        '''
+        Gives the expected number of calls in [start, end), the integral of the
+        piecewise constant rate, for one interval or arrays of intervals
+
+        @param {datetime|string|int|ndarray} start - Start(s) of the interval, integers are epoch nanoseconds
+        @param {datetime|string|int|ndarray} end - End(s) of the interval, integers are epoch nanoseconds
+        @returns {float|ndarray} - Expected number of calls
+        '''
+
+        expected = self._callsSinceEpochWeek(toEpochNanoseconds(end)) - self._callsSinceEpochWeek(toEpochNanoseconds(start))
+        return float(expected) if np.ndim(expected) == 0 else expected
+
+    def callCountQuantiles(self, start, end, quantiles=(0.05, 0.5, 0.95)):
+        '''
+        Gives quantiles of the number of calls in [start, end) from the
+        Poisson distribution with the expected number of calls as its mean
+
+        @param {datetime|string|int|ndarray} start - Start(s) of the interval, integers are epoch nanoseconds
+        @param {datetime|string|int|ndarray} end - End(s) of the interval, integers are epoch nanoseconds
+        @param {List<float>} quantiles - Probabilities of the quantiles
+        @returns {ndarray} - Quantiles, one row per interval and one column per probability
+        '''
+
+        expected = np.atleast_1d(self.expectedCalls(start, end))
+        return poisson.ppf(np.asarray(quantiles)[None, :], expected[:, None])
+
+    def callCountProbability(self, start, end, maxCalls):
+        '''
+        Gives the probability of at most 'maxCalls' calls in [start, end)
+
+        @param {datetime|string|int|ndarray} start - Start(s) of the interval, integers are epoch nanoseconds
+        @param {datetime|string|int|ndarray} end - End(s) of the interval, integers are epoch nanoseconds
+        @param {int|ndarray} maxCalls - Number of calls
+        @returns {float|ndarray} - Cumulative probability
+        '''
+
+        return poisson.cdf(maxCalls, self.expectedCalls(start, end))
+
+    def _callsSinceEpochWeek(self, nanoseconds):
+        '''
+        Gives the expected number of calls from the Monday 00:00 before
+        1970-01-01 up to the given epoch nanoseconds
+
+        @param {int|ndarray} nanoseconds - Epoch nanoseconds
+        @returns {float|ndarray} - Expected number of calls
+        '''
+
+        shifted = nanoseconds + 3 * NANOSECONDS_PER_DAY
+        weeks, offset = shifted // NANOSECONDS_PER_WEEK, shifted % NANOSECONDS_PER_WEEK
+        buckets, remainder = offset // self.bucketNanoseconds, offset % self.bucketNanoseconds
+        return weeks * self.cumulativeCalls[-1] + self.cumulativeCalls[buckets] \
+            + self.model.ravel()[buckets] * (remainder / self.bucketNanoseconds)
+
+    def showPlot(self):
+        '''
+        Displays the plot of the expected calls in every bucket of every weekday
 
-    def fit(self):
-        pass
+        @returns {None}
+        '''
 
-    def predict(self):
-        pass
\ No newline at end of file
+        plt.figure(figsize=(12,8))
+        hours = np.arange(self.numBuckets) * self.bucketMinutes / 60
+        for weekday, rates in zip(WEEKDAYS, self.model):
+            plt.plot(hours, rates, label=weekday)
+        plt.xlabel("Hour of Day")
+        plt.ylabel("Expected Calls per {} Minutes".format(self.bucketMinutes))
+        plt.legend(loc='best')
+        plt.show()
@@ -23,10 +23,11 @@ import statistics
 import datetime
 from sklearn.metrics import mean_squared_error
 import matplotlib.pyplot as plt
-from statsmodels.tsa.api import ExponentialSmoothing
 
 # Owned
 from PCATR.Logger import logger
+from PCATR.DataTank.data_tank import DataTank, toEpochNanoseconds
+from PCATR.CallTimePredictor.CTPAlgorithm.weekly_seasonal_smoother import WeeklySeasonalSmoother
 
 # This needs to be modified
 class SeasonalForecast:
@@ -52,68 +53,66 @@ class SeasonalForecast:
         self.forecastData = None
         self.index = None
         self.trainTestData = None
+        self.weeklyForecast = None
 
         # Prepares the train test split from 'fullData' based on the 'numTrainWeeks'
-        def _prepareTrainTestSplit():
-            firstCallArrivalDate = self.fullData.CallArrivalDate.iloc[0]
-            lastCallArrivalDate = self.fullData.CallArrivalDate.iloc[-1]
-            
-            weeks = pd.date_range(start=firstCallArrivalDate, end=lastCallArrivalDate, freq='7D')
-            
-            return weeks[0], weeks[int(numTrainWeeks)], weeks, numTrainWeeks
-
-        trainTestData = _prepareTrainTestSplit()
-        
-        
-        dataV2 = self.fullData.groupby('DialerStartTimeMinusSeconds').median()
+        dataTank = DataTank()
+        dataTank.fullData = self.fullData
+        trainStart, testStart, testEnd = dataTank.weekBoundaries(numTrainWeeks)
         
         # Preparing train data
-        index = pd.date_range(start=trainTestData[0], end=trainTestData[1], freq='1min')
-        self.index = index
-        
-        indexDFTrain = pd.DataFrame(self.index, columns=['DialerStartTimeMinusSeconds'])
-        indexDFTrain['DialerStartTimeMinusSeconds'] = indexDFTrain['DialerStartTimeMinusSeconds'].astype(str)
-        indexDFTrain['DialerStartTimeMinusSeconds'] = indexDFTrain.DialerStartTimeMinusSeconds.apply(lambda x: x[:16])
-
-        self.trainData = pd.merge(indexDFTrain, dataV2, on='DialerStartTimeMinusSeconds', how='left')
-        self.trainData.CallDifferenceInterval.fillna(1, inplace=True)
-        self.trainData.DialerCallArrivalTime.fillna(method='ffill', inplace=True)
-        self.trainData.DialerCallArrivalTime.fillna(1, inplace=True)
+        self.index = pd.date_range(start=trainStart, end=testStart, freq='1min')
+        self.trainData = self._minuteGrid(self.index)
 
         # Preparing test data
-        testDate = trainTestData[2]
-        testDateStart = str(testDate[int(trainTestData[3])])[:10]
-        testDateEnd = str(testDate[int(trainTestData[3])+1])[:10]
-        test = self.fullData[self.fullData.DialerStartTimeMinusSeconds.str[:10] >= testDateStart ] 
-        test = test[test.DialerStartTimeMinusSeconds.str[:10] < testDateEnd] 
-
-        testIndex = pd.date_range(start=testDateStart, end=testDateEnd, freq='1min')
-        indexDFTest = pd.DataFrame(testIndex, columns=['DialerStartTimeMinusSeconds'])
-        indexDFTest['DialerStartTimeMinusSeconds'] = indexDFTest['DialerStartTimeMinusSeconds'].astype(str)
-        indexDFTest['DialerStartTimeMinusSeconds'] = indexDFTest.DialerStartTimeMinusSeconds.apply(lambda x: x[:16])
-
-        self.testData = pd.merge(indexDFTest, dataV2, on='DialerStartTimeMinusSeconds', how='left')
-        self.testData.CallDifferenceInterval.fillna(1, inplace=True)
-        self.testData.DialerCallArrivalTime.fillna(method='ffill', inplace=True)
-        self.testData.DialerCallArrivalTime.fillna(1, inplace=True)
-
-    def fit(self):
+        self.testData = self._minuteGrid(pd.date_range(start=testStart, end=testEnd, freq='1min'))
+
+    def _minuteGrid(self, index):
+        '''
+        Gives the median of every minute of 'index' for the calls of 'fullData'. Calls are 
+        binned by integer minute since the start of 'index', so no strings are built. 
+        Minutes without calls get 'CallDifferenceInterval' 1 and the last known 'DialerCallArrivalTime'
+
+        @param {DatetimeIndex} index - Consecutive minutes of the grid
+        @returns {DataFrame} - One row per minute of 'index'
+        '''
+
+        minutes = (toEpochNanoseconds(self.fullData['CallArrivalTime']) - index[0].value) // 60000000000
+        inGrid = (minutes >= 0) & (minutes < len(index))
+
+        grid = pd.DataFrame({'DialerStartTimeMinusSeconds': index})
+        for column in ['CallDifferenceInterval', 'DialerCallArrivalTime']:
+            values = self.fullData[column].values
+            observed = inGrid & ~np.isnan(values)
+            grid[column] = _binMedians(minutes[observed], values[observed], len(index))
+
+        grid['CallDifferenceInterval'] = grid['CallDifferenceInterval'].fillna(1)
+        grid['DialerCallArrivalTime'] = grid['DialerCallArrivalTime'].ffill().fillna(1)
+        return grid
+
+    @logger.timed()
+    def fit(self, state=None):
         '''
         Fits the training model using seasonal forecast
 
+        @param {dict} state - State of a previous fit, e.g. 'self.model.getState()' of last week, to continue from
         @returns {SeasonalForecast} - self
         '''
 
         try:
-            trainSeries = pd.Series(self.trainData.CallDifferenceInterval.tolist(), self.index)
-            
-            self.model = ExponentialSmoothing(trainSeries, seasonal_periods=10080, trend=None, seasonal='add').fit(smoothing_level=0.1,use_boxcox=True)
+            trainSeries = pd.Series(self.trainData.CallDifferenceInterval.values, self.index)
             
+            self.model = WeeklySeasonalSmoother(smoothingLevel=0.1, useBoxCox=True).fit(trainSeries, state=state)
+
+            # The week ahead of train data, looked up by minute for point queries
+            self.weeklyForecast = np.asarray(self.model.forecast(10080))
+
             return self
         except:
             logger.Logger.LOGERROR("seasonal_forecast.py", "SeasonalForecast::fit", "Unable to train model")
             return None
 
+    @logger.timed()
     def predict(self):
         '''
         Predicts using the training model for seasonal forecast
@@ -135,6 +134,19 @@ class SeasonalForecast:
             logger.Logger.LOGERROR("seasonal_forecast.py", "SeasonalForecast::predict", "Unable to predict forecast")
             return None
             
+    def predictAt(self, timestamps):
+        '''
+        Predicts the time until the next call for a single timestamp, or an 
+        array of timestamps, without building a DataFrame. The forecast of the same 
+        minute of the week is given, counting weeks from the end of train data
+
+        @param {datetime|string|int|ndarray} timestamps - Time(s) of the call, integers are epoch nanoseconds
+        @returns {float|ndarray} - Predicted value(s)
+        '''
+
+        minutes = (toEpochNanoseconds(timestamps) - (self.index[-1].value + 60000000000)) // 60000000000
+        return self.weeklyForecast[minutes % 10080]
+
     def showPlot(self):
         '''
         Displays the plot of train data, test data and predicted results
@@ -158,4 +170,27 @@ class SeasonalForecast:
         self.model.fittedvalues.plot(ax=ax, style='--', color='red')
 
         self.model.forecast(10080).rename('Holt-Winters (add-add-seasonal)').plot(ax=ax, style='--', marker='o', color='red', legend=True)
-        plt.show()
\ No newline at end of file
+        plt.show()
+
+def _binMedians(bins, values, numBins):
+    '''
+    Gives the exact median of the values of every bin in one sort, 
+    NaN for bins without values
+
+    @param {ndarray} bins - Bin of every value, in [0, numBins)
+    @param {ndarray} values - Values to take the median of
+    @param {int} numBins - Number of bins
+    @returns {ndarray} - Median of every bin
+    '''
+
+    order = np.lexsort((values, bins))
+    sortedValues = values[order]
+    counts = np.bincount(bins, minlength=numBins)
+    starts = np.cumsum(counts) - counts
+
+    medians = np.full(numBins, np.nan)
+    filled = counts > 0
+    lower = starts[filled] + (counts[filled] - 1) // 2
+    upper = starts[filled] + counts[filled] // 2
+    medians[filled] = (sortedValues[lower] + sortedValues[upper]) / 2
+    return medians
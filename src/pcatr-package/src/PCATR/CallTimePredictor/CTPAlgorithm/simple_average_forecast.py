@@ -17,6 +17,7 @@ __status__ = 'dev'
 
 # Libs
 import pandas as pd
+import numpy as np
 import matplotlib.pyplot as plt
 
 # Owned
@@ -34,6 +35,7 @@ class SimpleAverageForecast:
         self.testData = None
         self.forecastData = None
 
+    @logger.timed()
     def fit(self, trainData):
         '''
         Fits the training model using simple average forecast
@@ -51,6 +53,7 @@ class SimpleAverageForecast:
             logger.Logger.LOGERROR("simple_average_forecast.py", "SimpleAverageForecast::fit", "Unable to train model")
             return None
 
+    @logger.timed()
     def predict(self, testData):
         '''
         Predicts using the training model for simple average forecast
@@ -61,13 +64,28 @@ class SimpleAverageForecast:
 
         try:
             self.testData = testData
-            self.forecastData = self.testData.copy()
+            # Shallow copy, only the forecast column is replaced
+            self.forecastData = self.testData.copy(deep=False)
             self.forecastData['CallDifferenceInterval'] = self.model
             return self.forecastData
         except:
             logger.Logger.LOGERROR("simple_average_forecast.py", "SimpleAverageForecast::predict", "Unable to predict forecast")
             return None
             
+    def predictAt(self, timestamps):
+        '''
+        Predicts the time until the next call for a single timestamp, or an 
+        array of timestamps, without building a DataFrame. The prediction does not 
+        depend on the time of the call
+
+        @param {datetime|string|int|ndarray} timestamps - Time(s) of the call, integers are epoch nanoseconds
+        @returns {float|ndarray} - Predicted value(s)
+        '''
+
+        if np.ndim(timestamps) == 0:
+            return self.model
+        return np.full(len(timestamps), self.model)
+
     def showPlot(self):
         '''
         Displays the plot of train data, test data and predicted results
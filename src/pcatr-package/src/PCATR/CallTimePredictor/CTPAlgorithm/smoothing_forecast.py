@@ -32,13 +32,19 @@ class SmoothingForecast:
     decrease exponentially as observations come from 
     further in the past – the smallest weights are 
     associated with the oldest observations.
+
+    @param {float} smoothingLevel - Smoothing factor of the level
     '''
-    def __init__(self):
+    def __init__(self, smoothingLevel=0.6):
         self.model = None
         self.trainData = None
         self.testData = None
         self.forecastData = None
+        self.nextInterval = None
+        self.smoothingLevel = smoothingLevel
+        self.level = None
 
+    @logger.timed()
     def fit(self, trainData):
         '''
         Fits the training model using smoothing forecast
@@ -51,13 +57,19 @@ class SmoothingForecast:
             self.trainData = trainData
             
             self.model = SimpleExpSmoothing(np.asarray(self.trainData['CallDifferenceInterval']))\
-                .fit(smoothing_level=0.6, optimized=False)
+                .fit(smoothing_level=self.smoothingLevel, optimized=False)
+
+            # State of the recursion, advanced by 'update' without refitting
+            self.smoothingLevel = float(self.model.params['smoothing_level'])
+            self.level = float(np.asarray(self.model.level)[-1])
+            self.nextInterval = self.level
 
             return self
         except:
             logger.Logger.LOGERROR("smoothing_forecast.py", "SmoothingForecast::fit", "Unable to train model")
             return None
 
+    @logger.timed()
     def predict(self, testData):
         '''
         Predicts using the training model for smoothing forecast
@@ -68,13 +80,67 @@ class SmoothingForecast:
 
         try:
             self.testData = testData
-            self.forecastData = self.testData.copy()
-            self.forecastData['CallDifferenceInterval'] = self.model.forecast(len(self.testData))
+            # Shallow copy, only the forecast column is replaced
+            self.forecastData = self.testData.copy(deep=False)
+            self.forecastData['CallDifferenceInterval'] = np.full(len(self.testData), self.level)
             return self.forecastData
         except:
             logger.Logger.LOGERROR("smoothing_forecast.py", "SmoothingForecast::predict", "Unable to predict forecast")
             return None
+
+    def update(self, newObservations):
+        '''
+        Advances the level over new observations in O(k) for k observations, 
+        so the forecast stays current without refitting on history
+
+        @param {float|ndarray|Series} newObservations - New values of 'CallDifferenceInterval', oldest first
+        @returns {SmoothingForecast} - self
+        '''
+
+        alpha, level = self.smoothingLevel, self.level
+        for observation in np.atleast_1d(np.asarray(newObservations, dtype='float64')).tolist():
+            level = alpha * observation + (1 - alpha) * level
+
+        self.level = level
+        self.nextInterval = level
+        return self
+
+    def getState(self):
+        '''
+        Gives the state of the recursion, to store the model or to restore it in another process
+
+        @returns {dict} - Serializable state
+        '''
+
+        return {'smoothingLevel': self.smoothingLevel, 'level': self.level}
+
+    def setState(self, state):
+        '''
+        Restores a state given by 'getState', no fitting is needed afterwards
+
+        @param {dict} state - State given by 'getState'
+        @returns {SmoothingForecast} - self
+        '''
+
+        self.smoothingLevel = float(state['smoothingLevel'])
+        self.level = float(state['level'])
+        self.nextInterval = self.level
+        return self
             
+    def predictAt(self, timestamps):
+        '''
+        Predicts the time until the next call for a single timestamp, or an 
+        array of timestamps, without building a DataFrame. The one-step-ahead 
+        forecast of the fitted model is given for every timestamp
+
+        @param {datetime|string|int|ndarray} timestamps - Time(s) of the call, integers are epoch nanoseconds
+        @returns {float|ndarray} - Predicted value(s)
+        '''
+
+        if np.ndim(timestamps) == 0:
+            return self.nextInterval
+        return np.full(len(timestamps), self.nextInterval)
+
     def showPlot(self):
         '''
         Displays the plot of train data, test data and predicted results
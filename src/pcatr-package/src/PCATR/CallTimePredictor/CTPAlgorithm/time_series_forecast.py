@@ -20,6 +20,7 @@ __status__ = 'dev'
 
 # Libs
 import pandas as pd
+import numpy as np
 import matplotlib.pyplot as plt
 import statsmodels.api as sm
 
@@ -35,58 +36,97 @@ class TimeSeriesForecast:
     into account when forecasting current and future values. 
     ARIMA uses a number of lagged observations of time series 
     to forecast observations.
+
+    @param {tuple} order - (p, d, q) order of the model
+    @param {tuple} seasonalOrder - (P, D, Q, s) seasonal order of the model
+    @param {string} trend - SARIMAX trend, e.g. 'c' for a constant, none if None
+    @param {boolean} enforceStationarity - Restricts the AR parameters to a stationary model
+    @param {boolean} enforceInvertibility - Restricts the MA parameters to an invertible model
     '''
-    def __init__(self):
+    def __init__(self, order=(1, 0, 1), seasonalOrder=(0, 0, 0, 0), trend=None, enforceStationarity=False,
+            enforceInvertibility=False):
+        self.order = tuple(order)
+        self.seasonalOrder = tuple(seasonalOrder)
+        self.trend = trend
+        self.enforceStationarity = enforceStationarity
+        self.enforceInvertibility = enforceInvertibility
         self.model = None
         self.trainData = None
         self.testData = None
         self.forecastData = None
+        self.prediction = None
+        self.nextInterval = None
 
-    def fit(self, trainData, testData):
+    @logger.timed()
+    def fit(self, trainData, testData=None):
         '''
-        Fits the training model using time series forecast
+        Fits the training model using time series forecast on train data only
 
         @param {DataFrame} trainData - Training data
-        @param {DataFrame} testData - Test data
+        @param {DataFrame} testData - Test data, kept for 'predict' and 'showPlot', it is not fitted on
         @returns {TimeSeriesForecast} - self
         '''
 
         try:
             self.trainData = trainData
             self.testData = testData
-            fullData = pd.concat([self.trainData, self.testData])
-
-            model = sm.tsa.statespace.SARIMAX(fullData['CallDifferenceInterval'],
-                                            order=(1, 0, 1),
-                                            seasonal_order=(0, 0, 0, 0),
-                                            enforce_stationarity=False,
-                                            enforce_invertibility=False)
-            self.model = model.fit()
-            
+
+            model = sm.tsa.statespace.SARIMAX(np.asarray(self.trainData['CallDifferenceInterval'], dtype='float64'),
+                                            order=self.order,
+                                            seasonal_order=self.seasonalOrder,
+                                            trend=self.trend,
+                                            enforce_stationarity=self.enforceStationarity,
+                                            enforce_invertibility=self.enforceInvertibility)
+            self.model = model.fit(disp=False)
+            self.nextInterval = float(np.asarray(self.model.forecast(1))[0])
+
             return self
         except:
             logger.Logger.LOGERROR("time_series_forecast.py", "TimeSeriesForecast::fit", "Unable to train model")
             return None
 
-    def predict(self, testData):
+    @logger.timed()
+    def predict(self, testData=None):
         '''
-        Predicts using the training model for time series forecast
+        Predicts using the training model for time series forecast. The fitted 
+        state-space model is extended over test data with the fitted parameters, 
+        so every call gets the one-step-ahead forecast from the calls before it 
+        without re-estimation
 
-        @param {DataFrame} testData - Testing data
+        @param {DataFrame} testData - Testing data, the test data given to 'fit' if None
         @returns {DataFrame} - Predicted values
         '''
 
         try:
-            self.testData = testData
+            if testData is not None:
+                self.testData = testData
 
-            pred = self.model.get_prediction(dynamic=False)
+            # Kalman filter over test data only, starting from the state at the end of train data
+            extendedModel = self.model.extend(np.asarray(self.testData['CallDifferenceInterval'], dtype='float64'))
+            self.prediction = extendedModel.get_prediction(dynamic=False)
 
-            self.forecastData = pred
+            # Shallow copy, only the forecast column is replaced
+            self.forecastData = self.testData.copy(deep=False)
+            self.forecastData['CallDifferenceInterval'] = np.asarray(self.prediction.predicted_mean)
             return self.forecastData
         except:
             logger.Logger.LOGERROR("time_series_forecast.py", "TimeSeriesForecast::predict", "Unable to predict forecast")
             return None
             
+    def predictAt(self, timestamps):
+        '''
+        Predicts the time until the next call for a single timestamp, or an 
+        array of timestamps, without building a DataFrame. The one-step-ahead 
+        forecast of the fitted model is given for every timestamp
+
+        @param {datetime|string|int|ndarray} timestamps - Time(s) of the call, integers are epoch nanoseconds
+        @returns {float|ndarray} - Predicted value(s)
+        '''
+
+        if np.ndim(timestamps) == 0:
+            return self.nextInterval
+        return np.full(len(timestamps), self.nextInterval)
+
     def showPlot(self):
         '''
         Displays the plot of train data, test data and predicted results
@@ -99,17 +139,17 @@ class TimeSeriesForecast:
         self.model.plot_diagnostics(figsize=(12, 8))
         plt.show()
 
-        pred_ci = self.forecastData.conf_int()
+        predictionInterval = np.asarray(self.prediction.conf_int())
 
         y = self.trainData['CallDifferenceInterval']
 
         plt.plot(self.testData['CallDifferenceInterval'], label='Test')
 
         ax = y[:].plot(label='Train')
-        self.forecastData.predicted_mean.plot(ax=ax, label='Forecast', alpha=.7, figsize=(12, 8))
-        ax.fill_between(pred_ci.index,
-                        pred_ci.iloc[:, 0],
-                        pred_ci.iloc[:, 1], color='k', alpha=.5)
+        self.forecastData['CallDifferenceInterval'].plot(ax=ax, label='Forecast', alpha=.7, figsize=(12, 8))
+        ax.fill_between(self.forecastData.index,
+                        predictionInterval[:, 0],
+                        predictionInterval[:, 1], color='k', alpha=.5)
         ax.set_xlabel('Date')
         ax.set_ylabel('Next Call')
         ax.set_ylim(0, max(self.trainData['CallDifferenceInterval'].max(),
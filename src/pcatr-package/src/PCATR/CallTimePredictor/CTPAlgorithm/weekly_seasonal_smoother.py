@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+This file implements the 'WeeklySeasonalSmoother' class, an additive
+level + weekly seasonal exponential smoother for minute data. The
+recursion steps a week at a time and updates all 10080 seasonal
+states of the week at once, so months of minutes fit in seconds.
+"""
+
+__author__ = 'Emad Bin Abid, Ateeb Ahmed, Syed Bilal Hoda'
+__copyright__ = 'Copyright 2019, Prediction of Call Arrival Times and Rates'
+__credits__ = ['Afiniti Software Solutions (Pvt.) Ltd.']
+__version__ = '0.0.1'
+__maintainer__ = 'Emad Bin Abid, Ateeb Ahmed, Syed Bilal Hoda'
+__status__ = 'dev'
+
+# Libs
+import pandas as pd
+import numpy as np
+from scipy.special import boxcox, inv_boxcox
+from scipy.stats import boxcox_normmax
+
+MINUTES_PER_WEEK = 10080
+
+# Candidates for the seasonal smoothing factor when it is not given
+SEASONAL_GRID = np.linspace(0.05, 0.95, 19)
+
+class WeeklySeasonalSmoother:
+    '''
+    This class implements an additive level + weekly seasonal
+    exponential smoother for minute data. The level is smoothed
+    over weekly means and every minute of the week has its own
+    seasonal state, smoothed over the same minute of past weeks.
+
+    @param {float} smoothingLevel - Smoothing factor of the level
+    @param {float} smoothingSeasonal - Smoothing factor of the seasonal states, picked by least squares when None
+    @param {boolean} useBoxCox - Fits on Box-Cox transformed values, the data must be positive
+    @param {int} seasonalPeriods - Observations in a season
+    '''
+
+    def __init__(self, smoothingLevel=0.1, smoothingSeasonal=None, useBoxCox=False, seasonalPeriods=MINUTES_PER_WEEK):
+        self.smoothingLevel = smoothingLevel
+        self.smoothingSeasonal = smoothingSeasonal
+        self.useBoxCox = useBoxCox
+        self.seasonalPeriods = int(seasonalPeriods)
+        self.boxCoxLambda = None
+        self.level = None
+        self.seasonal = None
+        self.position = 0
+        self.index = None
+        self.fittedvalues = None
+        self.sse = None
+
+    def fit(self, series, state=None):
+        '''
+        Fits the smoother on consecutive observations. With 'state' the recursion
+        continues from a previous fit, e.g. last week's, instead of starting afresh. 
+        This matches one fit over both when the previous fit ended on a season boundary
+
+        @param {Series|ndarray} series - Consecutive observations, a DatetimeIndex is kept for the forecasts
+        @param {dict} state - State given by 'getState' of a previous fit
+        @returns {WeeklySeasonalSmoother} - self
+        '''
+
+        self.index = series.index if isinstance(series, pd.Series) else None
+        values = np.asarray(series, dtype='float64')
+
+        if state is not None:
+            self.setState(state)
+        elif self.useBoxCox:
+            if (values <= 0).any():
+                raise ValueError("Box-Cox transform requires positive data")
+            self.boxCoxLambda = boxcox_normmax(values)
+
+        transformed = self._transform(values)
+        if state is None:
+            # Initial states from the first season
+            firstSeason = transformed[:self.seasonalPeriods]
+            initialLevel = firstSeason.mean()
+            initialSeasonal = np.zeros(self.seasonalPeriods)
+            initialSeasonal[:len(firstSeason)] = firstSeason - initialLevel
+            initialPosition = 0
+        else:
+            initialLevel, initialSeasonal, initialPosition = self.level, self.seasonal, self.position
+
+        smoothingSeasonal = self.smoothingSeasonal
+        if smoothingSeasonal is None:
+            errors = [self._recurse(transformed, initialLevel, initialSeasonal, initialPosition, gamma)[3]
+                for gamma in SEASONAL_GRID]
+            smoothingSeasonal = SEASONAL_GRID[int(np.argmin(errors))]
+
+        self.level, self.seasonal, fitted, self.sse = self._recurse(
+            transformed, initialLevel, initialSeasonal, initialPosition, smoothingSeasonal)
+        self.smoothingSeasonal = smoothingSeasonal
+        self.position = (initialPosition + len(values)) % self.seasonalPeriods
+
+        fitted = self._inverseTransform(fitted)
+        self.fittedvalues = pd.Series(fitted, self.index) if self.index is not None else fitted
+        return self
+
+    def _recurse(self, values, level, seasonal, position, smoothingSeasonal):
+        '''
+        Runs the recursion a season at a time. The level is updated from the mean
+        deseasonalized value of the season, then every seasonal state of the season
+        at once from the detrended values
+
+        @param {ndarray} values - Transformed observations
+        @param {float} level - Level before the first observation
+        @param {ndarray} seasonal - Seasonal states before the first observation
+        @param {int} position - Position in the season of the first observation
+        @param {float} smoothingSeasonal - Smoothing factor of the seasonal states
+        @returns {tuple} - (level, seasonal states, one season ahead fitted values, sum of squared errors)
+        '''
+
+        seasonal = np.roll(seasonal, -position)
+        fitted = np.empty(len(values))
+        alpha, gamma = self.smoothingLevel, smoothingSeasonal
+
+        # Seasons are aligned to position 0, the first and last ones may be partial
+        boundaries = np.r_[0, np.arange(self.seasonalPeriods - position, len(values), self.seasonalPeriods), len(values)]
+        for start, stop in zip(boundaries[:-1], boundaries[1:]):
+            if start == stop:
+                continue
+            season = values[start:stop]
+            states = seasonal[:len(season)]
+            fitted[start:stop] = level + states
+
+            level = alpha * (season - states).mean() + (1 - alpha) * level
+            seasonal[:len(season)] = gamma * (season - level) + (1 - gamma) * states
+
+            # Brings the state of the following observation to the front
+            seasonal = np.roll(seasonal, -len(season))
+
+        seasonal = np.roll(seasonal, position + len(values))
+        return level, seasonal, fitted, float(((values - fitted) ** 2).sum())
+
+    def forecast(self, steps=MINUTES_PER_WEEK):
+        '''
+        Forecasts the observations following the fitted ones
+
+        @param {int} steps - Number of observations to forecast
+        @returns {Series|ndarray} - Forecasts, indexed by the following minutes when fitted on a Series
+        '''
+
+        positions = (self.position + np.arange(steps)) % self.seasonalPeriods
+        forecasts = self._inverseTransform(self.level + self.seasonal[positions])
+        if self.index is None:
+            return forecasts
+
+        index = pd.date_range(start=self.index[-1] + pd.Timedelta(minutes=1), periods=steps, freq='1min')
+        return pd.Series(forecasts, index)
+
+    def getState(self):
+        '''
+        Gives the fitted state, to warm start the next fit or to store the model
+
+        @returns {dict} - Serializable state
+        '''
+
+        return {
+            'smoothingLevel': self.smoothingLevel,
+            'smoothingSeasonal': float(self.smoothingSeasonal),
+            'boxCoxLambda': None if self.boxCoxLambda is None else float(self.boxCoxLambda),
+            'level': float(self.level),
+            'seasonal': self.seasonal.tolist(),
+            'position': self.position
+        }
+
+    def setState(self, state):
+        '''
+        Restores a state given by 'getState'
+
+        @param {dict} state - State given by 'getState'
+        @returns {WeeklySeasonalSmoother} - self
+        '''
+
+        self.smoothingLevel = state['smoothingLevel']
+        self.smoothingSeasonal = state['smoothingSeasonal']
+        self.boxCoxLambda = state['boxCoxLambda']
+        self.useBoxCox = self.boxCoxLambda is not None
+        self.level = state['level']
+        self.seasonal = np.array(state['seasonal'], dtype='float64')
+        self.seasonalPeriods = len(self.seasonal)
+        self.position = state['position']
+        return self
+
+    def _transform(self, values):
+        '''
+        Applies the fitted Box-Cox transform, if any
+
+        @param {ndarray} values - Observations
+        @returns {ndarray} - Transformed observations
+        '''
+
+        return boxcox(values, self.boxCoxLambda) if self.boxCoxLambda is not None else values
+
+    def _inverseTransform(self, values):
+        '''
+        Reverts the fitted Box-Cox transform, if any
+
+        @param {ndarray} values - Transformed observations
+        @returns {ndarray} - Observations
+        '''
+
+        return inv_boxcox(values, self.boxCoxLambda) if self.boxCoxLambda is not None else values
@@ -0,0 +1,350 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+This file implements the 'Backtest' class to evaluate
+the forecasters of 'CTPAlgorithm' together over the
+rolling-origin folds of the data. Fold x model jobs run
+in a pool of processes that read the data from shared
+memory, and all predictions are scored at once with
+'ValidationMetric'.
+"""
+
+__author__ = 'Emad Bin Abid, Ateeb Ahmed, Syed Bilal Hoda'
+__copyright__ = 'Copyright 2019, Prediction of Call Arrival Times and Rates'
+__credits__ = ['Afiniti Software Solutions (Pvt.) Ltd.']
+__version__ = '0.0.1'
+__maintainer__ = 'Emad Bin Abid, Ateeb Ahmed, Syed Bilal Hoda'
+__status__ = 'dev'
+
+# Libs
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+import pandas as pd
+import numpy as np
+
+# Owned
+from PCATR.Logger import logger
+from PCATR.DataTank.data_tank import DataTank, NANOSECONDS_PER_DAY, toEpochNanoseconds
+from PCATR.ValidationMetric.validation_metric import ValidationMetric
+from PCATR.CallTimePredictor.CTPAlgorithm.simple_average_forecast import SimpleAverageForecast
+from PCATR.CallTimePredictor.CTPAlgorithm.interday_average_forecast import InterdayAverageForecast
+from PCATR.CallTimePredictor.CTPAlgorithm.halfday_interval_average_forecast import HalfdayIntervalAverageForecast
+from PCATR.CallTimePredictor.CTPAlgorithm.hourly_interval_average_forecast import HourlyIntervalAverageForecast
+from PCATR.CallTimePredictor.CTPAlgorithm.poisson_forecast import PoissonForecast
+from PCATR.CallTimePredictor.CTPAlgorithm.smoothing_forecast import SmoothingForecast
+from PCATR.CallTimePredictor.CTPAlgorithm.double_smoothing_forecast import DoubleSmoothingForecast
+from PCATR.CallTimePredictor.CTPAlgorithm.time_series_forecast import TimeSeriesForecast
+from PCATR.CallTimePredictor.CTPAlgorithm.seasonal_forecast import SeasonalForecast
+from PCATR.CallTimePredictor.CTPAlgorithm.lstm_forecast import LstmForecast
+
+# Data, models and folds of the worker process, set once per worker by '_initializeWorker'
+_workerData = None
+_workerModels = None
+_workerFolds = None
+# Shared memory blocks of the worker process, kept open while the data is used
+_workerBlocks = []
+
+class BacktestModel:
+    '''
+    This class gives every forecaster the same interface for
+    backtesting: a fresh forecaster is fitted on train data and
+    predicts 'CallDifferenceInterval' of every test call.
+
+    @param {class} forecaster - Forecaster class, e.g. SmoothingForecast
+    @param {dict} parameters - Constructor parameters of the forecaster
+    @param {string} name - Name of the model in the results, the class name if None
+    '''
+
+    def __init__(self, forecaster, parameters=None, name=None):
+        self.forecaster = forecaster
+        self.parameters = dict(parameters or {})
+        self.name = name if name is not None else forecaster.__name__
+
+    def fitPredict(self, trainData, testData):
+        '''
+        Fits a fresh forecaster on train data and predicts test data
+
+        @param {DataFrame} trainData - Training data
+        @param {DataFrame} testData - Testing data
+        @returns {ndarray} - Predicted 'CallDifferenceInterval' of every test call
+        '''
+
+        model = self.forecaster(**self.parameters).fit(trainData)
+        if model is None:
+            raise ValueError("Unable to fit {}".format(self.name))
+        forecastData = model.predict(testData)
+        if forecastData is None:
+            raise ValueError("Unable to predict with {}".format(self.name))
+        return np.asarray(forecastData['CallDifferenceInterval'], dtype='float64')
+
+class SeasonalBacktestModel(BacktestModel):
+    '''
+    This class adapts 'SeasonalForecast', which takes the data and
+    the number of train weeks in its constructor and forecasts a grid
+    of minutes. Test calls are predicted by the minute they arrive in.
+
+    @param {dict} parameters - Parameters of 'SeasonalForecast.fit'
+    @param {string} name - Name of the model in the results
+    '''
+
+    def __init__(self, parameters=None, name='SeasonalForecast'):
+        super().__init__(SeasonalForecast, parameters, name)
+
+    def fitPredict(self, trainData, testData):
+        '''
+        Fits a fresh 'SeasonalForecast' on the whole weeks of train data and
+        predicts test data
+
+        @param {DataFrame} trainData - Training data
+        @param {DataFrame} testData - Testing data, following train data
+        @returns {ndarray} - Predicted 'CallDifferenceInterval' of every test call
+        '''
+
+        trainStart, testStart = toEpochNanoseconds(pd.concat(
+            [trainData['CallArrivalTime'].iloc[:1], testData['CallArrivalTime'].iloc[:1]])) // NANOSECONDS_PER_DAY
+        numTrainWeeks = int(np.ceil((testStart - trainStart) / 7))
+
+        model = SeasonalForecast(pd.concat([trainData, testData]), numTrainWeeks).fit(**self.parameters)
+        if model is None:
+            raise ValueError("Unable to fit {}".format(self.name))
+        return np.asarray(model.predictAt(testData['CallArrivalTime'].values), dtype='float64')
+
+def defaultModels():
+    '''
+    Gives every forecaster of 'CTPAlgorithm' with its default parameters
+
+    @returns {List<BacktestModel>} - Models to backtest
+    '''
+
+    return [BacktestModel(forecaster) for forecaster in [
+        SimpleAverageForecast,
+        InterdayAverageForecast,
+        HalfdayIntervalAverageForecast,
+        HourlyIntervalAverageForecast,
+        PoissonForecast,
+        SmoothingForecast,
+        DoubleSmoothingForecast,
+        TimeSeriesForecast,
+        LstmForecast
+    ]] + [SeasonalBacktestModel()]
+
+class Backtest:
+    '''
+    This class implements a backtest of many models over the
+    rolling-origin folds of the data. Every fold x model job is
+    fitted in a pool of processes, the numeric columns of the data
+    are placed in shared memory once instead of being copied to
+    every worker, and all predictions are scored in one
+    'ValidationMetric.evaluate' call.
+
+    @param {List<BacktestModel>} models - Models to backtest, every forecaster of 'CTPAlgorithm' if None
+    @param {List<string>} metrics - Names in 'validation_metric.METRICS', all of them if None
+    @param {int} maxWorkers - Number of processes, the number of CPUs if None and in this process if 1
+    @param {string} startMethod - 'fork', 'spawn' or 'forkserver' to start the processes, the platform default if None
+    '''
+
+    def __init__(self, models=None, metrics=None, maxWorkers=None, startMethod=None):
+        self.models = models if models is not None else defaultModels()
+        self.metrics = metrics
+        self.maxWorkers = maxWorkers
+        self.startMethod = startMethod
+        self.folds = None
+        self.actual = None
+        self.predictions = None
+        self.groups = None
+        self.timings = None
+        self.results = None
+
+    def run(self, fullData, numTrainWeeks, numTestWeeks=1, stepWeeks=1, expanding=True, maxFolds=None, groupBy=None):
+        '''
+        Fits and predicts every model on every rolling-origin fold of processed
+        data and scores the predictions per model and fold, keeping them in 'results'
+
+        @param {DataFrame} fullData - Processed data in arrival order
+        @param {int} numTrainWeeks - Number of weeks in train data of the first fold
+        @param {int} numTestWeeks - Number of weeks in test data of every fold
+        @param {int} stepWeeks - Number of weeks the origin moves between folds
+        @param {bool} expanding - Keeps train data starting at the first week, otherwise the train window slides
+        @param {int} maxFolds - Maximum number of folds, all folds if None
+        @param {List<string>} groupBy - Columns of the data to further break the scores down by, e.g. ['DayOfWeek', 'IntervalOfDay']
+        @returns {DataFrame} - Score of every metric, indexed by model, fold and groups
+        '''
+
+        try:
+            dataTank = DataTank()
+            dataTank.fullData = fullData
+            self.folds = dataTank.rollingOriginSplits(numTrainWeeks, numTestWeeks, stepWeeks, expanding, maxFolds)
+            if not self.folds:
+                raise ValueError("No rolling-origin fold fits in the data")
+
+            tasks = [(modelIndex, foldIndex) for foldIndex in range(len(self.folds)) for modelIndex in range(len(self.models))]
+            outputs = self._run(fullData, tasks)
+
+            # Test rows of all folds one after the other, folds may overlap
+            testRows = np.concatenate([np.arange(testRange.start, testRange.stop) for _, testRange in self.folds])
+            offsets = np.r_[0, np.cumsum([testRange.stop - testRange.start for _, testRange in self.folds])]
+            predictions = np.full((len(self.models), len(testRows)), np.nan)
+            seconds = np.full((len(self.models), len(self.folds)), np.nan)
+            for (modelIndex, foldIndex), (predicted, elapsed) in zip(tasks, outputs):
+                seconds[modelIndex, foldIndex] = elapsed
+                if predicted is not None:
+                    predictions[modelIndex, offsets[foldIndex]:offsets[foldIndex + 1]] = predicted
+
+            names = [model.name for model in self.models]
+            self.actual = fullData['CallDifferenceInterval'].values[testRows]
+            self.predictions = pd.DataFrame(predictions.T, columns=names)
+            self.groups = {'Fold': np.repeat(np.arange(len(self.folds)), np.diff(offsets))}
+            for column in groupBy or []:
+                self.groups[column] = fullData[column].values[testRows]
+            self.timings = pd.DataFrame(seconds, index=pd.Index(names, name='Model'),
+                columns=pd.RangeIndex(len(self.folds), name='Fold'))
+
+            self.results = ValidationMetric().evaluate(self.actual, self.predictions, self.metrics, self.groups)
+            return self.results
+        except:
+            logger.Logger.LOGERROR("backtest.py", "Backtest::run", "Unable to run backtest")
+            return None
+
+    def leaderboard(self, metric='RMSE'):
+        '''
+        Scores every model over the test data of all folds together,
+        best model first. Models with missing predictions are ranked after
+        the others, their scores leave out the calls they failed on
+
+        @param {string} metric - Name in 'validation_metric.METRICS' to rank by
+        @returns {DataFrame} - Score of every metric and total fit seconds, indexed by model
+        '''
+
+        scores = ValidationMetric().evaluate(self.actual, self.predictions, self.metrics)
+        scores['Seconds'] = self.timings.sum(axis=1).values
+        order = np.lexsort((scores[metric].values, scores['Invalid'].values > 0))
+        return scores.iloc[order]
+
+    def _run(self, fullData, tasks):
+        '''
+        Runs the tasks in a pool of processes over shared data, or in this
+        process if 'maxWorkers' is 1
+
+        @param {DataFrame} fullData - Processed data in arrival order
+        @param {List<tuple>} tasks - (model index, fold index) of every job
+        @returns {List<tuple>} - (predictions or None, fit seconds) of every task
+        '''
+
+        if self.maxWorkers == 1:
+            _initializeWorker(fullData, self.models, self.folds)
+            return [_runTask(task) for task in tasks]
+
+        blocks, sharedData = _shareFrame(fullData)
+        try:
+            context = multiprocessing.get_context(self.startMethod) if self.startMethod is not None else None
+            with ProcessPoolExecutor(max_workers=self.maxWorkers, mp_context=context, initializer=_initializeWorker,
+                    initargs=(sharedData, self.models, self.folds)) as executor:
+                return list(executor.map(_runTask, tasks))
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+def _shareFrame(frame):
+    '''
+    Copies the numeric and datetime columns of a DataFrame into shared memory
+    blocks. Categorical columns share their codes and send their categories, other
+    columns are factorized so that only their distinct values are sent to the
+    workers. No Python objects are put in shared memory, their pointers are only
+    valid in this process
+
+    @param {DataFrame} frame - Data to share
+    @returns {tuple} - (shared memory blocks, description of the columns for '_attachFrame')
+    '''
+
+    blocks = []
+    columns = []
+    try:
+        for name in frame.columns:
+            series = frame[name]
+            labels = None
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                values, labels = series.cat.codes.values, series.dtype
+            elif isinstance(series.dtype, np.dtype) and series.dtype.kind in 'biufcmM':
+                values = series.values
+            else:
+                codes, uniques = pd.factorize(series)
+                values = codes
+                labels = uniques.array if pd.api.types.is_extension_array_dtype(uniques.dtype) else uniques.to_numpy()
+            values = np.ascontiguousarray(values)
+            if values.dtype.hasobject:
+                raise TypeError("Column {} of dtype {} cannot be shared".format(name, series.dtype))
+
+            block = SharedMemory(create=True, size=max(values.nbytes, 1))
+            blocks.append(block)
+            np.ndarray(values.shape, values.dtype, buffer=block.buf)[:] = values
+            columns.append((name, block.name, values.dtype.str, len(values), labels))
+    except:
+        for block in blocks:
+            block.close()
+            block.unlink()
+        raise
+    return blocks, (columns, frame.index)
+
+def _attachFrame(sharedData):
+    '''
+    Rebuilds the DataFrame described by '_shareFrame' over the shared memory
+    blocks, numeric and datetime columns are not copied
+
+    @param {tuple} sharedData - Description of the columns given by '_shareFrame'
+    @returns {DataFrame} - Shared data
+    '''
+
+    columns, index = sharedData
+    data = {}
+    for name, blockName, dtype, length, labels in columns:
+        block = SharedMemory(name=blockName)
+        _workerBlocks.append(block)
+
+        values = np.ndarray((length,), np.dtype(dtype), buffer=block.buf)
+        if isinstance(labels, pd.CategoricalDtype):
+            values = pd.Categorical.from_codes(values, dtype=labels)
+        elif labels is not None:
+            values = pd.api.extensions.take(labels, values, allow_fill=True)
+        data[name] = values
+    return pd.DataFrame(data, index=index, copy=False)
+
+def _initializeWorker(fullData, models, folds):
+    '''
+    Keeps the data, the models and the folds in the worker process, so
+    that tasks only carry their indices
+
+    @param {DataFrame|tuple} fullData - Processed data, or its description given by '_shareFrame'
+    @param {List<BacktestModel>} models - Models to backtest
+    @param {List<tuple>} folds - (trainRange, testRange) slices of rows for every fold
+    @returns {None}
+    '''
+
+    global _workerData, _workerModels, _workerFolds
+    _workerData = fullData if isinstance(fullData, pd.DataFrame) else _attachFrame(fullData)
+    _workerModels = models
+    _workerFolds = folds
+
+def _runTask(task):
+    '''
+    Fits one model on one fold and predicts its test data, the
+    predictions are None if the model fails
+
+    @param {tuple} task - (model index, fold index)
+    @returns {tuple} - (predictions or None, fit seconds)
+    '''
+
+    modelIndex, foldIndex = task
+    model = _workerModels[modelIndex]
+    trainRange, testRange = _workerFolds[foldIndex]
+    start = time.perf_counter()
+    try:
+        predicted = model.fitPredict(_workerData.iloc[trainRange], _workerData.iloc[testRange])
+    except:
+        logger.Logger.LOGERROR("backtest.py", "Backtest::_runTask",
+            "Unable to backtest {} on fold {}".format(model.name, foldIndex))
+        predicted = None
+    return predicted, time.perf_counter() - start
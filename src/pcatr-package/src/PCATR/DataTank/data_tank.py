@@ -14,11 +14,50 @@ __maintainer__ = 'Emad Bin Abid, Ateeb Ahmed, Syed Bilal Hoda'
 __status__ = 'dev'
 
 # Libs
+import os
+import re
+import glob
+import hashlib
+import functools
 import pandas as pd
-import datetime as dt
+import numpy as np
+from pandas.api.types import union_categoricals
+
+try:
+    import pyarrow.feather as feather
+except ImportError:
+    feather = None
 
 # Owned
 from PCATR.Logger import logger
+from PCATR.Logger import metrics
+
+# Bump whenever 'getProcessedData' changes its output, so cached frames are rebuilt
+PIPELINE_VERSION = 2
+
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+DATE_FORMAT = '%Y/%m/%d'
+DATETIME_FORMAT = '%Y/%m/%d %H:%M:%S'
+
+NANOSECONDS_PER_SECOND = 1000000000
+NANOSECONDS_PER_DAY = 86400 * NANOSECONDS_PER_SECOND
+MINUTES_PER_DAY = 1440
+
+# 'IntervalOfDay' buckets over the nanosecond of the day. A bucket starts at its edge and the
+# following bucket wins on a shared boundary; 'night' ends at 23:59:00 inclusive.
+INTERVAL_EDGES = np.array([7 * 3600, 12 * 3600, 16 * 3600, 19 * 3600, 23 * 3600 + 59 * 60], dtype='int64') \
+    * NANOSECONDS_PER_SECOND + np.array([0, 0, 0, 0, 1], dtype='int64')
+INTERVAL_LABELS = np.array([np.nan, 'morning', 'afternoon', 'evening', 'night', np.nan], dtype=object)
+
+# Parse schema of the raw dialer export used by 'DataTank.loadDataInChunks'.
+# 'epoch' columns are parsed once and stored as int64 nanoseconds since epoch.
+RAW_SCHEMA = {
+    'CallArrivalDate': 'category',
+    'CallArrivalTime': 'epoch',
+    'DialerStartTime': 'epoch',
+    'DialerCallArrivalTime': 'float64',
+    'DayOfWeek': pd.CategoricalDtype(WEEKDAYS)
+}
 
 class DataTank:
     '''
@@ -26,11 +65,36 @@ class DataTank:
     is used by other modules for prediction purposes.
     '''
 
-    def __init__(self):
+    def __init__(self, cacheDir=None):
+        '''
+        @param {string} cacheDir - Directory of the columnar cache of processed data, disabled if None
+        '''
+
         self.fullData = None
         self.trainData = None
         self.testData = None
+        self.cacheDir = cacheDir
 
+    @property
+    def fullData(self):
+        '''
+        The full data, with the rows of 'append' concatenated on first access after it
+
+        @returns {DataFrame} - Full data wrapped in pandas' DataFrame object
+        '''
+
+        if self._appendedData:
+            self._fullData = pd.concat([self._fullData] + self._appendedData, ignore_index=True)
+            self._appendedData = []
+        return self._fullData
+
+    @fullData.setter
+    def fullData(self, fullData):
+        self._fullData = fullData
+        self._appendedData = []
+        self._dayTails = None
+
+    @logger.timed()
     def loadData(self, filename):
         '''
         Loads the data in CSV file using Python's pandas module
@@ -45,73 +109,181 @@ class DataTank:
             logger.Logger.LOGERROR("data_tank.py", "DataTank::loadData", "Unable to load file")
         return self.fullData
 
+    @logger.timed()
+    def loadDataInChunks(self, filename, chunkSize=1000000, schema=None, startDate=None, endDate=None, lastWeeks=None):
+        '''
+        Streams the data in CSV file chunk by chunk, parsing each chunk with an 
+        explicit dtype schema and dropping the rows outside of the requested dates 
+        before the next chunk is read
+
+        @param {string} filename - Name of CSV file
+        @param {int} chunkSize - Number of rows parsed per chunk
+        @param {dict} schema - Column to dtype mapping, 'epoch' parses to int64 nanoseconds (defaults to RAW_SCHEMA)
+        @param {string|datetime} startDate - First 'CallArrivalDate' to keep (inclusive)
+        @param {string|datetime} endDate - Last 'CallArrivalDate' to keep (inclusive)
+        @param {int} lastWeeks - Keeps only the last given number of weeks of the file
+        @returns {DataFrame} - Loaded data wrapped in pandas' DataFrame object 
+        '''
+
+        try:
+            schema = RAW_SCHEMA if schema is None else schema
+            epochColumns = [column for column, dtype in schema.items() if dtype == 'epoch']
+            dtypes = {column: (str if dtype == 'epoch' else dtype) for column, dtype in schema.items()}
+            startDate = None if startDate is None else np.datetime64(pd.Timestamp(startDate), 'ns')
+            endDate = None if endDate is None else np.datetime64(pd.Timestamp(endDate), 'ns')
+            window = None if lastWeeks is None else np.timedelta64(7 * int(lastWeeks), 'D')
+
+            chunks = []
+            latestDate = None
+            for chunk in pd.read_csv(filename, dtype=dtypes, chunksize=chunkSize):
+                for column in epochColumns:
+                    chunk[column] = pd.to_datetime(chunk[column]).values.view('int64')
+
+                callDates = _callArrivalDates(chunk)
+                keep = np.ones(len(chunk), dtype=bool)
+                if startDate is not None:
+                    keep &= callDates >= startDate
+                if endDate is not None:
+                    keep &= callDates <= endDate
+                chunk = chunk[keep]
+                if len(chunk) == 0:
+                    continue
+                chunks.append(chunk)
+
+                # Keeps at most 'lastWeeks' of history in memory while streaming
+                if window is not None:
+                    chunkLatest = callDates[keep].max()
+                    if latestDate is None or chunkLatest > latestDate:
+                        latestDate = chunkLatest
+                        cutoff = latestDate - window
+                        chunks = [c[_callArrivalDates(c) > cutoff] for c in chunks]
+                        chunks = [c for c in chunks if len(c) > 0]
+
+            # Aligns the chunk-local categories so that concatenation keeps them categorical. Only
+            # inferred categories are merged, explicit categories and their order are kept as given
+            inferred = [column for column, dtype in schema.items() if isinstance(dtype, str) and dtype == 'category']
+            for column in inferred:
+                if chunks:
+                    categories = union_categoricals([c[column] for c in chunks], sort_categories=True).categories
+                    for c in chunks:
+                        c[column] = c[column].cat.set_categories(categories)
+
+            self.fullData = pd.concat(chunks, ignore_index=True) if chunks else None
+            for column in inferred:
+                if chunks:
+                    self.fullData[column] = self.fullData[column].cat.remove_unused_categories()
+        except FileNotFoundError as e:
+            logger.Logger.LOGERROR("data_tank.py", "DataTank::loadDataInChunks", "Unable to load file")
+        return self.fullData
+
+    def loadProcessedData(self, filename, **loadOptions):
+        '''
+        Loads the processed data of CSV file from the columnar cache, or loads and 
+        processes the CSV file and stores the result in the cache. Entries are keyed 
+        by the content hash of the file, the load options and PIPELINE_VERSION; 
+        entries of the same file, by absolute path, and the same load options under 
+        any other key are removed as stale, so every set of options keeps its entry
+
+        @param {string} filename - Name of CSV file
+        @param {dict} loadOptions - Options for 'loadDataInChunks', 'loadData' is used if none are given
+        @returns {DataFrame} - Processed data wrapped in pandas' DataFrame object 
+        '''
+
+        if self.cacheDir is None or feather is None:
+            if self.cacheDir is not None:
+                logger.Logger.LOGINFO("data_tank.py", "DataTank::loadProcessedData", "pyarrow is not installed, caching is disabled")
+            self.loadDataInChunks(filename, **loadOptions) if loadOptions else self.loadData(filename)
+            return self.getProcessedData()
+
+        try:
+            # Files of the same name in other directories, or loaded with other options, get another prefix
+            sourceHash = hashlib.sha1(os.path.realpath(filename).encode()).hexdigest()[:12]
+            optionsHash = hashlib.sha1(repr(sorted(loadOptions.items())).encode()).hexdigest()[:8]
+            cachePrefix = os.path.join(self.cacheDir, '{}-{}-{}'.format(os.path.splitext(os.path.basename(filename))[0],
+                sourceHash, optionsHash))
+            cachePath = '{}-{}.feather'.format(cachePrefix, _cacheKey(filename, loadOptions))
+        except FileNotFoundError as e:
+            logger.Logger.LOGERROR("data_tank.py", "DataTank::loadProcessedData", "Unable to load file")
+            return self.fullData
+
+        if os.path.exists(cachePath):
+            try:
+                # Uncompressed feather files are memory-mapped, columns without nulls are not copied
+                self.fullData = feather.read_table(cachePath, memory_map=True).to_pandas(split_blocks=True)
+                if 'IntervalOfDay' in self.fullData:
+                    # Arrow hands back nulls of text columns as None, the pipeline produces NaN
+                    self.fullData['IntervalOfDay'] = self.fullData['IntervalOfDay'].where(self.fullData['IntervalOfDay'].notna(), np.nan)
+                logger.Logger.LOGDEBUG("data_tank.py", "DataTank::loadProcessedData", "Cache hit %s", cachePath)
+                metrics.observeCacheRequest(True)
+                return self.fullData
+            except Exception as e:
+                logger.Logger.LOGERROR("data_tank.py", "DataTank::loadProcessedData", "Unable to read cache, rebuilding it", e)
+
+        metrics.observeCacheRequest(False)
+        self.loadDataInChunks(filename, **loadOptions) if loadOptions else self.loadData(filename)
+        self.getProcessedData()
+
+        try:
+            os.makedirs(self.cacheDir, exist_ok=True)
+            # Only entries of this very file and options, under another key, are stale
+            stalePattern = re.compile(re.escape(os.path.basename(cachePrefix)) + r'-[0-9a-f]{20}\.feather')
+            for stalePath in glob.glob(glob.escape(cachePrefix) + '-*.feather'):
+                if stalePattern.fullmatch(os.path.basename(stalePath)):
+                    os.remove(stalePath)
+
+            temporaryPath = '{}.{}.tmp'.format(cachePath, os.getpid())
+            feather.write_feather(self.fullData, temporaryPath, compression='uncompressed')
+            os.replace(temporaryPath, cachePath)
+        except Exception as e:
+            logger.Logger.LOGERROR("data_tank.py", "DataTank::loadProcessedData", "Unable to write cache", e)
+        return self.fullData
+
+    @logger.timed()
     def getProcessedData(self):
         '''
-        Processes the data and adds a new column 'CallDifferenceInterval' to DataFrame object 
+        Processes the data and adds a new column 'CallDifferenceInterval' to DataFrame object.
+        Every timestamp is parsed once and the derived columns are computed with integer 
+        arithmetic on nanoseconds, so no per-row string splitting takes place
 
         @returns {DataFrame} - Processed data wrapped in pandas' DataFrame object 
         '''
 
         try:
-            # Introducing new column 'CallDifferenceInterval' for analysis
-            self.fullData['CallDifferenceInterval'] = self.fullData.groupby(['CallArrivalDate'])['DialerCallArrivalTime'] \
-                .diff().fillna(self.fullData['DialerCallArrivalTime'])
-
-            # Splitting time entry from datetime into a new column 'TimeOfCall'
-            datetimeObj = self.fullData["CallArrivalTime"].str.split(" ", n=1, expand=True)
-            self.fullData["TimeOfCall"] = datetimeObj[1]
-            
-            # Generating new columns 'Hour', 'Minutes', 'Seconds' for hour, minutes and seconds entries respectively
-            self.fullData['Hour'] = self.fullData.TimeOfCall.str[:2]
-            self.fullData['Minutes'] = self.fullData.TimeOfCall.str[3:5]
-            self.fullData['Seconds'] = self.fullData.TimeOfCall.str[6:]
-            # self.fullData['Hour'] = pd.to_numeric(self.fullData['Hour'])
-            # self.fullData['Minutes'] = pd.to_numeric(self.fullData['Minutes'])
-            # self.fullData['Seconds'] = pd.to_numeric(self.fullData['Seconds'])
-
-            # Generating new columns 'Year', 'Month', 'DayDate' for year, month and day entries respectively
-            dateObj = self.fullData["CallArrivalDate"].str.split('/', n=2, expand=True)   
-            self.fullData['Year'] = dateObj[0]
-            self.fullData['Month'] = dateObj[1]
-            self.fullData['DayDate'] = dateObj[2]
-            self.fullData['Year'] = pd.to_numeric(self.fullData['Year'])
-            self.fullData['Month'] = pd.to_numeric(self.fullData['Month'])
-            self.fullData['DayDate'] = pd.to_numeric(self.fullData['DayDate'])
-
-            # Generating new column similar to 'DialerStartTime' but without the 'Seconds' entry
-            self.fullData['DialerStartTimeMinusSeconds'] = self.fullData['CallArrivalDate'] + ' ' + self.fullData.TimeOfCall.str[:5]
-
-            # Converting date and time dependent columns to DateTime objects
-            self.fullData['CallArrivalTime'] = pd.to_datetime(self.fullData['CallArrivalTime'])
-            self.fullData['CallArrivalDate'] = pd.to_datetime(self.fullData['CallArrivalDate'])
-            self.fullData['DialerStartTime'] = pd.to_datetime(self.fullData['DialerStartTime'])
-            
-            # Introducing new columns for 'IntervalOfDay' day intervals - morning, afternoon, evening, night
-            morning = (self.fullData['CallArrivalTime'].dt.time \
-                >= dt.time(hour=7,minute=0))&(self.fullData['CallArrivalTime'].dt.time \
-                    <= dt.time(hour=12,minute=0))
-
-            afternoon = (self.fullData['CallArrivalTime'].dt.time \
-                >= dt.time(hour=12,minute=0))&(self.fullData['CallArrivalTime'].dt.time \
-                    <= dt.time(hour=16,minute=0))        
-            
-            evening = (self.fullData['CallArrivalTime'].dt.time \
-                >= dt.time(hour=16,minute=0))&(self.fullData['CallArrivalTime'].dt.time \
-                    <= dt.time(hour=19,minute=0))
-            
-            night = (self.fullData['CallArrivalTime'].dt.time \
-                >= dt.time(hour=19,minute=0))&(self.fullData['CallArrivalTime'].dt.time \
-                    <= dt.time(hour=23,minute=59))
-
-            self.fullData.loc[morning,'IntervalOfDay'] = 'morning'
-            self.fullData.loc[afternoon,'IntervalOfDay'] = 'afternoon'
-            self.fullData.loc[evening,'IntervalOfDay'] = 'evening'
-            self.fullData.loc[night,'IntervalOfDay'] = 'night'
-            
+            _processFrame(self.fullData)
         except:
             logger.Logger.LOGERROR("data_tank.py", "DataTank::getProcessedData", "Unable to process data")
         return self.fullData
 
+    @logger.timed()
+    def append(self, newRows):
+        '''
+        Processes newly arrived calls and appends them to the processed full data. 
+        Only the new rows are processed; 'CallDifferenceInterval' of the first new 
+        call of a day continues from the last call of that day kept in the per-day 
+        tail state, so the cost does not grow with the history
+
+        @param {DataFrame} newRows - Raw or typed calls, in arrival order, that follow 'fullData'
+        @returns {DataFrame} - The processed new rows
+        '''
+
+        try:
+            if self._dayTails is None:
+                self._dayTails = {}
+                if self._fullData is not None:
+                    self._dayTails = _dayTails(self._fullData)
+
+            processedRows = _processFrame(newRows.copy(deep=False).reset_index(drop=True), self._dayTails)
+            self._dayTails.update(_dayTails(processedRows))
+
+            if self._fullData is None:
+                self._fullData = processedRows
+            else:
+                self._appendedData.append(processedRows)
+            return processedRows
+        except:
+            logger.Logger.LOGERROR("data_tank.py", "DataTank::append", "Unable to append data")
+            return None
+
     def trainTestSplit(self, splitRatio=0.66):
         '''
         Splits the data in DataFrame object into train and test
@@ -126,4 +298,287 @@ class DataTank:
             self.testData = self.fullData[_tSize:]
         except:
             logger.Logger.LOGERROR("data_tank.py", "DataTank::trainTestSplit", "Unable to create train-test split")
-        return self.trainData, self.testData
\ No newline at end of file
+        return self.trainData, self.testData
+
+    def trainTestSplitByTime(self, splitTime, endTime=None):
+        '''
+        Splits the data in DataFrame object into train and test at a timestamp. 
+        The data is expected in arrival order and both splits are views of it
+
+        @param {string|datetime} splitTime - First 'CallArrivalTime' of test data
+        @param {string|datetime} endTime - 'CallArrivalTime' at which test data ends (exclusive), end of data if None
+        @returns {DataFrame} - DataFrame objects of train and test split 
+        '''
+
+        try:
+            trainRange, testRange = self.timeRanges([None, splitTime, endTime])
+            self.trainData = self.fullData.iloc[trainRange]
+            self.testData = self.fullData.iloc[testRange]
+        except:
+            logger.Logger.LOGERROR("data_tank.py", "DataTank::trainTestSplitByTime", "Unable to create train-test split")
+        return self.trainData, self.testData
+
+    def trainTestSplitByWeeks(self, numTrainWeeks, numTestWeeks=1):
+        '''
+        Splits the data in DataFrame object into the first 'numTrainWeeks' weeks 
+        for train and the following 'numTestWeeks' weeks for test. Both splits are 
+        views of the data
+
+        @param {int} numTrainWeeks - Number of weeks in train data
+        @param {int} numTestWeeks - Number of weeks in test data
+        @returns {DataFrame} - DataFrame objects of train and test split 
+        '''
+
+        try:
+            trainRange, testRange = self.timeRanges(self.weekBoundaries(numTrainWeeks, numTestWeeks))
+            self.trainData = self.fullData.iloc[trainRange]
+            self.testData = self.fullData.iloc[testRange]
+        except:
+            logger.Logger.LOGERROR("data_tank.py", "DataTank::trainTestSplitByWeeks", "Unable to create train-test split")
+        return self.trainData, self.testData
+
+    def rollingOriginSplits(self, numTrainWeeks, numTestWeeks=1, stepWeeks=1, expanding=True, maxFolds=None):
+        '''
+        Gives the rolling-origin folds of the data as row ranges, so that any number 
+        of folds can be evaluated with 'fullData.iloc[trainRange]' views and no copies. 
+        Every fold moves the origin forward by 'stepWeeks' until the test weeks run 
+        past the end of the data
+
+        @param {int} numTrainWeeks - Number of weeks in train data of the first fold
+        @param {int} numTestWeeks - Number of weeks in test data of every fold
+        @param {int} stepWeeks - Number of weeks the origin moves between folds
+        @param {bool} expanding - Keeps train data starting at the first week, otherwise the train window slides
+        @param {int} maxFolds - Maximum number of folds, all folds if None
+        @returns {List<tuple>} - (trainRange, testRange) slices of rows for every fold
+        '''
+
+        try:
+            lastCallArrivalDate = _callArrivalDates(self.fullData)[-1]
+            folds = []
+            while maxFolds is None or len(folds) < maxFolds:
+                offsetWeeks = len(folds) * stepWeeks
+                boundaries = self.weekBoundaries(numTrainWeeks + offsetWeeks, numTestWeeks)
+                if boundaries[-1] - np.timedelta64(1, 'D') > lastCallArrivalDate:
+                    break
+                if not expanding:
+                    boundaries[0] = boundaries[0] + np.timedelta64(7 * offsetWeeks, 'D')
+                folds.append(self.timeRanges(boundaries))
+            return folds
+        except:
+            logger.Logger.LOGERROR("data_tank.py", "DataTank::rollingOriginSplits", "Unable to create rolling-origin splits")
+            return None
+
+    def weekBoundaries(self, numTrainWeeks, numTestWeeks=1):
+        '''
+        Gives the start of train data, the start of test data and the end of test 
+        data, counting whole weeks from the first 'CallArrivalDate'
+
+        @param {int} numTrainWeeks - Number of weeks in train data
+        @param {int} numTestWeeks - Number of weeks in test data
+        @returns {List<datetime64>} - [trainStart, testStart, testEnd]
+        '''
+
+        firstCallArrivalDate = _callArrivalDates(self.fullData.iloc[:1])[0]
+        week = np.timedelta64(7, 'D')
+        return [firstCallArrivalDate, 
+            firstCallArrivalDate + int(numTrainWeeks) * week, 
+            firstCallArrivalDate + (int(numTrainWeeks) + int(numTestWeeks)) * week]
+
+    def timeRanges(self, boundaries):
+        '''
+        Converts increasing timestamps into the row ranges between them with a 
+        binary search over 'CallArrivalTime', which is expected in arrival order
+
+        @param {List<datetime>} boundaries - Timestamps, None stands for the start or the end of the data
+        @returns {List<slice>} - Row ranges between consecutive boundaries
+        '''
+
+        callArrivalTime = _asDatetime(self.fullData['CallArrivalTime']).view('int64')
+        rows = [(0 if i == 0 else len(callArrivalTime)) if boundary is None else 
+            int(np.searchsorted(callArrivalTime, pd.Timestamp(boundary).value, side='left'))
+            for i, boundary in enumerate(boundaries)]
+        return [slice(start, stop) for start, stop in zip(rows[:-1], rows[1:])]
+
+def _processFrame(data, dayTails=None):
+    '''
+    Adds the derived columns of 'DataTank.getProcessedData' to raw or typed 
+    dialer data in place. Every timestamp is parsed once and the derived columns 
+    are computed with integer arithmetic on nanoseconds
+
+    @param {DataFrame} data - Raw or typed dialer data
+    @param {dict} dayTails - Last 'DialerCallArrivalTime' of already processed days, keyed by epoch nanoseconds of the date
+    @returns {DataFrame} - Processed data
+    '''
+
+    # Parsing every timestamp once, everything below is derived from nanoseconds of the day
+    callArrivalTime = _asDatetime(data['CallArrivalTime'])
+    dateCodes, dateText, callArrivalDate = _factorizeDates(data['CallArrivalDate'])
+    dialerStartTime = _asDatetime(data['DialerStartTime'], repeated=True)
+
+    # Introducing new column 'CallDifferenceInterval' for analysis
+    callDifferenceInterval = data.groupby(['CallArrivalDate'], observed=True, sort=False)['DialerCallArrivalTime'].diff()
+    if dayTails:
+        # The first call of a day already seen continues from that day's last call
+        dialerCallArrivalTime = data['DialerCallArrivalTime'].values
+        previousCall = np.array([dayTails.get(date, np.nan) for date in callArrivalDate.view('int64')])[dateCodes]
+        continued = ~pd.Series(dateCodes).duplicated().values & ~np.isnan(previousCall)
+        callDifferenceInterval[continued] = dialerCallArrivalTime[continued] - previousCall[continued]
+    data['CallDifferenceInterval'] = callDifferenceInterval.fillna(data['DialerCallArrivalTime'])
+
+    nanosecondOfDay = callArrivalTime.view('int64') % NANOSECONDS_PER_DAY
+    secondOfDay = nanosecondOfDay // NANOSECONDS_PER_SECOND
+    clockText = _clockText()
+
+    # Generating new columns 'TimeOfCall', 'Hour', 'Minutes', 'Seconds' from the second of the day
+    data['TimeOfCall'] = clockText['second'][secondOfDay]
+    data['Hour'] = clockText['twoDigits'][secondOfDay // 3600]
+    data['Minutes'] = clockText['twoDigits'][(secondOfDay // 60) % 60]
+    data['Seconds'] = clockText['twoDigits'][secondOfDay % 60]
+
+    # Generating new columns 'Year', 'Month', 'DayDate' from the unique call dates only
+    uniqueMonths = callArrivalDate.astype('datetime64[M]')
+    data['Year'] = (callArrivalDate.astype('datetime64[Y]').astype('int64') + 1970)[dateCodes]
+    data['Month'] = (uniqueMonths.astype('int64') % 12 + 1)[dateCodes]
+    data['DayDate'] = ((callArrivalDate - uniqueMonths).astype('timedelta64[D]').astype('int64') + 1)[dateCodes]
+
+    # Generating new column similar to 'DialerStartTime' but without the 'Seconds' entry,
+    # the text is only built once for every distinct (date, minute) pair
+    minuteKey = dateCodes.astype('int64') * MINUTES_PER_DAY + secondOfDay // 60
+    minuteCodes, uniqueMinuteKeys = pd.factorize(minuteKey)
+    minuteText = pd.Series(dateText[uniqueMinuteKeys // MINUTES_PER_DAY]).str.cat(
+        clockText['minute'][uniqueMinuteKeys % MINUTES_PER_DAY], sep=' ').values
+    data['DialerStartTimeMinusSeconds'] = minuteText[minuteCodes]
+
+    # Converting date and time dependent columns to DateTime objects
+    data['CallArrivalTime'] = callArrivalTime
+    data['CallArrivalDate'] = callArrivalDate[dateCodes]
+    data['DialerStartTime'] = dialerStartTime
+
+    # Introducing new columns for 'IntervalOfDay' day intervals - morning, afternoon, evening, night
+    data['IntervalOfDay'] = INTERVAL_LABELS[np.searchsorted(INTERVAL_EDGES, nanosecondOfDay, side='right')]
+    return data
+
+def _dayTails(data):
+    '''
+    Gives the last 'DialerCallArrivalTime' of every day in the data
+
+    @param {DataFrame} data - Raw, typed or processed dialer data
+    @returns {dict} - Last 'DialerCallArrivalTime' keyed by epoch nanoseconds of 'CallArrivalDate'
+    '''
+
+    lastRows = ~data['CallArrivalDate'].duplicated(keep='last').values
+    dates = _callArrivalDates(data[lastRows]).view('int64')
+    return dict(zip(dates.tolist(), data['DialerCallArrivalTime'].values[lastRows].tolist()))
+
+def _callArrivalDates(frame):
+    '''
+    Gives the 'CallArrivalDate' of every row as datetime64 values, parsing 
+    only the unique dates when the column is categorical
+
+    @param {DataFrame} frame - Raw or typed dialer data
+    @returns {ndarray} - datetime64[ns] values of 'CallArrivalDate'
+    '''
+
+    column = frame['CallArrivalDate']
+    if pd.api.types.is_datetime64_dtype(column.dtype):
+        return column.values
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        dates = pd.to_datetime(column.cat.categories, format=DATE_FORMAT).values
+        return dates[column.cat.codes.values]
+    return pd.to_datetime(column, format=DATE_FORMAT).values
+
+def toEpochNanoseconds(timestamps):
+    '''
+    Converts timestamps of any supported kind into epoch nanoseconds without 
+    building a DataFrame. Integers are taken as epoch nanoseconds already
+
+    @param {datetime|string|int|ndarray|Series} timestamps - One timestamp or many of them
+    @returns {int|ndarray} - Epoch nanoseconds, an int64 array for many timestamps
+    '''
+
+    if isinstance(timestamps, (int, np.integer)):
+        return int(timestamps)
+    if isinstance(timestamps, pd.Series):
+        return _asDatetime(timestamps).view('int64')
+    if isinstance(timestamps, (np.ndarray, list, tuple, pd.Index)):
+        values = np.asarray(timestamps)
+        if pd.api.types.is_integer_dtype(values.dtype):
+            return values.astype('int64', copy=False)
+        if pd.api.types.is_datetime64_dtype(values.dtype):
+            return values.astype('datetime64[ns]', copy=False).view('int64')
+        return pd.to_datetime(values).values.view('int64')
+    return pd.Timestamp(timestamps).value
+
+def _cacheKey(filename, loadOptions):
+    '''
+    Computes the cache key of a processed CSV file from its content, 
+    the options it is loaded with and PIPELINE_VERSION
+
+    @param {string} filename - Name of CSV file
+    @param {dict} loadOptions - Options for 'loadDataInChunks'
+    @returns {string} - Hex digest identifying the processed data
+    '''
+
+    digest = hashlib.sha1()
+    with open(filename, 'rb') as file:
+        for block in iter(functools.partial(file.read, 1 << 20), b''):
+            digest.update(block)
+    digest.update(repr(sorted(loadOptions.items())).encode())
+    digest.update(str(PIPELINE_VERSION).encode())
+    return digest.hexdigest()[:20]
+
+def _asDatetime(column, repeated=False):
+    '''
+    Parses a raw text, categorical or int64 epoch column to datetime64 values
+
+    @param {Series} column - Column holding timestamps
+    @param {bool} repeated - Parses only the distinct values, for columns with few of them
+    @returns {ndarray} - datetime64[ns] values of the column
+    '''
+
+    if pd.api.types.is_integer_dtype(column.dtype):
+        return column.values.view('datetime64[ns]')
+    if pd.api.types.is_datetime64_dtype(column.dtype):
+        return column.values
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return pd.to_datetime(column.cat.categories).values[column.cat.codes.values]
+    if repeated:
+        codes, uniques = pd.factorize(column.values)
+        return pd.to_datetime(uniques).values[codes]
+    return pd.to_datetime(column).values
+
+def _factorizeDates(column):
+    '''
+    Splits the 'CallArrivalDate' column into per-row codes and the text 
+    and datetime64 value of every distinct date
+
+    @param {Series} column - Raw text, categorical or int64 epoch dates
+    @returns {tuple} - (codes, text of unique dates, datetime64 of unique dates)
+    '''
+
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        codes, uniques = column.cat.codes.values, column.cat.categories.values
+    else:
+        codes, uniques = pd.factorize(column.values)
+
+    if pd.api.types.is_integer_dtype(uniques.dtype) or pd.api.types.is_datetime64_dtype(uniques.dtype):
+        dates = uniques.view('datetime64[ns]')
+        text = pd.DatetimeIndex(dates).strftime(DATE_FORMAT).values
+    else:
+        text = np.asarray(uniques, dtype=object)
+        dates = pd.to_datetime(text).values
+    return codes, text, dates
+
+@functools.lru_cache(maxsize=None)
+def _clockText():
+    '''
+    Builds the lookup tables of zero-padded clock text used to render 
+    'TimeOfCall', 'Hour', 'Minutes', 'Seconds' without string splitting
+
+    @returns {dict} - Object arrays indexed by second of day, minute of day and 0-59
+    '''
+
+    twoDigits = np.array(['{:02d}'.format(i) for i in range(60)], dtype=object)
+    minute = np.array(['{:02d}:{:02d}'.format(i // 60, i % 60) for i in range(MINUTES_PER_DAY)], dtype=object)
+    second = np.array(['{}:{:02d}'.format(minute[i // 60], i % 60) for i in range(MINUTES_PER_DAY * 60)], dtype=object)
+    return {'twoDigits': twoDigits, 'minute': minute, 'second': second}
@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+This file implements the 'SyntheticCallLog' class to generate
+dialer exports in the raw layout read by 'DataTank.loadData'.
+Calls arrive as a non-homogeneous Poisson process whose rate
+follows the time of day and the day of the week, so benchmarks
+and examples do not depend on private call logs.
+"""
+
+__author__ = 'Emad Bin Abid, Ateeb Ahmed, Syed Bilal Hoda'
+__copyright__ = 'Copyright 2019, Prediction of Call Arrival Times and Rates'
+__credits__ = ['Afiniti Software Solutions (Pvt.) Ltd.']
+__version__ = '0.0.1'
+__maintainer__ = 'Emad Bin Abid, Ateeb Ahmed, Syed Bilal Hoda'
+__status__ = 'dev'
+
+# Libs
+import numpy as np
+import pandas as pd
+
+# Owned
+from PCATR.DataTank.data_tank import WEEKDAYS, MINUTES_PER_DAY
+
+# Relative volume of calls of every weekday, Monday first
+WEEKDAY_VOLUME = np.array([1.0, 0.95, 0.95, 1.0, 1.1, 0.8, 0.7])
+
+# Times of day in 'HH:MM:SS' for every second of a day
+_TIMES_OF_DAY = pd.timedelta_range(0, periods=86400, freq='1s').astype('int64') // 1000000000
+_TIMES_OF_DAY = np.array(['{:02d}:{:02d}:{:02d}'.format(second // 3600, second // 60 % 60, second % 60)
+    for second in _TIMES_OF_DAY], dtype=object)
+
+class SyntheticCallLog:
+    '''
+    This class generates dialer exports with the columns of the raw
+    CSV files: 'CallArrivalDate', 'DialerCallArrivalTime', 'CallArrivalTime',
+    'DayOfWeek' and 'DialerStartTime'. The number of calls of every day is
+    Poisson and the calls of a day are spread by its rate over the minutes
+    of the day: two peaks on weekdays, one broad peak on weekends and none
+    before the dialer starts.
+
+    @param {int} callsPerDay - Mean number of calls per day over a week
+    @param {string} startDate - Date of the first day, 'YYYY/MM/DD'
+    @param {int} dialerStartHour - Hour of the day the dialer starts, no calls arrive before it
+    @param {int} seed - Seed of the random generator
+    '''
+
+    def __init__(self, callsPerDay=3000, startDate='2019/06/01', dialerStartHour=6, seed=0):
+        self.callsPerDay = callsPerDay
+        self.startDate = np.datetime64(pd.Timestamp(startDate).date(), 'D')
+        self.dialerStartHour = dialerStartHour
+        self.seed = seed
+
+    def rate(self):
+        '''
+        Gives the expected number of calls in every minute of the week
+
+        @returns {ndarray} - Rates of shape (7, 1440), Monday first
+        '''
+
+        hours = (np.arange(MINUTES_PER_DAY) + 0.5) / 60
+        weekdayShape = 0.3 + np.exp(-0.5 * ((hours - 11) / 1.5) ** 2) + 0.8 * np.exp(-0.5 * ((hours - 20) / 2) ** 2)
+        weekendShape = 0.3 + np.exp(-0.5 * ((hours - 14) / 3) ** 2)
+        shapes = np.vstack([weekdayShape] * 5 + [weekendShape] * 2)
+        shapes[:, :self.dialerStartHour * 60] = 0
+
+        shapes /= shapes.sum(axis=1, keepdims=True)
+        volume = WEEKDAY_VOLUME * 7 / WEEKDAY_VOLUME.sum()
+        return shapes * (self.callsPerDay * volume)[:, None]
+
+    def generate(self, numRows):
+        '''
+        Generates a dialer export with exactly 'numRows' calls
+
+        @param {int} numRows - Number of calls
+        @returns {DataFrame} - Raw data in the layout of the dialer CSV export
+        '''
+
+        return pd.concat(list(self.chunks(numRows, chunkSize=numRows)), ignore_index=True)
+
+    def chunks(self, numRows, chunkSize=1000000):
+        '''
+        Generates a dialer export with exactly 'numRows' calls in chunks of whole
+        days of about 'chunkSize' calls, so exports larger than memory can be written
+
+        @param {int} numRows - Number of calls
+        @param {int} chunkSize - Approximate number of calls per chunk
+        @returns {generator<DataFrame>} - Consecutive chunks of raw data
+        '''
+
+        rng = np.random.default_rng(self.seed)
+        rate = self.rate()
+        callsPerDay = self._callsPerDay(rng, rate.sum(axis=1), numRows)
+
+        # Inverse of the cumulative rate of every weekday, stacked so that weekday k spans [k, k + 1]
+        cumulativeRate = np.cumsum(np.hstack([np.zeros((7, 1)), rate]), axis=1)
+        cumulativeRate = (cumulativeRate / cumulativeRate[:, -1:] + np.arange(7)[:, None]).ravel()
+        secondsOfDay = np.tile(np.arange(MINUTES_PER_DAY + 1) * 60.0, 7)
+
+        daysPerChunk = max(1, int(chunkSize // max(self.callsPerDay, 1)))
+        for firstDay in range(0, len(callsPerDay), daysPerChunk):
+            days = np.arange(firstDay, min(firstDay + daysPerChunk, len(callsPerDay)))
+            day = np.repeat(days, callsPerDay[days])
+            weekday = self._weekday(day)
+
+            seconds = np.interp(weekday + rng.random(len(day)), cumulativeRate, secondsOfDay)
+            seconds = np.minimum(seconds, 86400 - 1e-6)
+            # Days are in order, so one sort orders the calls of every day
+            seconds = np.sort(day * 86400.0 + seconds) - day * 86400.0
+            yield self._frame(day, weekday, seconds)
+
+    def toCsv(self, filename, numRows, chunkSize=1000000):
+        '''
+        Writes a dialer export with exactly 'numRows' calls chunk by chunk,
+        numbering the rows from 1 like the dialer CSV export
+
+        @param {string} filename - Name of CSV file
+        @param {int} numRows - Number of calls
+        @param {int} chunkSize - Approximate number of calls generated and written at once
+        @returns {None}
+        '''
+
+        firstRow = 1
+        for i, chunk in enumerate(self.chunks(numRows, chunkSize)):
+            chunk.index = pd.RangeIndex(firstRow, firstRow + len(chunk))
+            chunk.to_csv(filename, mode='w' if i == 0 else 'a', header=i == 0)
+            firstRow += len(chunk)
+
+    def _callsPerDay(self, rng, dailyRate, numRows):
+        '''
+        Draws the Poisson number of calls of consecutive days until there are
+        'numRows' calls, the last day is cut short
+
+        @param {Generator} rng - Random generator
+        @param {ndarray} dailyRate - Expected number of calls of every weekday
+        @param {int} numRows - Number of calls
+        @returns {ndarray} - Number of calls of every day
+        '''
+
+        counts = []
+        total = 0
+        while total < numRows:
+            numDays = int(np.ceil(1.1 * (numRows - total) / max(self.callsPerDay, 1))) + 1
+            days = np.arange(len(counts), len(counts) + numDays)
+            counts.extend(rng.poisson(dailyRate[self._weekday(days)]))
+            total = int(np.sum(counts))
+
+        counts = np.array(counts, dtype='int64')
+        lastDay = int(np.searchsorted(np.cumsum(counts), numRows))
+        counts = counts[:lastDay + 1]
+        counts[-1] -= counts.sum() - numRows
+        return counts
+
+    def _weekday(self, days):
+        '''
+        Gives the weekday of days counted from the start date, 0 for Monday
+
+        @param {ndarray} days - Days since the start date
+        @returns {ndarray} - Weekday of every day
+        '''
+
+        return (days + (self.startDate.astype('int64') + 3)) % 7
+
+    def _frame(self, day, weekday, seconds):
+        '''
+        Formats calls as rows of the dialer CSV export
+
+        @param {ndarray} day - Day of every call since the start date
+        @param {ndarray} weekday - Weekday of every call, 0 for Monday
+        @param {ndarray} seconds - Second of the day of every call
+        @returns {DataFrame} - Raw data of the calls
+        '''
+
+        # Strings of every distinct day are built once and looked up per call
+        days, dayCodes = np.unique(day, return_inverse=True)
+        dates = pd.DatetimeIndex(self.startDate + days.astype('timedelta64[D]'))
+        dateText = np.asarray(dates.strftime('%Y/%m/%d'), dtype=object)
+        dialerStartText = dateText + ' {:02d}:00:00'.format(self.dialerStartHour)
+
+        return pd.DataFrame({
+            'CallArrivalDate': dateText[dayCodes],
+            'DialerCallArrivalTime': seconds - self.dialerStartHour * 3600,
+            'CallArrivalTime': dateText[dayCodes] + ' ' + _TIMES_OF_DAY[seconds.astype('int64')],
+            'DayOfWeek': np.array(WEEKDAYS, dtype=object)[weekday],
+            'DialerStartTime': dialerStartText[dayCodes]
+        })
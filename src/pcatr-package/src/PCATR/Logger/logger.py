@@ -3,64 +3,325 @@
 
 """
 This file implements the 'Logger' module to deal with efficient
-logging mechanisms in PCATR where necessary.
+logging mechanisms in PCATR where necessary. Messages go through
+the 'PCATR' logger of Python's logging module, so they carry levels
+and timestamps, are formatted only when their level is enabled and
+can be written as text or as JSON lines.
 """
 
 __author__ = 'Emad Bin Abid, Ateeb Ahmed, Syed Bilal Hoda'
 __copyright__ = 'Copyright 2019, Prediction of Call Arrival Times and Rates'
 __credits__ = ['Afiniti Software Solutions (Pvt.) Ltd.']
-__version__ = '0.0.1'
+__version__ = '0.0.2'
 __maintainer__ = 'Emad Bin Abid, Ateeb Ahmed, Syed Bilal Hoda'
 __status__ = 'dev'
 
+# Libs
+import os
+import sys
+import json
+import time
+import inspect
+import logging
+import functools
+import tracemalloc
+
+# Level of the 'PCATR' logger until 'Logger.configure' is called
+DEFAULT_LEVEL = os.environ.get('PCATR_LOG_LEVEL', 'INFO').upper()
+
+# Prefix of every level in text output
+LEVEL_PREFIXES = {
+    logging.DEBUG: '[+]DEBUG:',
+    logging.INFO: '[!]INFO:',
+    logging.WARNING: '[!]WARNING:',
+    logging.ERROR: '[-]ERROR:',
+    logging.CRITICAL: '[-]CRITICAL:'
+}
+
+_logger = logging.getLogger('PCATR')
+_timingLogger = logging.getLogger('PCATR.timing')
+
+class TextFormatter(logging.Formatter):
+    '''
+    This class formats records as tab separated text with a timestamp,
+    the level, the file and the function they were logged from
+    '''
+
+    def format(self, record):
+        text = "{} {}\t {}\t {}\t {}".format(self.formatTime(record), LEVEL_PREFIXES.get(record.levelno, record.levelname),
+            getattr(record, 'pcatrFile', record.filename), getattr(record, 'pcatrFunction', record.funcName), record.getMessage())
+        if record.exc_info:
+            text += '\n' + self.formatException(record.exc_info)
+        return text
+
+class JsonFormatter(logging.Formatter):
+    '''
+    This class formats records as one JSON object per line, with
+    the measurements of 'timed' under 'timing'
+    '''
+
+    def format(self, record):
+        fields = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'file': getattr(record, 'pcatrFile', record.filename),
+            'function': getattr(record, 'pcatrFunction', record.funcName),
+            'message': record.getMessage()
+        }
+        if hasattr(record, 'timing'):
+            fields['timing'] = record.timing
+        if record.exc_info:
+            fields['exception'] = self.formatException(record.exc_info)
+        return json.dumps(fields, default=str)
+
 class Logger:
     '''
     This module implements function  to deal with efficient
     logging mechanisms in PCATR where necessary.
     '''
 
+    # Measures peak memory in 'timed' with tracemalloc, set by 'configure'
+    traceMemory = False
+
     def __init__(self):
         pass
 
+    @staticmethod
+    def configure(level=None, jsonLines=False, stream=None, filename=None, traceMemory=False):
+        '''
+        Replaces the handlers of the 'PCATR' logger. Messages below 'level'
+        are dropped before they are formatted
+
+        @param {string|int} level - Lowest level to log, e.g. 'DEBUG' to log the measurements of 'timed', unchanged if None
+        @param {boolean} jsonLines - Writes one JSON object per line instead of text
+        @param {stream} stream - Stream to write to, standard output if neither 'stream' nor 'filename' is given
+        @param {string} filename - File to append to
+        @param {boolean} traceMemory - Measures peak memory in 'timed', which slows allocations down
+        @returns {None}
+        '''
+
+        if level is not None:
+            _logger.setLevel(level.upper() if isinstance(level, str) else level)
+
+        for handler in list(_logger.handlers):
+            _logger.removeHandler(handler)
+            handler.close()
+
+        formatter = JsonFormatter() if jsonLines else TextFormatter()
+        handlers = []
+        if stream is not None or filename is None:
+            handlers.append(logging.StreamHandler(stream if stream is not None else sys.stdout))
+        if filename is not None:
+            handlers.append(logging.FileHandler(filename))
+        for handler in handlers:
+            # Measurements of 'timed' reach the handlers whenever they are recorded, e.g. for metrics
+            handler.setLevel(_logger.getEffectiveLevel())
+            handler.setFormatter(formatter)
+            _logger.addHandler(handler)
+
+        Logger.traceMemory = traceMemory
+        if traceMemory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @staticmethod
+    def isEnabledFor(level):
+        '''
+        Tells whether messages of a level are logged, to skip building costly messages
+
+        @param {string|int} level - Level, e.g. 'DEBUG'
+        @returns {boolean} - True if the level is logged
+        '''
+
+        return _logger.isEnabledFor(logging.getLevelName(level) if isinstance(level, str) else level)
+
     @staticmethod
     def LOGERROR(filename, functionName, errorSummary, errorObject=None):
         '''
-        Logs the error occurrences for PCATR
+        Logs the error occurrences for PCATR. The stack trace of the exception being
+        handled is logged with it, or of 'errorObject' when it is an exception
 
         @param {string} filename - Name of file in which the function is called
         @param {string} functionName - Name of function in which the function is called
         @param {string} errorSummary - A short error description
         @param {string} errorObject - Full error with stack trace
-        @returns {None} 
+        @returns {None}
         '''
 
-        if errorObject != None:
-            print("[-]ERROR:\t {}\t {}\t {}".format(filename, functionName, errorSummary))
+        if not _logger.isEnabledFor(logging.ERROR):
+            return
+
+        if isinstance(errorObject, BaseException):
+            excInfo = (type(errorObject), errorObject, errorObject.__traceback__)
         else:
-            print("[-]ERROR:\t {}\t {}\t {}\n{}".format(filename, functionName, errorSummary, errorObject))
-    
+            excInfo = sys.exc_info() if sys.exc_info()[0] is not None else None
+            if errorObject is not None:
+                errorSummary = "{}\n{}".format(errorSummary, errorObject)
+        _logger.error(errorSummary, exc_info=excInfo, extra={'pcatrFile': filename, 'pcatrFunction': functionName})
+
     @staticmethod
-    def LOGDEBUG(filename, functionName, debugSummary):
+    def LOGDEBUG(filename, functionName, debugSummary, *args):
         '''
         Logs the success/debug/analytical occurrences for PCATR
 
         @param {string} filename - Name of file in which the function is called
         @param {string} functionName - Name of function in which the function is called
-        @param {string} debugSummary - A short debug description
-        @returns {None} 
+        @param {string} debugSummary - A short debug description, a %-format string when 'args' are given
+        @param {object} args - Values of the format string, only formatted when debug messages are logged
+        @returns {None}
         '''
 
-        print("[+]DEBUG:\t {}\t {}\t {}".format(filename, functionName, debugSummary))
-        
+        if _logger.isEnabledFor(logging.DEBUG):
+            _logger.debug(debugSummary, *args, extra={'pcatrFile': filename, 'pcatrFunction': functionName})
+
     @staticmethod
-    def LOGINFO(filename, functionName, infoSummary):
+    def LOGINFO(filename, functionName, infoSummary, *args):
         '''
         Logs the general information occurrences for PCATR
 
         @param {string} filename - Name of file in which the function is called
         @param {string} functionName - Name of function in which the function is called
-        @param {string} infoSummary - A short info description
-        @returns {None} 
+        @param {string} infoSummary - A short info description, a %-format string when 'args' are given
+        @param {object} args - Values of the format string, only formatted when info messages are logged
+        @returns {None}
         '''
 
-        print("[!]INFO:\t {}\t {}\t {}".format(filename, functionName, infoSummary))
\ No newline at end of file
+        if _logger.isEnabledFor(logging.INFO):
+            _logger.info(infoSummary, *args, extra={'pcatrFile': filename, 'pcatrFunction': functionName})
+
+class timed:
+    '''
+    This class measures wall time, rows processed and peak memory of a
+    function or a block and logs them at debug level on the 'PCATR.timing'
+    logger. Nothing is measured while debug messages are not logged.
+
+    As a decorator the rows are the length of the first DataFrame, Series or
+    array argument, or of the result if there is none:
+
+        @timed()
+        def fit(self, trainData): ...
+
+    As a context manager the rows are given, or set on the measurement:
+
+        with timed('DataTank::append', 'data_tank.py') as timing:
+            timing.rows = len(newRows)
+
+    @param {string} name - Name of the measurement, 'Class::method' of the decorated function if None
+    @param {string} filename - Name of file of the measurement, of the decorated function if None
+    @param {int} rows - Number of rows processed
+    '''
+
+    # Measurements in progress, innermost last, to carry peak memory to the outer ones
+    _active = []
+
+    def __init__(self, name=None, filename=None, rows=None):
+        self.name = name
+        self.filename = filename
+        self.rows = rows
+        self.seconds = None
+        self.peakMemory = None
+        self._enabled = False
+
+    def __call__(self, function):
+        name = self.name if self.name is not None else function.__qualname__.replace('.', '::')
+        filename = self.filename if self.filename is not None else os.path.basename(inspect.getfile(function))
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _timingLogger.isEnabledFor(logging.DEBUG):
+                return function(*args, **kwargs)
+
+            with timed(name, filename, _rowsOf(args)) as timing:
+                result = function(*args, **kwargs)
+                if timing.rows is None:
+                    timing.rows = _rowsOf((result,))
+            return result
+        return wrapper
+
+    def __enter__(self):
+        self._enabled = _timingLogger.isEnabledFor(logging.DEBUG)
+        if not self._enabled:
+            return self
+
+        self._memoryStart = None
+        if Logger.traceMemory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            if timed._active:
+                timed._active[-1]._notePeak(peak)
+            tracemalloc.reset_peak()
+            self._memoryStart, self.peakMemory = current, 0
+
+        timed._active.append(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        if not self._enabled:
+            return False
+
+        self.seconds = time.perf_counter() - self._start
+        timed._active.remove(self)
+        if self._memoryStart is not None:
+            peak = tracemalloc.get_traced_memory()[1]
+            self._notePeak(peak)
+            if timed._active:
+                timed._active[-1]._notePeak(peak)
+
+        timing = {'name': self.name, 'seconds': self.seconds, 'rows': self.rows, 'peakMemory': self.peakMemory,
+            'failed': excType is not None}
+        _timingLogger.debug("%.6fs, %s rows, %s bytes peak memory%s", self.seconds, self.rows, self.peakMemory,
+            ', failed' if excType is not None else '',
+            extra={'pcatrFile': self.filename, 'pcatrFunction': self.name, 'timing': timing})
+        return False
+
+    def _notePeak(self, peak):
+        '''
+        Raises the peak memory of the measurement to a traced peak
+
+        @param {int} peak - Traced peak since the last reset, in bytes
+        @returns {None}
+        '''
+
+        if self._memoryStart is not None:
+            self.peakMemory = max(self.peakMemory, peak - self._memoryStart)
+
+def addTimingHandler(handler):
+    '''
+    Passes the measurements of 'timed' to a handler whatever the level of the
+    'PCATR' logger, which turns the measurements on
+
+    @param {Handler} handler - Handler of the records of 'PCATR.timing', their 'timing' attribute holds the measurement
+    @returns {None}
+    '''
+
+    _timingLogger.addHandler(handler)
+    _timingLogger.setLevel(logging.DEBUG)
+
+def removeTimingHandler(handler):
+    '''
+    Stops passing the measurements of 'timed' to a handler given to 'addTimingHandler'
+
+    @param {Handler} handler - Handler to remove
+    @returns {None}
+    '''
+
+    _timingLogger.removeHandler(handler)
+    if not _timingLogger.handlers:
+        _timingLogger.setLevel(logging.NOTSET)
+
+def _rowsOf(values):
+    '''
+    Gives the length of the first DataFrame, Series or array among values
+
+    @param {tuple} values - Arguments or results of a function
+    @returns {int} - Number of rows, None if no value has rows
+    '''
+
+    for value in values:
+        if getattr(value, 'ndim', 0) >= 1:
+            return len(value)
+    return None
+
+if not _logger.handlers:
+    _logger.setLevel(DEFAULT_LEVEL)
+    _logger.propagate = False
+    Logger.configure()
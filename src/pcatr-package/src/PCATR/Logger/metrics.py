@@ -0,0 +1,399 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+This file implements the optional metrics of PCATR in the
+Prometheus text format: latency histograms of 'fit' and 'predict'
+per algorithm, rows processed by 'DataTank', cache hits and the
+drift of forecast errors. Metrics are collected only after 'enable'
+and are served over HTTP or dumped to a file for a scraper.
+"""
+
+__author__ = 'Emad Bin Abid, Ateeb Ahmed, Syed Bilal Hoda'
+__copyright__ = 'Copyright 2019, Prediction of Call Arrival Times and Rates'
+__credits__ = ['Afiniti Software Solutions (Pvt.) Ltd.']
+__version__ = '0.0.1'
+__maintainer__ = 'Emad Bin Abid, Ateeb Ahmed, Syed Bilal Hoda'
+__status__ = 'dev'
+
+# Libs
+import os
+import math
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+
+# Owned
+from PCATR.Logger import logger
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+ERROR_BUCKETS = (1, 2, 5, 10, 20, 30, 60, 120, 300, 600)
+
+class Metric:
+    '''
+    This class implements the samples of a metric family, one per
+    combination of label values, and their text exposition
+
+    @param {string} name - Name of the metric
+    @param {string} documentation - Help text of the metric
+    @param {tuple} labelNames - Names of the labels of every sample
+    '''
+
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labelNames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelNames = tuple(labelNames)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def exposition(self):
+        '''
+        Gives the metric in the Prometheus text format
+
+        @returns {string} - HELP and TYPE lines followed by every sample
+        '''
+
+        lines = ['# HELP {} {}'.format(self.name, self.documentation.replace('\\', '\\\\').replace('\n', '\\n')),
+            '# TYPE {} {}'.format(self.name, self.kind)]
+        with self.lock:
+            for labelValues, value in sorted(self.values.items()):
+                lines.extend(self._samples(labelValues, value))
+        return '\n'.join(lines) + '\n'
+
+    def _samples(self, labelValues, value):
+        '''
+        Gives the sample lines of one combination of label values
+
+        @param {tuple} labelValues - Value of every label
+        @param {object} value - State of the combination
+        @returns {List<string>} - Sample lines
+        '''
+
+        return ['{}{} {}'.format(self.name, _labelText(self.labelNames, labelValues), _valueText(value))]
+
+class Counter(Metric):
+    '''
+    This class implements a counter, a total that only increases
+    '''
+
+    kind = 'counter'
+
+    def inc(self, labelValues=(), amount=1):
+        '''
+        Increases the counter of a combination of label values
+
+        @param {tuple} labelValues - Value of every label
+        @param {float} amount - Non-negative increase
+        @returns {None}
+        '''
+
+        with self.lock:
+            self.values[labelValues] = self.values.get(labelValues, 0) + amount
+
+class Gauge(Metric):
+    '''
+    This class implements a gauge, a value that is set
+    '''
+
+    kind = 'gauge'
+
+    def set(self, labelValues=(), value=0):
+        '''
+        Sets the gauge of a combination of label values
+
+        @param {tuple} labelValues - Value of every label
+        @param {float} value - New value
+        @returns {None}
+        '''
+
+        with self.lock:
+            self.values[labelValues] = value
+
+class Histogram(Metric):
+    '''
+    This class implements a histogram of observations over cumulative
+    buckets, with their sum and count
+
+    @param {tuple} buckets - Increasing upper bounds of the buckets, +Inf is added
+    '''
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelNames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelNames)
+        self.buckets = np.array(sorted(buckets), dtype='float64')
+
+    def observe(self, labelValues=(), values=0):
+        '''
+        Adds one observation, or an array of them, to a combination of label values
+
+        @param {tuple} labelValues - Value of every label
+        @param {float|ndarray} values - Observation(s)
+        @returns {None}
+        '''
+
+        values = np.atleast_1d(np.asarray(values, dtype='float64'))
+        values = values[~np.isnan(values)]
+        # Bucket i counts the values at or below its bound, the last one is +Inf
+        counts = np.bincount(np.searchsorted(self.buckets, values, side='left'), minlength=len(self.buckets) + 1)
+        with self.lock:
+            state = self.values.setdefault(labelValues, [np.zeros(len(self.buckets) + 1, dtype='int64'), 0.0])
+            state[0] += counts
+            state[1] += float(values.sum())
+
+    def _samples(self, labelValues, value):
+        counts, total = value
+        cumulative = np.cumsum(counts)
+        bounds = [_valueText(bound) for bound in self.buckets] + ['+Inf']
+        lines = ['{}_bucket{} {}'.format(self.name, _labelText(self.labelNames + ('le',), labelValues + (bound,)), count)
+            for bound, count in zip(bounds, cumulative)]
+        lines.append('{}_sum{} {}'.format(self.name, _labelText(self.labelNames, labelValues), _valueText(total)))
+        lines.append('{}_count{} {}'.format(self.name, _labelText(self.labelNames, labelValues), cumulative[-1]))
+        return lines
+
+class MetricsRegistry:
+    '''
+    This class implements the metrics of PCATR and their exposition.
+    Measurements of 'logger.timed' feed the latency and row metrics,
+    cache requests and forecast errors are recorded by their callers.
+
+    @param {float} errorHalfLife - Number of forecasts over which the weight of an error in the recent mean error halves
+    '''
+
+    def __init__(self, errorHalfLife=1000):
+        self.callDuration = Histogram('pcatr_call_duration_seconds',
+            'Wall time of fit, predict and data processing calls', ('algorithm', 'method'))
+        self.callFailures = Counter('pcatr_call_failures_total',
+            'Calls that raised an exception', ('algorithm', 'method'))
+        self.rowsProcessed = Counter('pcatr_rows_processed_total',
+            'Rows of data processed by calls', ('algorithm', 'method'))
+        self.cacheRequests = Counter('pcatr_cache_requests_total',
+            'Requests of the processed data cache of DataTank', ('result',))
+        self.forecastError = Histogram('pcatr_forecast_absolute_error_seconds',
+            'Absolute error of forecast intervals until the next call', ('algorithm',), ERROR_BUCKETS)
+        self.recentError = Gauge('pcatr_forecast_absolute_error_recent_seconds',
+            'Exponentially weighted mean absolute error of recent forecasts', ('algorithm',))
+        self.errorDrift = Gauge('pcatr_forecast_error_drift_ratio',
+            'Recent mean absolute error over the mean absolute error of all forecasts', ('algorithm',))
+        self.metrics = [self.callDuration, self.callFailures, self.rowsProcessed, self.cacheRequests,
+            self.forecastError, self.recentError, self.errorDrift]
+
+        self.errorDecay = 0.5 ** (1.0 / errorHalfLife)
+        self.lock = threading.Lock()
+        self._recentErrors = {}
+
+    def observeCall(self, timing):
+        '''
+        Records a measurement of 'logger.timed'
+
+        @param {dict} timing - Measurement with 'name' as 'Class::method', 'seconds', 'rows' and 'failed'
+        @returns {None}
+        '''
+
+        algorithm, _, method = timing['name'].rpartition('::')
+        labelValues = (algorithm, method)
+        self.callDuration.observe(labelValues, timing['seconds'])
+        if timing['failed']:
+            self.callFailures.inc(labelValues)
+        if timing['rows'] is not None:
+            self.rowsProcessed.inc(labelValues, timing['rows'])
+
+    def observeCacheRequest(self, hit):
+        '''
+        Records a request of the processed data cache
+
+        @param {boolean} hit - True if the cached data was read
+        @returns {None}
+        '''
+
+        self.cacheRequests.inc(('hit' if hit else 'miss',))
+
+    def observeForecastErrors(self, algorithm, actual, predicted):
+        '''
+        Records the errors of forecasts whose actual values are known, in the
+        order they were made. The recent mean error weighs later errors more,
+        so its ratio to the mean of all errors rises when a model drifts
+
+        @param {string} algorithm - Name of the forecaster, e.g. 'SmoothingForecast'
+        @param {float|ndarray} actual - Actual values
+        @param {float|ndarray} predicted - Predicted values
+        @returns {None}
+        '''
+
+        errors = np.abs(np.atleast_1d(np.asarray(actual, dtype='float64') - np.asarray(predicted, dtype='float64')))
+        errors = errors[~np.isnan(errors)]
+        if len(errors) == 0:
+            return
+        self.forecastError.observe((algorithm,), errors)
+
+        # Exponential moving average over the errors at once, the latest error has weight (1 - decay)
+        weights = (1 - self.errorDecay) * self.errorDecay ** np.arange(len(errors) - 1, -1, -1, dtype='float64')
+        with self.lock:
+            recent = self._recentErrors.get(algorithm)
+            if recent is None:
+                recent = errors[0]
+            recent = recent * self.errorDecay ** len(errors) + float(weights @ errors)
+            self._recentErrors[algorithm] = recent
+
+        self.recentError.set((algorithm,), recent)
+        counts, total = self.forecastError.values[(algorithm,)]
+        meanError = total / counts.sum()
+        self.errorDrift.set((algorithm,), recent / meanError if meanError > 0 else float('nan'))
+
+    def exposition(self):
+        '''
+        Gives every metric in the Prometheus text format
+
+        @returns {string} - Text exposition
+        '''
+
+        return ''.join(metric.exposition() for metric in self.metrics)
+
+    def dump(self, filename):
+        '''
+        Writes the text exposition to a file, replacing it at once so that
+        a scraper of the file never reads a partial dump
+
+        @param {string} filename - Name of file, e.g. in the textfile directory of a node exporter
+        @returns {None}
+        '''
+
+        temporaryPath = '{}.{}.tmp'.format(filename, os.getpid())
+        with open(temporaryPath, 'w') as file:
+            file.write(self.exposition())
+        os.replace(temporaryPath, filename)
+
+    def serve(self, port=9464, host='127.0.0.1'):
+        '''
+        Serves the text exposition over HTTP from a background thread
+
+        @param {int} port - Port to listen on, any free port if 0
+        @param {string} host - Address to listen on
+        @returns {ThreadingHTTPServer} - Server, its 'server_address' holds the port and 'shutdown' stops it
+        '''
+
+        registry = self
+
+        class MetricsRequestHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = registry.exposition().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.Logger.LOGDEBUG("metrics.py", "MetricsRegistry::serve", format, *args)
+
+        server = ThreadingHTTPServer((host, port), MetricsRequestHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name='pcatr-metrics', daemon=True).start()
+        return server
+
+class MetricsHandler(logging.Handler):
+    '''
+    This class feeds the measurements logged by 'logger.timed' to a registry
+
+    @param {MetricsRegistry} registry - Registry to record to
+    '''
+
+    def __init__(self, registry):
+        super().__init__(logging.DEBUG)
+        self.registry = registry
+
+    def emit(self, record):
+        timing = getattr(record, 'timing', None)
+        if timing is not None:
+            self.registry.observeCall(timing)
+
+# Registry of the process, recording only between 'enable' and 'disable'
+REGISTRY = MetricsRegistry()
+_handler = None
+
+def enable(registry=None):
+    '''
+    Starts recording the measurements of 'logger.timed' and cache requests, which
+    turns the measurements on without logging them below the level of 'PCATR'
+
+    @param {MetricsRegistry} registry - Registry to record to, 'REGISTRY' if None
+    @returns {MetricsRegistry} - Registry recorded to
+    '''
+
+    global REGISTRY, _handler
+    disable()
+    if registry is not None:
+        REGISTRY = registry
+    _handler = MetricsHandler(REGISTRY)
+    logger.addTimingHandler(_handler)
+    return REGISTRY
+
+def disable():
+    '''
+    Stops recording, the recorded metrics are kept
+
+    @returns {None}
+    '''
+
+    global _handler
+    if _handler is not None:
+        logger.removeTimingHandler(_handler)
+        _handler = None
+
+def isEnabled():
+    '''
+    Tells whether metrics are recorded
+
+    @returns {boolean} - True between 'enable' and 'disable'
+    '''
+
+    return _handler is not None
+
+def observeCacheRequest(hit):
+    '''
+    Records a request of the processed data cache, if metrics are recorded
+
+    @param {boolean} hit - True if the cached data was read
+    @returns {None}
+    '''
+
+    if _handler is not None:
+        REGISTRY.observeCacheRequest(hit)
+
+def _labelText(labelNames, labelValues):
+    '''
+    Formats label values as '{name="value",...}', escaping the values
+
+    @param {tuple} labelNames - Names of the labels
+    @param {tuple} labelValues - Value of every label
+    @returns {string} - Label set, empty without labels
+    '''
+
+    if not labelNames:
+        return ''
+    pairs = ['{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in zip(labelNames, labelValues)]
+    return '{' + ','.join(pairs) + '}'
+
+def _valueText(value):
+    '''
+    Formats a sample value, with the Prometheus spelling of infinities and NaN
+
+    @param {float} value - Value
+    @returns {string} - Formatted value
+    '''
+
+    value = float(value)
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(int(value)) if value.is_integer() and abs(value) < 2 ** 53 else repr(value)
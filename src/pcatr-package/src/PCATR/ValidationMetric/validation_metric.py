@@ -2,7 +2,7 @@
 # coding: utf-8
 
 """
-This file implements the 'ValidationMetric' class 
+This file implements the 'ValidationMetric' class
 to compute validation results of trained models on
 test samples.
 """
@@ -10,19 +10,22 @@ test samples.
 __author__ = 'Emad Bin Abid, Ateeb Ahmed, Syed Bilal Hoda'
 __copyright__ = 'Copyright 2019, Prediction of Call Arrival Times and Rates'
 __credits__ = ['Afiniti Software Solutions (Pvt.) Ltd.']
-__version__ = '0.0.1'
+__version__ = '0.0.2'
 __maintainer__ = 'Emad Bin Abid, Ateeb Ahmed, Syed Bilal Hoda'
 __status__ = 'dev'
 
 # Libs
-from sklearn.metrics import mean_squared_error
-from math import sqrt
+import numpy as np
+import pandas as pd
+
+METRICS = ['MSE', 'RMSE', 'MAE', 'MAPE', 'sMAPE', 'Pinball', 'PoissonDeviance', 'Calibration']
 
 class ValidationMetric:
     '''
-    This class implements algorithms to compute 
+    This class implements algorithms to compute
     validation results of trained models on
-    test samples.
+    test samples. Every metric accepts the predictions
+    of many models at once as rows of a matrix.
     '''
     def __init__(self):
         pass
@@ -33,12 +36,11 @@ class ValidationMetric:
         and predicted values
 
         @param {DataFrame column} actual  - Actual values
-        @param {DataFrame column} predicted - Predicted values
-        @returns {int} mean squared error value  
+        @param {DataFrame column} predicted - Predicted values, or one row per model
+        @returns {float|ndarray} mean squared error value, one per model for rows of predictions
         '''
 
-        mse = mean_squared_error(actual, predicted)
-        return mse
+        return self._meanLoss('MSE', actual, predicted)
 
     def rootMeanSquaredError(self, actual, predicted):
         '''
@@ -46,9 +48,241 @@ class ValidationMetric:
         and predicted values
 
         @param {DataFrame column} actual  - Actual values
-        @param {DataFrame column} predicted - Predicted values
-        @returns {int} mean squared error value  
+        @param {DataFrame column} predicted - Predicted values, or one row per model
+        @returns {float|ndarray} root mean squared error value, one per model for rows of predictions
+        '''
+
+        return np.sqrt(self.meanSquaredError(actual, predicted))
+
+    def meanAbsoluteError(self, actual, predicted):
+        '''
+        Finds the mean absolute error between actual
+        and predicted values
+
+        @param {DataFrame column} actual  - Actual values
+        @param {DataFrame column} predicted - Predicted values, or one row per model
+        @returns {float|ndarray} mean absolute error value, one per model for rows of predictions
+        '''
+
+        return self._meanLoss('MAE', actual, predicted)
+
+    def meanAbsolutePercentageError(self, actual, predicted):
+        '''
+        Finds the mean absolute percentage error between actual
+        and predicted values, actual values of zero are left out
+
+        @param {DataFrame column} actual  - Actual values
+        @param {DataFrame column} predicted - Predicted values, or one row per model
+        @returns {float|ndarray} mean absolute percentage error value, one per model for rows of predictions
+        '''
+
+        return self._meanLoss('MAPE', actual, predicted)
+
+    def symmetricMeanAbsolutePercentageError(self, actual, predicted):
+        '''
+        Finds the symmetric mean absolute percentage error between actual
+        and predicted values, in [0, 200]
+
+        @param {DataFrame column} actual  - Actual values
+        @param {DataFrame column} predicted - Predicted values, or one row per model
+        @returns {float|ndarray} symmetric mean absolute percentage error value, one per model for rows of predictions
+        '''
+
+        return self._meanLoss('sMAPE', actual, predicted)
+
+    def pinballLoss(self, actual, predicted, quantile=0.5):
+        '''
+        Finds the pinball loss of predicted quantiles of actual values,
+        half the mean absolute error for the median
+
+        @param {DataFrame column} actual  - Actual values
+        @param {DataFrame column} predicted - Predicted quantiles, or one row per model
+        @param {float} quantile - Probability of the predicted quantiles
+        @returns {float|ndarray} pinball loss value, one per model for rows of predictions
+        '''
+
+        return self._meanLoss('Pinball', actual, predicted, quantile)
+
+    def poissonDeviance(self, actual, predicted):
+        '''
+        Finds the mean Poisson deviance of predicted means of
+        counts or rates, predicted values must be positive
+
+        @param {DataFrame column} actual  - Actual values
+        @param {DataFrame column} predicted - Predicted values, or one row per model
+        @returns {float|ndarray} mean Poisson deviance value, one per model for rows of predictions
+        '''
+
+        return self._meanLoss('PoissonDeviance', actual, predicted)
+
+    def calibration(self, actual, predicted):
+        '''
+        Finds the fraction of actual values at or below the predicted values,
+        which matches the probability of the predicted quantiles when calibrated
+
+        @param {DataFrame column} actual  - Actual values
+        @param {DataFrame column} predicted - Predicted quantiles, or one row per model
+        @returns {float|ndarray} observed coverage, one per model for rows of predictions
         '''
 
-        mse = sqrt(mean_squared_error(actual, predicted))
-        return mse
\ No newline at end of file
+        return self._meanLoss('Calibration', actual, predicted)
+
+    def evaluate(self, actual, predictions, metrics=None, groups=None, quantile=0.5):
+        '''
+        Scores the predictions of many models with many metrics at once. Losses
+        of every element are computed on the whole (models, values) matrix and
+        averaged per group with one bincount, so there are no loops over models
+        or groups. Missing predictions, e.g. of a model that failed, are left out
+        of the scores and of 'Count' and counted in 'Invalid' instead
+
+        @param {DataFrame column} actual  - Actual values
+        @param {dict|DataFrame|ndarray} predictions - Predicted values of every model, as {name: values}, columns of a DataFrame or rows of a matrix
+        @param {List<string>} metrics - Names in 'METRICS', all of them if None
+        @param {dict|DataFrame} groups - Columns to break the scores down by, e.g. {'Fold': folds, 'DayOfWeek': testData['DayOfWeek']}
+        @param {float} quantile - Probability of the predicted quantiles, for 'Pinball'
+        @returns {DataFrame} - Score of every metric, the number of scored and of missing values, indexed by model and groups
+        '''
+
+        names, predicted = _predictionMatrix(predictions)
+        actual = np.asarray(actual, dtype='float64')
+        _checkLengths(actual, predicted)
+        metrics = list(METRICS if metrics is None else metrics)
+
+        # Every (model, group) pair is a bin of the flattened loss matrix
+        groupNames, groupCodes, groupLevels = _groupCodes(groups, len(actual))
+        numGroups = len(groupLevels)
+        bins = (np.arange(len(names))[:, None] * numGroups + groupCodes[None, :]).ravel()
+        numBins = len(names) * numGroups
+
+        scores = {}
+        for metric in metrics:
+            lossName = 'MSE' if metric == 'RMSE' else metric
+            loss, valid = _elementLoss(lossName, actual, predicted, quantile)
+            sums = np.bincount(bins, weights=np.where(valid, loss, 0).ravel(), minlength=numBins)
+            counts = np.bincount(bins, weights=valid.ravel(), minlength=numBins)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                scores[metric] = sums / counts
+            if metric == 'RMSE':
+                scores[metric] = np.sqrt(scores[metric])
+        missing = np.isnan(predicted - actual).ravel()
+        scores['Count'] = np.bincount(bins, weights=~missing, minlength=numBins).astype('int64')
+        scores['Invalid'] = np.bincount(bins, weights=missing, minlength=numBins).astype('int64')
+
+        if groupNames:
+            # Only the group combinations that occur in the data are kept
+            levels = [level if isinstance(level, tuple) else (level,) for level in groupLevels]
+            index = pd.MultiIndex.from_tuples([(name,) + level for name in names for level in levels],
+                names=['Model'] + groupNames)
+        else:
+            index = pd.Index(names, name='Model')
+        return pd.DataFrame(scores, index=index)[metrics + ['Count', 'Invalid']]
+
+    def _meanLoss(self, metric, actual, predicted, quantile=0.5):
+        '''
+        Averages the losses of a metric over the values of every model,
+        missing values are an error as the mean would leave them out
+
+        @param {string} metric - Name in 'METRICS' with a loss per element
+        @param {DataFrame column} actual  - Actual values
+        @param {DataFrame column} predicted - Predicted values, or one row per model
+        @param {float} quantile - Probability of the predicted quantiles, for 'Pinball'
+        @returns {float|ndarray} - Mean loss, one per model for rows of predictions
+        '''
+
+        predicted = np.asarray(predicted, dtype='float64')
+        actual = np.asarray(actual, dtype='float64')
+        _checkLengths(actual, np.atleast_2d(predicted))
+        if np.isnan(actual).any() or np.isnan(predicted).any():
+            raise ValueError("Actual and predicted values must not contain NaN")
+
+        loss, valid = _elementLoss(metric, actual, np.atleast_2d(predicted), quantile)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = np.where(valid, loss, 0).sum(axis=1) / valid.sum(axis=1)
+        return float(means[0]) if predicted.ndim == 1 else means
+
+def _elementLoss(metric, actual, predicted, quantile):
+    '''
+    Gives the loss of every predicted value and whether it counts
+    towards the mean
+
+    @param {string} metric - Name in 'METRICS' with a loss per element
+    @param {ndarray} actual - Actual values of shape (values,)
+    @param {ndarray} predicted - Predicted values of shape (models, values)
+    @param {float} quantile - Probability of the predicted quantiles, for 'Pinball'
+    @returns {tuple} - (losses, valid) of shape (models, values)
+    '''
+
+    error = predicted - actual
+    valid = ~np.isnan(error)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if metric == 'MSE':
+            loss = error * error
+        elif metric == 'MAE':
+            loss = np.abs(error)
+        elif metric == 'MAPE':
+            loss = 100 * np.abs(error) / np.abs(actual)
+            valid &= actual != 0
+        elif metric == 'sMAPE':
+            denominator = np.abs(actual) + np.abs(predicted)
+            loss = np.where(denominator > 0, 200 * np.abs(error) / denominator, 0)
+        elif metric == 'Pinball':
+            loss = np.maximum(-quantile * error, (1 - quantile) * error)
+        elif metric == 'PoissonDeviance':
+            ratio = np.where(actual > 0, actual * np.log(actual / predicted), 0)
+            loss = 2 * (ratio + error)
+            valid &= predicted > 0
+        elif metric == 'Calibration':
+            loss = (actual <= predicted).astype('float64')
+        else:
+            raise ValueError("Unknown metric '{}', expected one of {}".format(metric, METRICS))
+    return loss, valid
+
+def _checkLengths(actual, predicted):
+    '''
+    Checks that every model has one predicted value per actual value
+
+    @param {ndarray} actual - Actual values of shape (values,)
+    @param {ndarray} predicted - Predicted values of shape (models, values)
+    @returns {None}
+    '''
+
+    if actual.ndim != 1 or predicted.shape[-1] != len(actual):
+        raise ValueError("Expected {} predicted values per model like the actual values, got {}".format(
+            len(actual), predicted.shape[-1]))
+
+def _predictionMatrix(predictions):
+    '''
+    Gives the names of the models and their predictions as rows of a matrix
+
+    @param {dict|DataFrame|ndarray} predictions - Predicted values of every model
+    @returns {tuple} - (model names, float64 array of shape (models, values))
+    '''
+
+    if isinstance(predictions, dict):
+        return list(predictions), np.vstack([np.asarray(values, dtype='float64') for values in predictions.values()])
+    if isinstance(predictions, pd.DataFrame):
+        return list(predictions.columns), predictions.to_numpy(dtype='float64').T
+    predicted = np.atleast_2d(np.asarray(predictions, dtype='float64'))
+    return list(range(len(predicted))), predicted
+
+def _groupCodes(groups, numValues):
+    '''
+    Gives a code for every combination of the group columns that occurs
+
+    @param {dict|DataFrame} groups - Columns to break the scores down by, none if None
+    @param {int} numValues - Number of values
+    @returns {tuple} - (names of the groups, code of every value, Index of the combinations)
+    '''
+
+    if groups is None or len(groups) == 0:
+        return [], np.zeros(numValues, dtype='int64'), pd.Index([None])
+
+    frame = pd.DataFrame({name: np.asarray(values) for name, values in dict(groups).items()})
+    names = list(frame.columns)
+    if len(names) == 1:
+        codes, levels = pd.factorize(frame[names[0]], sort=True, use_na_sentinel=False)
+        return names, codes.astype('int64'), pd.Index(levels)
+
+    keys = pd.MultiIndex.from_frame(frame)
+    codes, levels = pd.factorize(keys, sort=True, use_na_sentinel=False)
+    return names, codes.astype('int64'), levels
@@ -28,6 +28,7 @@ setup(name="PCATR",
         'PCATR/CallTimePredictor',
         'PCATR/CallTimePredictor/CTPAlgorithm',
         'PCATR/CallTimePredictor/CTPDataAnalysis',
+        'PCATR/CallTimePredictor/CTPBacktest',
         'PCATR/DataTank', 
         'PCATR/ValidationMetric', 
         'PCATR/Logger'
@@ -35,11 +36,16 @@ setup(name="PCATR",
     install_requires=[
         'pandas',
         'numpy',
+        'scipy',
         'statsmodels',
         'matplotlib',
-        'sklearn',
+        'scikit-learn',
         'seaborn',
         'torch'
         ],
+    extras_require={
+        'cache': ['pyarrow'],
+        'onnx': ['onnx']
+        },
     obsoletes=[]
 )
\ No newline at end of file